@@ -0,0 +1,49 @@
+from assets import asset_registry
+
+# 無敵閃爍、Boss 瞬移預警時半透明的透明度（和原本 set_alpha(100) 相同）
+DIMMED_ALPHA = 100
+
+
+class AnimationClip:
+    """
+    一段動畫的所有幀，載入時就準備好 朝右 / 朝左 × 正常 / 半透明 四種版本。
+    每幀只要 get(index, facing_left, dimmed) 查表，不需要 transform.flip() 或 set_alpha()，
+    也不會改到 asset_registry 裡大家共用的幀。
+
+    clip[i]、len(clip)、for frame in clip 和原本的 list 一樣，拿到的是朝右、不透明的版本。
+    """
+
+    def __init__(self, frames, dimmed_alpha=DIMMED_ALPHA):
+        self.frames = tuple(frames)
+        # 翻轉 / 半透明的版本也經過 asset_registry，同一張幀（例如死亡和倒放的復活動畫）只做一次
+        left = tuple(asset_registry.get_transformed(frame, None, "flip_x") for frame in self.frames)
+        right_dimmed = tuple(asset_registry.get_transformed(frame, None, "scale", dimmed_alpha)
+                             for frame in self.frames)
+        left_dimmed = tuple(asset_registry.get_transformed(frame, None, "flip_x", dimmed_alpha)
+                            for frame in self.frames)
+        # _variants[facing_left][dimmed][index]
+        self._variants = ((self.frames, right_dimmed), (left, left_dimmed))
+
+    def get(self, index, facing_left=False, dimmed=False):
+        return self._variants[facing_left][dimmed][index]
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        return iter(self.frames)
+
+    def __bool__(self):
+        return bool(self.frames)
+
+
+def load_clip(loader, *args, dimmed_alpha=DIMMED_ALPHA, **kwargs):
+    """
+    呼叫動畫 loader 並包成 AnimationClip，同樣的 loader + 參數只建立一次。
+    例如：load_clip(Knight_animation.load_knight_run_animation, target_width=45, target_height=45)
+    """
+    key = (loader.__qualname__, args, tuple(sorted(kwargs.items())), dimmed_alpha)
+    return asset_registry.get_clip(key, lambda: AnimationClip(loader(*args, **kwargs), dimmed_alpha))
@@ -1,8 +1,11 @@
 import pygame
 import os
 
+from assets import asset_registry, cached_frames
+
 class Witch_animation:
     # 定义一个函数来加载并切割女巫的奔跑精灵图集
+    @cached_frames
     def load_witch_run_animation(target_width, target_height):
         # 尝试从两个路径加载女巫奔跑动画的精灵图集
         witch_sprite_sheet_path = "./plays_animation_art/B_witch_run.png"
@@ -12,7 +15,7 @@ class Witch_animation:
                 raise FileNotFoundError(f"女巫奔跑动画图片未找到: {witch_sprite_sheet_path} 或 ./plays_animation_art/B_witch_run.png")
 
         # 加载图片并保留透明通道
-        witch_sprite_sheet = pygame.image.load(witch_sprite_sheet_path).convert_alpha()
+        witch_sprite_sheet = asset_registry.load_image(witch_sprite_sheet_path)
         # 获取整张图的宽度和每帧的高度（8帧竖直排列）
         witch_frame_width = witch_sprite_sheet.get_width()
         witch_frame_height = witch_sprite_sheet.get_height() // 8
@@ -30,6 +33,7 @@ class Witch_animation:
         return frames
 
     # 定义一个函数来加载并切割女巫的闲置精灵图集
+    @cached_frames
     def load_witch_idle_animation(target_width, target_height):
         # 尝试从两个路径加载女巫闲置动画的精灵图集
         idle_sprite_sheet_path = "./plays_animation_art/B_witch_idle.png"
@@ -39,7 +43,7 @@ class Witch_animation:
                 raise FileNotFoundError(f"女巫闲置动画图片未找到: {idle_sprite_sheet_path} 或 ./plays_animation_art/B_witch_idle.png")
 
         # 加载图片并保留透明通道
-        idle_sprite_sheet = pygame.image.load(idle_sprite_sheet_path).convert_alpha()
+        idle_sprite_sheet = asset_registry.load_image(idle_sprite_sheet_path)
         num_idle_frames = 6
         # 获取整张图的宽度和每帧的高度（6帧竖直排列）
         idle_frame_width = idle_sprite_sheet.get_width()
@@ -58,6 +62,7 @@ class Witch_animation:
         return frames
 
 
+    @cached_frames
     def load_witch_death_animation(target_width, target_height):
         """
         加载女巫死亡动画的精灵图集，并将其切割为单独的帧。
@@ -73,7 +78,7 @@ class Witch_animation:
             if not os.path.exists(death_sprite_sheet_path):
                 raise FileNotFoundError(f"女巫死亡动画图片未找到: {death_sprite_sheet_path} 或 ./plays_animation_art/B_witch_death.png")
 
-        death_sprite_sheet = pygame.image.load(death_sprite_sheet_path).convert_alpha()
+        death_sprite_sheet = asset_registry.load_image(death_sprite_sheet_path)
         num_death_frames = 10  # 死亡动画帧数
         death_frame_width = death_sprite_sheet.get_width()
         death_frame_height = death_sprite_sheet.get_height() // num_death_frames
@@ -95,7 +100,7 @@ class Witch_animation:
             if not os.path.exists(death_sprite_sheet_path):
                 raise FileNotFoundError(f"女巫死亡动画图片未找到: {death_sprite_sheet_path} 或 ./plays_animation_art/B_witch_death.png")
 
-        death_sprite_sheet = pygame.image.load(death_sprite_sheet_path).convert_alpha()
+        death_sprite_sheet = asset_registry.load_image(death_sprite_sheet_path)
         num_death_frames = 12  # 死亡动画帧数
         death_frame_width = death_sprite_sheet.get_width()
         death_frame_height = death_sprite_sheet.get_height() // num_death_frames
@@ -123,6 +128,7 @@ class Witch_animation:
 
 class Knight_animation:
     # 加载骑士的奔跑动画 (保持不变)
+    @cached_frames
     def load_knight_run_animation(target_width, target_height):
         """
         加载骑士奔跑动画的精灵图集，并将其切割为单独的帧。
@@ -137,7 +143,7 @@ class Knight_animation:
         if not os.path.exists(knight_sprite_sheet_path):
             raise FileNotFoundError(f"骑士奔跑动画图片未找到: {knight_sprite_sheet_path}")
 
-        knight_sprite_sheet = pygame.image.load(knight_sprite_sheet_path).convert_alpha()
+        knight_sprite_sheet = asset_registry.load_image(knight_sprite_sheet_path)
 
         # 根据提供的 Knight_WALK.png 图片，它有 8 帧，水平排列。
         # 每帧的宽度是整个图片宽度除以帧数，高度是整个图片高度。
@@ -160,6 +166,7 @@ class Knight_animation:
         return frames
 
     # 新增的函数：加载骑士的闲置动画
+    @cached_frames
     def load_knight_idle_animation(target_width, target_height):
         """
         加载骑士闲置动画的精灵图集，并将其切割为单独的帧。
@@ -174,7 +181,7 @@ class Knight_animation:
         if not os.path.exists(knight_idle_sprite_sheet_path):
             raise FileNotFoundError(f"骑士闲置动画图片未找到: {knight_idle_sprite_sheet_path}")
 
-        knight_idle_sprite_sheet = pygame.image.load(knight_idle_sprite_sheet_path).convert_alpha()
+        knight_idle_sprite_sheet = asset_registry.load_image(knight_idle_sprite_sheet_path)
 
         # 根据提供的 Knight_IDLE.png 图片，它有 8 帧，水平排列。
         # 每帧的宽度是整个图片宽度除以帧数，高度是整个图片高度。
@@ -194,6 +201,7 @@ class Knight_animation:
             frames.append(scaled_frame)
         return frames
 
+    @cached_frames
     def load_knight_death_animation(target_width, target_height):
         """
         Load the knight's death animation from Knight_DEATH.png, slice into frames, crop, and scale
@@ -205,7 +213,7 @@ class Knight_animation:
             if not os.path.exists(knight_death_sprite_sheet_path):
                 raise FileNotFoundError(f"骑士死亡动画图片未找到: {knight_death_sprite_sheet_path} 或 ./plays_animation_art/Knight_DEATH.png")
 
-        knight_death_sprite_sheet = pygame.image.load(knight_death_sprite_sheet_path).convert_alpha()
+        knight_death_sprite_sheet = asset_registry.load_image(knight_death_sprite_sheet_path)
         num_death_frames = 12
         frame_width = knight_death_sprite_sheet.get_width() // num_death_frames
         frame_height = knight_death_sprite_sheet.get_height()
@@ -255,6 +263,7 @@ class Knight_animation:
         return frames[::-1]
 
 class boss_animation:
+    @cached_frames(persist=False)
     def split_boss_image_vertically(image_path):
         """
         Split the boss.png image vertically into 7 equal parts without scaling.
@@ -269,7 +278,7 @@ class boss_animation:
             raise FileNotFoundError(f"Image not found: {image_path}")
 
         # Load the image
-        boss_image = pygame.image.load(image_path).convert_alpha()
+        boss_image = asset_registry.load_image(image_path)
         frame_width = boss_image.get_width()
         frame_height = boss_image.get_height() // 7
 
@@ -282,6 +291,7 @@ class boss_animation:
         return frames
 
 
+    @cached_frames
     def load_boos_run_animation(target_width, target_height):
         """
         Load the boss run animation from the second vertical segment of the boss.png image.
@@ -310,6 +320,7 @@ class boss_animation:
 
         return frames
 
+    @cached_frames
     def load_boos_run2_animation(target_width, target_height):
         """
         Load the boss run animation from the second vertical segment of the boss.png image.
@@ -338,6 +349,7 @@ class boss_animation:
 
         return frames
 
+    @cached_frames
     def load_boos_hurt_animation(target_width: int, target_height: int) -> list[pygame.Surface]:
         # Get the second vertical segment
         boss_frames = boss_animation.split_boss_image_vertically("./plays_animation_art/boss.png")
@@ -358,6 +370,7 @@ class boss_animation:
 
         return frames
 
+    @cached_frames
     def load_boos_death_animation(target_width, target_height):
         # Get the second vertical segment
         boss_frames = boss_animation.split_boss_image_vertically("./plays_animation_art/boss.png")
@@ -379,34 +392,6 @@ class boss_animation:
         return frames
 
 
-    def split_boss_image_vertically(image_path):
-        """
-        Split the boss.png image vertically into 7 equal parts without scaling.
-
-        Args:
-            image_path (str): Path to the boss.png image.
-
-        Returns:
-            list: A list of pygame.Surface objects representing the split images.
-        """
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image not found: {image_path}")
-
-        # Load the image
-        boss_image = pygame.image.load(image_path).convert_alpha()
-        frame_width = boss_image.get_width()
-        frame_height = boss_image.get_height() // 7
-
-        frames = []
-        for i in range(7):
-            # Slice each vertical segment
-            frame = boss_image.subsurface((0, i * frame_height, frame_width, frame_height))
-            frames.append(frame)
-
-        return frames
-
-
-
 if __name__ == "__main__":
     pygame.init()
     screen = pygame.display.set_mode((800, 600))
@@ -0,0 +1,188 @@
+import functools
+import inspect
+import os
+
+import pygame
+
+from frame_cache import FrameDiskCache, code_digest
+from span_trace import span_trace
+
+
+class AssetRegistry:
+    """
+    全域圖片 / 動畫幀登記處。
+    每個檔案只從硬碟讀一次並轉成 display format，縮放、翻轉後的版本以 (path, size, transform) 為 key 共用，
+    動畫 loader 的結果也只切割、縮放一次。hits / misses 用來確認有沒有重複載入。
+    呼叫 enable_disk_cache() 之後，動畫幀還會存到硬碟，下次啟動直接讀回處理好的像素。
+
+    回傳的 Surface 是大家共用的，不要直接在上面畫圖；需要修改時請先 copy()。
+    """
+
+    def __init__(self):
+        self._images = {}  # (path, alpha) -> Surface
+        self._derived = {}  # (source_key, size, transform, alpha) -> (source_surface, Surface)
+        self._frames = {}  # frames key -> [Surface, ...]
+        self._clips = {}  # clip key -> AnimationClip
+        self._source_keys = {}  # id(Surface) -> (path, alpha)，用來把傳進來的 Surface 對回檔案路徑
+        self._frame_sources = {}  # frames key -> {path, ...}，這組幀用到哪些圖片檔
+        self._source_tracking = []  # 正在建立中的幀（可能巢狀）各自收集用到的圖片檔
+        self.disk_cache = None  # FrameDiskCache
+        self.hits = {"image": 0, "derived": 0, "frames": 0, "clip": 0}
+        self.misses = {"image": 0, "derived": 0, "frames": 0, "clip": 0}
+
+    @staticmethod
+    def _normalize_path(path):
+        return os.path.normpath(path)
+
+    def load_image(self, path, alpha=True):
+        """讀取圖片一次並轉成 display format（alpha=False 時用 convert()，適合不透明的背景）。"""
+        key = (self._normalize_path(path), alpha)
+        for sources in self._source_tracking:
+            sources.add(key[0])
+        image = self._images.get(key)
+        if image is not None:
+            self.hits["image"] += 1
+            return image
+        self.misses["image"] += 1
+        raw = pygame.image.load(key[0])
+        image = raw.convert_alpha() if alpha else raw.convert()
+        self._images[key] = image
+        self._source_keys[id(image)] = key
+        return image
+
+    def get_image(self, path, size=None, transform="scale", alpha=True):
+        """
+        取得縮放後的共用圖片。
+        Args:
+            path (str): 圖片路徑。
+            size (tuple | None): 目標尺寸，None 表示原尺寸。
+            transform (str): "scale"、"smoothscale"，可再加 "+flip_x"（例如 "smoothscale+flip_x"）。
+        """
+        image = self.load_image(path, alpha)
+        if size is None and "flip_x" not in transform:
+            return image
+        return self.get_transformed(image, size, transform)
+
+    def get_transformed(self, surface, size=None, transform="scale", alpha=None):
+        """
+        對任意 Surface 做縮放 / 翻轉並快取。
+        由 load_image() 載入的 Surface 會以檔案路徑當 key；其他 Surface 以物件本身當 key（快取會保留它的參考）。
+        alpha 不是 None 時回傳一份設定好整張透明度的副本（不會動到原本共用的 Surface）。
+        """
+        source_key = self._source_keys.get(id(surface), ("surface", id(surface)))
+        size = tuple(int(v) for v in size) if size is not None else None
+        key = (source_key, size, transform, alpha)
+        entry = self._derived.get(key)
+        if entry is not None:
+            self.hits["derived"] += 1
+            return entry[1]
+
+        self.misses["derived"] += 1
+        result = surface
+        if size is not None and size != surface.get_size():
+            if transform.startswith("smoothscale"):
+                result = pygame.transform.smoothscale(result, size)
+            else:
+                result = pygame.transform.scale(result, size)
+        if "flip_x" in transform:
+            result = pygame.transform.flip(result, True, False)
+        if alpha is not None:
+            if result is surface:
+                result = surface.copy()
+            result.set_alpha(alpha)
+        self._derived[key] = (surface, result)
+        return result
+
+    def enable_disk_cache(self, cache_dir=None):
+        self.disk_cache = FrameDiskCache(cache_dir) if cache_dir else FrameDiskCache()
+        return self.disk_cache
+
+    def get_frames(self, key, build_frames, disk_key=None):
+        """
+        動畫幀快取：第一次呼叫 build_frames() 產生，之後回傳同一批 Surface（新的 list）。
+        有 disk_key 且開啟硬碟快取時，記憶體沒有的話先找硬碟，最後才真的 build_frames()。
+        """
+        frames = self._frames.get(key)
+        if frames is not None:
+            self.hits["frames"] += 1
+            self._add_tracked_sources(self._frame_sources.get(key, ()))
+            return list(frames)
+        self.misses["frames"] += 1
+
+        sources = None
+        if disk_key is not None and self.disk_cache is not None:
+            frames, sources = self.disk_cache.load(disk_key)
+        if frames is None:
+            sources = set()
+            self._source_tracking.append(sources)
+            try:
+                frames = build_frames()
+            finally:
+                self._source_tracking.pop()
+            if disk_key is not None and self.disk_cache is not None:
+                self.disk_cache.store(disk_key, frames, sources)
+
+        self._frames[key] = frames
+        self._frame_sources[key] = sources
+        self._add_tracked_sources(sources)
+        return list(frames)
+
+    def get_clip(self, key, build_clip):
+        """AnimationClip 快取（翻轉、半透明版本都已經準備好），同一組幀只建立一次。"""
+        clip = self._clips.get(key)
+        if clip is not None:
+            self.hits["clip"] += 1
+            return clip
+        self.misses["clip"] += 1
+        clip = build_clip()
+        self._clips[key] = clip
+        return clip
+
+    def _add_tracked_sources(self, paths):
+        # 外層 loader 透過另一個 loader 取得幀時，也要算進外層用到的圖片
+        for sources in self._source_tracking:
+            sources.update(paths)
+
+    def get_stats(self):
+        total_hits = sum(self.hits.values())
+        total_lookups = total_hits + sum(self.misses.values())
+        return {
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "hit_rate": total_hits / total_lookups if total_lookups else 0.0,
+            "images": len(self._images),
+            "derived": len(self._derived),
+            "frame_sets": len(self._frames),
+            "clips": len(self._clips),
+            "disk_cache": self.disk_cache.get_stats() if self.disk_cache is not None else None,
+        }
+
+
+asset_registry = AssetRegistry()
+
+
+def cached_frames(loader=None, persist=True):
+    """
+    動畫 loader 用的 decorator：同一個 loader 加同樣參數只會真的切割、縮放一次，
+    之後直接從 asset_registry 拿共用的幀。
+    persist=False 的 loader（例如只切不縮放的中間結果）不寫到硬碟快取。
+
+    用法：@cached_frames 或 @cached_frames(persist=False)
+    """
+    if loader is None:
+        return functools.partial(cached_frames, persist=persist)
+    signature = inspect.signature(loader)
+    loader_digest = code_digest(loader)
+
+    @functools.wraps(loader)
+    def wrapper(*args, **kwargs):
+        # 位置參數和關鍵字參數寫法不同也要對到同一個 key
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = (loader.__qualname__, tuple(bound.arguments.items()))
+        disk_key = None
+        if persist and asset_registry.disk_cache is not None:
+            disk_key = asset_registry.disk_cache.make_key(key, loader_digest)
+        with span_trace.span(loader.__qualname__):
+            return asset_registry.get_frames(key, lambda: loader(*args, **kwargs), disk_key)
+    return wrapper
@@ -0,0 +1,76 @@
+"""
+Boss 彈幕壓力測試：不斷發射最重（子彈最多）的 pattern，量每幀「放出子彈 + 移動 + 和兩個玩家的碰撞 + 畫圖」的時間，
+印出 p50 / p95 / p99 / max 的幀時間和存活子彈數。
+
+用法：
+    python bench_bullet_patterns.py [--frames 1200] [--pattern spiral] [--fire-every 1]
+"""
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+import pygame
+
+from boss_entities import BOSS_PROJECTILE_RADIUS, SCREEN_HEIGHT, SCREEN_WIDTH, build_boss_projectile_image
+from bullet_patterns import PatternEmitter, compiled_boss_patterns
+from projectile_store import ProjectileStore
+from sprite_cache import sprite_cache
+
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def get_arg(name, default):
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+
+def main():
+    frames = int(get_arg("--frames", 1200))
+    fire_every = int(get_arg("--fire-every", 1))
+    heaviest = max(compiled_boss_patterns, key=lambda name: len(compiled_boss_patterns[name]))
+    pattern = get_arg("--pattern", heaviest)
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    store = ProjectileStore(sprite_cache.get("boss_projectile", build_boss_projectile_image, alpha=False),
+                            BOSS_PROJECTILE_RADIUS, SCREEN_WIDTH, SCREEN_HEIGHT)
+    emitter = PatternEmitter(compiled_boss_patterns)
+    origin = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+    player_rects = [pygame.Rect(200, 200, 45, 45), pygame.Rect(800, 500, 45, 45)]
+    dt = 1 / 60
+
+    frame_times = []
+    live_counts = []
+    for frame in range(frames):
+        start = time.perf_counter()
+        if frame % fire_every == 0:
+            emitter.fire(pattern, origin, player_rects[0].center)
+        emitter.update(dt, store)
+        store.update(dt)
+        for rect in player_rects:
+            store.hit_mask(rect)
+        screen.fill((0, 0, 0))
+        store.draw(screen)
+        frame_times.append((time.perf_counter() - start) * 1000)
+        live_counts.append(len(store))
+
+    # 前 1 秒子彈數還在增加，不算進統計
+    steady = sorted(frame_times[60:] or frame_times)
+    print(f"pattern：{pattern}（{len(compiled_boss_patterns[pattern])} 顆 / 次），每 {fire_every} 幀發射一次，共 {frames} 幀")
+    print(f"  存活子彈  平均 {statistics.mean(live_counts[60:] or live_counts):8.0f}   最多 {max(live_counts)}")
+    print(f"  幀時間    p50 {percentile(steady, 0.50):6.2f} ms   p95 {percentile(steady, 0.95):6.2f} ms   "
+          f"p99 {percentile(steady, 0.99):6.2f} ms   max {steady[-1]:6.2f} ms")
+    over_budget = sum(1 for t in steady if t > FRAME_BUDGET_MS)
+    print(f"  超過 {FRAME_BUDGET_MS:.1f} ms（60 FPS）的幀：{over_budget} / {len(steady)}")
+    print(f"  store：{store.get_stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
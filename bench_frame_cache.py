@@ -0,0 +1,103 @@
+"""
+動畫幀硬碟快取的啟動時間測試：比較冷啟動（快取是空的，要切割 + 縮放 + 寫檔）和熱啟動（直接讀快取）。
+
+每一次測量都開一個新的 Python 行程，這樣記憶體裡的 asset_registry 不會影響結果。
+另外比對冷、熱啟動載入的幀像素是否完全相同。
+
+用法：
+    python bench_frame_cache.py [--runs 5]
+"""
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PLAYER_RADIUS = 15  # 和 player.py 相同，玩家動畫的尺寸是 PLAYER_RADIUS * 3
+
+
+def load_startup_frames():
+    """載入遊戲啟動和 Boss 戰會用到的所有動畫幀。"""
+    from animations import Witch_animation, Knight_animation, boss_animation
+
+    size = PLAYER_RADIUS * 3
+    frame_sets = [
+        Knight_animation.load_knight_run_animation(target_width=size, target_height=size),
+        Knight_animation.load_knight_idle_animation(target_width=size, target_height=size),
+        Knight_animation.load_knight_death_animation(target_width=size, target_height=size),
+        Witch_animation.load_witch_run_animation(target_width=size, target_height=size),
+        Witch_animation.load_witch_idle_animation(target_width=size, target_height=size),
+        Witch_animation.load_witch_death_animation(target_width=size, target_height=size),
+        boss_animation.load_boos_run_animation(200, 200),
+        boss_animation.load_boos_run2_animation(200, 200),
+        boss_animation.load_boos_hurt_animation(200, 200),
+        boss_animation.load_boos_death_animation(200, 200),
+    ]
+    return frame_sets
+
+
+def run_child(cache_dir):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    from assets import asset_registry
+
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    if cache_dir != "none":
+        asset_registry.enable_disk_cache(cache_dir)
+
+    start = time.perf_counter()
+    frame_sets = load_startup_frames()
+    elapsed = time.perf_counter() - start
+
+    checksum = hashlib.sha1()
+    for frames in frame_sets:
+        for frame in frames:
+            checksum.update(pygame.image.tobytes(frame, "RGBA"))
+    print(json.dumps({
+        "seconds": elapsed,
+        "frames": sum(len(frames) for frames in frame_sets),
+        "checksum": checksum.hexdigest(),
+        "disk_cache": asset_registry.get_stats()["disk_cache"],
+    }))
+
+
+def measure(cache_dir):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", cache_dir],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    runs = int(sys.argv[sys.argv.index("--runs") + 1]) if "--runs" in sys.argv else 5
+
+    results = {"no_cache": [], "cold": [], "warm": []}
+    checksums = set()
+    for _ in range(runs):
+        results["no_cache"].append(measure("none"))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            results["cold"].append(measure(cache_dir))
+            results["warm"].append(measure(cache_dir))
+    for samples in results.values():
+        checksums.update(sample["checksum"] for sample in samples)
+
+    print(f"動畫幀數：{results['cold'][0]['frames']}，每種情況 {runs} 次")
+    for name, samples in results.items():
+        seconds = [sample["seconds"] * 1000 for sample in samples]
+        print(f"  {name:8s} median {statistics.median(seconds):8.2f} ms   min {min(seconds):8.2f} ms")
+    speedup = statistics.median(s["seconds"] for s in results["cold"]) / \
+        statistics.median(s["seconds"] for s in results["warm"])
+    print(f"  warm 比 cold 快 {speedup:.1f} 倍")
+    print("  像素比對：" + ("相同" if len(checksums) == 1 else f"不一致！({len(checksums)} 種結果)"))
+    return 0 if len(checksums) == 1 else 1
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        run_child(sys.argv[sys.argv.index("--child") + 1])
+    else:
+        sys.exit(main())
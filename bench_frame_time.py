@@ -0,0 +1,389 @@
+"""
+整場遊戲的幀時間測試：每個情境都用 GameEngine 載入關卡（levels_data 的每一關 + setup_boss_level() 的 Boss 關），
+照固定的輸入腳本玩 N 秒，量每幀的時間。
+
+兩種模式：
+    headless  只跑遊戲邏輯（每幀 SIMULATION_HZ / 60 個 engine.step()）
+    dummy     遊戲邏輯 + 在 SDL dummy 影像驅動上畫出整個遊戲畫面並 flip（不含 HUD 文字）
+
+另外有三個壓力情境：
+    stress_volcano       火山效果整段都開著（持續落下隕石）
+    stress_boss_volleys  Boss 第二階段，每次攻擊都用最短的間隔
+    stress_spikes        地刺最多的那一關，所有地刺每幀一起伸縮
+
+輸出（JSON）每個情境 / 模式的幀時間 p50 / p95 / p99 / max、邏輯 vs 畫圖各佔多少、每幀的記憶體配置量，
+指定 --baseline 時和基準檔比較（基準檔不存在時把這次的結果存成基準），變慢超過 --tolerance 的項目列出來並回傳 1。
+玩家在測試中不會死（一直無敵），關卡被意外過關 / Boss 被打倒時重新載入，次數記在 restarts。
+
+用法：
+    python bench_frame_time.py [--seconds 10] [--warmup 1] [--modes headless,dummy] [--scenarios level_0,boss]
+                               [--output bench_frame_time.json] [--baseline baseline.json] [--update-baseline]
+                               [--tolerance 0.15] [--alloc-seconds 2] [--seed 1234]
+"""
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from array import array
+
+import pygame
+
+from assets import asset_registry
+from bench_bullet_patterns import get_arg, percentile
+from game_engine import GameEngine, InputState, init_headless
+from game_objects import *
+from player import ACTION_KEY_P1, DRAW_ITEM_KEY_P2
+from render_layers import StaticLayer
+
+FRAME_HZ = 60
+STEPS_PER_FRAME = SIMULATION_HZ // FRAME_HZ
+FRAME_BUDGET_MS = 1000 / FRAME_HZ
+MODES = ("headless", "dummy")
+DEFAULT_SEED = 20240607
+# 兩次的差距小於這個值（毫秒）時不算變慢，避免很短的幀被雜訊誤判
+REGRESSION_FLOOR_MS = 0.05
+
+# 輸入腳本：(秒數, P1 方向, P2 方向)，整段重複。方向是 control_keys 的名稱，None 表示不動
+INPUT_SCRIPT = [
+    (1.0, "right", "left"),
+    (0.75, "down", "up"),
+    (1.0, "left", "right"),
+    (0.75, "up", "down"),
+    (0.5, None, None),
+]
+# Boss 關：每 BOSS_ACTION_INTERVAL 秒輪流 P2 畫出物品、P1 拾取 / 投擲
+BOSS_ACTION_INTERVAL = 0.5
+BOSS_DRAW_SHAPE = "Rectangle"
+BOSS_MIN_ATTACK_COOLDOWN = 0.8  # Boss 第二階段攻擊間隔的下限（boss_entities 的 uniform(0.8, 1.5)）
+
+
+def build_input_script(engine, boss_actions):
+    """把 INPUT_SCRIPT 展開成每個模擬步驟一個 InputState（整段重複使用）。"""
+    player1_keys = engine.player1.control_keys
+    player2_keys = engine.player2.control_keys
+    states = []
+    for seconds, p1_direction, p2_direction in INPUT_SCRIPT:
+        held = []
+        if p1_direction:
+            held.append(player1_keys[p1_direction])
+        if p2_direction:
+            held.append(player2_keys[p2_direction])
+        states += [InputState(held)] * int(round(seconds * SIMULATION_HZ))
+    if boss_actions:
+        interval = int(round(BOSS_ACTION_INTERVAL * SIMULATION_HZ))
+        for index, step in enumerate(range(0, len(states), interval)):
+            if index % 2 == 0:
+                states[step] = InputState(states[step].held, [DRAW_ITEM_KEY_P2], BOSS_DRAW_SHAPE)
+            else:
+                states[step] = InputState(states[step].held, [ACTION_KEY_P1])
+    return states
+
+
+# --- 情境 ---
+def make_invincible(engine):
+    for player in (engine.player1, engine.player2):
+        player.is_invincible = True
+        player.invincibility_timer = float("inf")
+
+
+def keep_volcano_active(engine):
+    volcano = engine.effect_manager.effects["volcano"]
+    if not volcano["active"]:
+        engine.effect_manager.apply_effect("volcano")
+    volcano["timer"] = FRUIT_EFFECT_DURATION
+
+
+def keep_boss_volleys_at_max(engine):
+    boss = engine.boss_enemy
+    if boss:
+        # 血量停在一半：第二階段（瞬移 + 較重的彈幕），投擲物也打不倒
+        boss.current_health = boss.max_health // 2
+        boss.attack_cooldown = min(boss.attack_cooldown, BOSS_MIN_ATTACK_COOLDOWN)
+
+
+def toggle_all_spikes(engine):
+    # 伸出、縮回各一幀，所有地刺同時切換
+    for spike in engine.spike_trap_group:
+        spike.out_time = spike.in_time = STEPS_PER_FRAME * SIMULATION_DT
+        spike.cycle_time = spike.out_time + spike.in_time
+        spike.timer = 0.0
+
+
+class Scenario:
+    def __init__(self, name, level, after_load=None, every_frame=None):
+        self.name = name
+        self.level = level  # levels_data 的 index 或 "boss"
+        self.after_load = after_load
+        self.every_frame = every_frame
+
+    def load(self, engine):
+        engine.reset(self.level, engine.seed)
+        make_invincible(engine)
+        if self.after_load:
+            self.after_load(engine)
+        return engine.state, engine.current_level_index
+
+
+def build_scenarios():
+    scenarios = [Scenario(f"level_{index}", index) for index in range(len(levels_data))]
+    scenarios.append(Scenario("boss", "boss"))
+    most_spikes = max(range(len(levels_data)), key=lambda index: len(levels_data[index].get("spike_traps", [])))
+    scenarios += [
+        Scenario("stress_volcano", 0, keep_volcano_active, keep_volcano_active),
+        Scenario("stress_boss_volleys", "boss", keep_boss_volleys_at_max, keep_boss_volleys_at_max),
+        Scenario("stress_spikes", most_spikes, toggle_all_spikes),
+    ]
+    return scenarios
+
+
+class GameplayRenderer:
+    """
+    和 main.py 遊戲中的畫面相同的繪製順序（背景層、物件、Boss、子彈、鎖鏈），不含 HUD 文字。
+    每幀剛好跑完整數個模擬步驟，所以不需要畫面內插。
+    """
+
+    def __init__(self, engine, screen):
+        self.engine = engine
+        self.screen = screen
+        floor_tile = asset_registry.load_image(os.path.join('plays_animation_art', 'floor.png'))
+        self.static_background = StaticLayer(SCREEN_WIDTH, SCREEN_HEIGHT, floor_tile, (0, 0, 0))
+
+    def on_engine_event(self, event, engine):
+        if event == "level_loaded":
+            self.static_background.set_level(engine.current_level_index,
+                                             levels_data[engine.current_level_index]["laser_walls"], LASER_WALL_COLOR)
+        elif event == "boss_level_started":
+            self.static_background.set_level("boss")
+        elif event == "boss_defeated":
+            self.static_background.set_level("boss_defeated")
+
+    def draw(self):
+        engine = self.engine
+        screen = self.screen
+        self.static_background.draw(screen, engine.effect_manager.get_laser_wall_alpha())
+        if engine.state == STATE_PLAYING:
+            for sprite in engine.goal_sprites: sprite.draw(screen)
+            for box in engine.coop_box_group: box.draw(screen)
+            for spike in engine.spike_trap_group: spike.draw(screen)
+            engine.fruit_sprites.draw(screen)
+            engine.warning_sprites.draw(screen)
+            engine.meteor_sprites.draw(screen)
+        elif engine.state == STATE_BOSS_LEVEL:
+            if engine.boss_enemy:
+                engine.boss_enemy.draw(screen)
+                engine.boss_enemy.projectiles.draw(screen)
+            engine.throwable_objects_group.draw(screen)
+            if engine.player1.held_object:
+                engine.player1.held_object.draw(screen)
+        engine.player_sprites.draw(screen)
+        pygame.draw.line(screen, (255, 255, 255), engine.player1.pos, engine.player2.pos, 2)
+        pygame.display.flip()
+
+
+def summarize(values):
+    ordered = sorted(values)
+    return {
+        "p50": round(percentile(ordered, 0.50), 4),
+        "p95": round(percentile(ordered, 0.95), 4),
+        "p99": round(percentile(ordered, 0.99), 4),
+        "max": round(ordered[-1], 4),
+        "mean": round(statistics.mean(ordered), 4),
+    }
+
+
+class Run:
+    """一個情境在一種模式下的執行：load() 之後每次 frame() 跑一幀，回傳 (邏輯 ns, 畫圖 ns)。"""
+
+    def __init__(self, engine, renderer, scenario, render):
+        self.engine = engine
+        self.renderer = renderer
+        self.scenario = scenario
+        self.render = render
+        self.inputs = build_input_script(engine, scenario.level == "boss")
+        self.restarts = -1
+        self.load()
+
+    def load(self):
+        self.expected = self.scenario.load(self.engine)
+        self.step_index = 0
+        self.restarts += 1
+
+    def frame(self):
+        engine = self.engine
+        inputs = self.inputs
+        if self.scenario.every_frame:
+            self.scenario.every_frame(engine)
+        start = time.perf_counter_ns()
+        for _ in range(STEPS_PER_FRAME):
+            engine.step(inputs[self.step_index % len(inputs)], SIMULATION_DT)
+            self.step_index += 1
+        updated = time.perf_counter_ns()
+        if self.render:
+            self.renderer.draw()
+        rendered = time.perf_counter_ns()
+        if (engine.state, engine.current_level_index) != self.expected:
+            self.load()  # 在幀時間之外重新載入
+        return updated - start, rendered - updated
+
+
+def run_scenario(engine, renderer, scenario, mode, frames, warmup_frames, alloc_frames):
+    run = Run(engine, renderer, scenario, mode == "dummy")
+    for _ in range(warmup_frames):
+        run.frame()
+
+    # 先配置好結果陣列（array 不會留下 float 物件），整段前後的記憶體區塊數差就是遊戲本身留下來的
+    update_ms = array("d", bytes(8 * frames))
+    render_ms = array("d", bytes(8 * frames))
+    gc_before = [stats["collections"] for stats in gc.get_stats()]
+    blocks_before = sys.getallocatedblocks()
+    for frame in range(frames):
+        update_ns, render_ns = run.frame()
+        update_ms[frame] = update_ns / 1e6
+        render_ms[frame] = render_ns / 1e6
+    net_blocks = sys.getallocatedblocks() - blocks_before
+    gc_collections = [stats["collections"] - before for stats, before in zip(gc.get_stats(), gc_before)]
+    frame_ms = [update + render for update, render in zip(update_ms, render_ms)]
+
+    # tracemalloc 會讓程式變慢很多，所以配置量另外跑一段，不影響上面的時間
+    transient_kb = []
+    if alloc_frames:
+        tracemalloc.start()
+        for _ in range(alloc_frames):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            run.frame()
+            transient_kb.append((tracemalloc.get_traced_memory()[1] - current) / 1024)
+        tracemalloc.stop()
+
+    total_update = sum(update_ms)
+    total = total_update + sum(render_ms)
+    result = {
+        "frames": frames,
+        "frame_ms": summarize(frame_ms),
+        "update_ms": summarize(update_ms),
+        "render_ms": summarize(render_ms),
+        "update_share": round(total_update / total, 4) if total else 0.0,
+        "over_budget_frames": sum(1 for t in frame_ms if t > FRAME_BUDGET_MS),
+        "alloc": {
+            "net_blocks_per_frame": round(net_blocks / frames, 2),
+            "transient_kb_per_frame": round(statistics.mean(transient_kb), 2) if transient_kb else None,
+            "transient_kb_max": round(max(transient_kb), 2) if transient_kb else None,
+            "gc_collections": gc_collections,
+        },
+        "restarts": run.restarts,
+        "final_state": engine.snapshot()["state"],
+    }
+    if engine.boss_enemy:
+        result["boss_projectiles_peak"] = engine.boss_enemy.projectiles.peak_live
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """和基準比較 frame_ms 的 p50 / p95 / p99，回傳 (比較表, 變慢的項目)。"""
+    comparison = {}
+    regressions = []
+    for name, modes in results.items():
+        for mode, result in modes.items():
+            base = baseline.get(name, {}).get(mode)
+            if not base:
+                continue
+            rows = {}
+            for key in ("p50", "p95", "p99"):
+                old = base["frame_ms"][key]
+                new = result["frame_ms"][key]
+                ratio = new / old if old else 1.0
+                rows[key] = {"baseline": old, "current": new, "ratio": round(ratio, 3)}
+                if ratio > 1 + tolerance and new - old > REGRESSION_FLOOR_MS:
+                    regressions.append(f"{name}/{mode} {key}: {old:.3f} -> {new:.3f} ms（{ratio:.2f}x）")
+            comparison.setdefault(name, {})[mode] = rows
+    return comparison, regressions
+
+
+def main():
+    seconds = float(get_arg("--seconds", 10))
+    warmup = float(get_arg("--warmup", 1))
+    alloc_seconds = float(get_arg("--alloc-seconds", 2))
+    modes = get_arg("--modes", ",".join(MODES)).split(",")
+    tolerance = float(get_arg("--tolerance", 0.15))
+    output_path = get_arg("--output", "bench_frame_time.json")
+    baseline_path = get_arg("--baseline", None)
+    seed = int(get_arg("--seed", DEFAULT_SEED))
+    for mode in modes:
+        if mode not in MODES:
+            print(f"未知的模式：{mode}（可用：{', '.join(MODES)}）")
+            return 2
+
+    scenarios = build_scenarios()
+    if "--scenarios" in sys.argv:
+        wanted = get_arg("--scenarios", "").split(",")
+        unknown = [name for name in wanted if name not in [scenario.name for scenario in scenarios]]
+        if unknown:
+            print(f"未知的情境：{', '.join(unknown)}（可用：{', '.join(s.name for s in scenarios)}）")
+            return 2
+        scenarios = [scenario for scenario in scenarios if scenario.name in wanted]
+
+    init_headless()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    engine = GameEngine(seed=seed)
+    renderer = GameplayRenderer(engine, screen)
+    engine.listener = renderer.on_engine_event
+
+    frames = int(seconds * FRAME_HZ)
+    warmup_frames = int(warmup * FRAME_HZ)
+    alloc_frames = int(min(alloc_seconds, seconds) * FRAME_HZ)
+    results = {}
+    for scenario in scenarios:
+        for mode in modes:
+            result = run_scenario(engine, renderer, scenario, mode, frames, warmup_frames, alloc_frames)
+            results.setdefault(scenario.name, {})[mode] = result
+            frame_ms = result["frame_ms"]
+            print(f"{scenario.name:<20} {mode:<8}  p50 {frame_ms['p50']:6.2f}  p95 {frame_ms['p95']:6.2f}  "
+                  f"p99 {frame_ms['p99']:6.2f}  max {frame_ms['max']:6.2f} ms   "
+                  f"邏輯 {result['update_share'] * 100:3.0f}%   "
+                  f"配置 {result['alloc']['transient_kb_per_frame'] or 0:7.1f} KB/幀")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "seconds": seconds,
+            "frame_hz": FRAME_HZ,
+            "simulation_hz": SIMULATION_HZ,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+    exit_code = 0
+    if baseline_path:
+        if os.path.exists(baseline_path) and "--update-baseline" not in sys.argv:
+            with open(baseline_path, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+            comparison, regressions = compare(results, baseline["results"], tolerance)
+            report["baseline"] = {"path": baseline_path, "tolerance": tolerance, "comparison": comparison,
+                                  "regressions": regressions}
+            if regressions:
+                print(f"比基準 {baseline_path} 慢超過 {tolerance * 100:.0f}% 的項目：")
+                for line in regressions:
+                    print(f"  {line}")
+                exit_code = 1
+            else:
+                print(f"和基準 {baseline_path} 相比沒有變慢（容許 {tolerance * 100:.0f}%）")
+        else:
+            with open(baseline_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"基準已儲存至 {baseline_path}")
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"結果已儲存至 {output_path}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+Player.update_movement 的微基準：在每一關（和 Boss 關）的真實障礙物上重複呼叫 P1 的移動 + 碰撞，
+量每次呼叫的時間和記憶體配置。
+
+輸入每次在相反的方向之間切換（右 / 左、下 / 上、斜向），玩家停在原地附近來回，
+不會走出關卡起點附近，也不會被雷射牆 / 地刺殺掉（玩家設成無敵）。
+
+配置量有三種：
+    net_blocks_per_call   整段前後 sys.getallocatedblocks() 的差（留下來沒有釋放的）
+    gc_tracked_per_call   gc 第 0 代計數的增加量（會讓循環 gc 提早觸發的容器物件）
+    transient_bytes       連續呼叫 --alloc-calls 次的過程中，tracemalloc 看到最多同時多配置了幾 bytes
+                          （呼叫完就釋放的暫存物件，例如 Vector2 / Rect 的複本），已經扣掉量測本身的配置；0 表示完全沒有配置
+
+用法：
+    python bench_movement.py [--calls 20000] [--alloc-calls 2000] [--scenarios level_0,boss] [--seed 1234]
+"""
+import gc
+import sys
+import time
+import tracemalloc
+
+from bench_bullet_patterns import get_arg
+from bench_frame_time import DEFAULT_SEED, make_invincible
+from game_engine import GameEngine, InputState, init_headless
+from game_objects import *
+
+# 每一組是一個方向和它的反方向，呼叫時交替使用
+DIRECTIONS = [("right",), ("left",), ("down",), ("up",), ("right", "down"), ("left", "up"), ("left", "down"),
+              ("right", "up")]
+
+
+def build_inputs(player):
+    return [InputState([player.control_keys[name] for name in direction]) for direction in DIRECTIONS]
+
+
+def movement_call(engine):
+    """回傳一個「用某個輸入呼叫一次 P1 移動」的函式，參數和 GameEngine.step() 裡的相同。"""
+    player = engine.player1
+    effect_manager = engine.effect_manager
+    dt = SIMULATION_DT
+    if engine.state == STATE_BOSS_LEVEL:
+        engine.dynamic_hash.rebuild({"throwables": engine.throwable_objects_group})
+        boss = engine.boss_enemy
+        return lambda keys: player.update_movement(None, None, None, None, effect_manager, dt, boss,
+                                                   boss.projectiles, engine.throwable_objects_group, keys=keys)
+    engine.dynamic_hash.rebuild({"meteors": engine.meteor_sprites})
+    meteors = engine.dynamic_hash.view("meteors")
+    return lambda keys: player.update_movement(engine.laser_wall_grid, engine.coop_box_group, engine.spike_trap_grid,
+                                               meteors, effect_manager, dt, keys=keys)
+
+
+def run_scenario(engine, level, calls, alloc_calls):
+    engine.reset(level, engine.seed)
+    make_invincible(engine)
+    call = movement_call(engine)
+    inputs = build_inputs(engine.player1)
+    count = len(inputs)
+    for index in range(count * 16):  # 暖機：動畫快取、碰撞格子的查詢快取
+        call(inputs[index % count])
+
+    gc.disable()
+    blocks_before = sys.getallocatedblocks()
+    tracked_before = gc.get_count()[0]
+    start = time.perf_counter_ns()
+    for index in range(calls):
+        call(inputs[index % count])
+    elapsed = time.perf_counter_ns() - start
+    tracked = gc.get_count()[0] - tracked_before
+    net_blocks = sys.getallocatedblocks() - blocks_before
+    gc.enable()
+
+    # 同一段輸入用什麼都不做的函式量一次，扣掉量測本身（迴圈、get_traced_memory() 的回傳值）的配置
+    sequence = [inputs[index % count] for index in range(alloc_calls)]
+    transient = peak_bytes(call, sequence) - peak_bytes(lambda keys: None, sequence)
+    return {
+        "us_per_call": elapsed / calls / 1000,
+        "net_blocks_per_call": net_blocks / calls,
+        "gc_tracked_per_call": tracked / calls,
+        "transient_bytes": max(0, transient),
+    }
+
+
+def peak_bytes(call, sequence):
+    tracemalloc.start()
+    keys_iter = iter(sequence)
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    for keys in keys_iter:
+        call(keys)
+    peak = tracemalloc.get_traced_memory()[1] - start
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    calls = int(get_arg("--calls", 20000))
+    alloc_calls = int(get_arg("--alloc-calls", 2000))
+    seed = int(get_arg("--seed", DEFAULT_SEED))
+    scenarios = {f"level_{index}": index for index in range(len(levels_data))}
+    scenarios["boss"] = "boss"
+    if "--scenarios" in sys.argv:
+        wanted = get_arg("--scenarios", "").split(",")
+        unknown = [name for name in wanted if name not in scenarios]
+        if unknown:
+            print(f"未知的情境：{', '.join(unknown)}（可用：{', '.join(scenarios)}）")
+            return 2
+        scenarios = {name: scenarios[name] for name in wanted}
+
+    init_headless()
+    engine = GameEngine(seed=seed)
+    print(f"Player.update_movement，每個情境 {calls} 次（配置量 {alloc_calls} 次）")
+    print(f"{'情境':<10} {'us/次':>8} {'net blocks/次':>14} {'gc 物件/次':>11} {'暫存 bytes':>11}")
+    for name, level in scenarios.items():
+        result = run_scenario(engine, level, calls, alloc_calls)
+        print(f"{name:<10} {result['us_per_call']:8.2f} {result['net_blocks_per_call']:14.3f} "
+              f"{result['gc_tracked_per_call']:11.3f} {result['transient_bytes']:11d}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,18 +3,27 @@ import math
 import pygame
 import random
 from animations import *
+from animation_clip import load_clip
+from sprite_cache import sprite_cache
+from projectile_store import ProjectileStore
+from object_pool import ObjectPool
+from bullet_patterns import BOSS_PATTERN_SCHEDULE, PatternEmitter, choose_pattern, compiled_boss_patterns
 
 SCREEN_WIDTH = 1080
 SCREEN_HEIGHT = 720
 PLAYER_RADIUS = 15 # Used for scaling throwable, can be adjusted
+BOSS_PROJECTILE_RADIUS = 7 # 碰撞用的圓形半徑（和圖上的紅色圓相同）
 
 # --- Boss Class ---
 class Boss(pygame.sprite.Sprite):
-    def __init__(self, x, y):
+    def __init__(self, x, y, rng=None):
         super().__init__()
-        # 加载运行动画帧
-        self.run_animation_frames = boss_animation.load_boos_run_animation(200, 200)
-        self.run2_animation_frames = None  # For phase 2 animation
+        # 移動、瞬移、攻擊間隔和彈幕的隨機數都從 rng 來（GameEngine 傳入有種子的 random.Random，重播時結果相同）
+        self.rng = rng if rng is not None else random
+        # 加载运行动画帧（AnimationClip，朝左和瞬移预警的半透明版本已预先做好）
+        self.run_animation_frames = load_clip(boss_animation.load_boos_run_animation, 200, 200)
+        # 第二階段的動畫先載好，避免血量過半切換時在戰鬥中卡一下
+        self.run2_animation_frames = load_clip(boss_animation.load_boos_run2_animation, 200, 200)
         self.phase2_animation_switched = False  # To ensure switch happens once
         self.current_frame_index = 0
         self.animation_timer = 0
@@ -25,10 +34,10 @@ class Boss(pygame.sprite.Sprite):
         self.pos = pygame.math.Vector2(x, y)
         self.max_health = 100
         self.current_health = self.max_health
-        self.speed = 2
+        self.speed = 2 # 每 1/60 秒移動的距離
         self.movement_mode = "simple_four_way" # "simple_four_way", "teleport"
         self.move_timer = 0
-        self.move_duration = random.uniform(1, 3)
+        self.move_duration = self.rng.uniform(1, 3)
         self.current_direction = pygame.math.Vector2(0,0)
         self.teleport_timer = 0
         self.teleport_cooldown = 5 # Seconds
@@ -38,7 +47,13 @@ class Boss(pygame.sprite.Sprite):
 
         self.attack_timer = 0
         self.attack_cooldown = 2 # Seconds
-        self.projectiles = pygame.sprite.Group()
+        # 所有子彈放在同一個 ProjectileStore（NumPy 陣列），不是一顆一個 Sprite
+        self.projectiles = ProjectileStore(
+            sprite_cache.get("boss_projectile", build_boss_projectile_image, alpha=False),
+            BOSS_PROJECTILE_RADIUS, SCREEN_WIDTH, SCREEN_HEIGHT)
+        # 攻擊用的彈幕在 bullet_patterns 裡定義、預先編譯；有延遲的子彈（螺旋、連發）由 emitter 依時間放出
+        self.pattern_emitter = PatternEmitter(compiled_boss_patterns, self.rng)
+        self.last_pattern = None
         self.font = pygame.font.Font(None, 24)
 
     def update(self, dt, players_group, screen_width, screen_height):
@@ -46,7 +61,7 @@ class Boss(pygame.sprite.Sprite):
         # Switch to phase 2 animation if health <= 50
         if self.current_health <= self.max_health / 2 and not self.phase2_animation_switched:
             if self.run2_animation_frames is None:
-                self.run2_animation_frames = boss_animation.load_boos_run2_animation(200, 200)
+                self.run2_animation_frames = load_clip(boss_animation.load_boos_run2_animation, 200, 200)
             self.run_animation_frames = self.run2_animation_frames
             self.animation_speed = 0.08
             self.phase2_animation_switched = True
@@ -59,13 +74,13 @@ class Boss(pygame.sprite.Sprite):
             self.move_timer += dt
             if self.move_timer >= self.move_duration:
                 self.move_timer = 0
-                self.move_duration = random.uniform(1, 2.5)
+                self.move_duration = self.rng.uniform(1, 2.5)
                 # Choose a random cardinal direction
                 directions = [pygame.math.Vector2(1,0), pygame.math.Vector2(-1,0),
                               pygame.math.Vector2(0,1), pygame.math.Vector2(0,-1)]
-                self.current_direction = random.choice(directions)
+                self.current_direction = self.rng.choice(directions)
 
-            self.pos += self.current_direction * self.speed
+            self.pos += self.current_direction * self.speed * dt * 60
             # Boundary check
             self.pos.x = max(self.rect.width // 2, min(self.pos.x, screen_width - self.rect.width // 2))
             self.pos.y = max(self.rect.height // 2, min(self.pos.y, screen_height - self.rect.height // 2))
@@ -76,12 +91,7 @@ class Boss(pygame.sprite.Sprite):
             if self.animation_timer >= self.animation_speed:
                 self.animation_timer = 0
                 self.current_frame_index = (self.current_frame_index + 1) % len(self.run_animation_frames)
-                frame = self.run_animation_frames[self.current_frame_index]
-                # 判断是否向左移动
-                if self.current_direction.x < 0:
-                    self.image = pygame.transform.flip(frame, True, False)
-                else:
-                    self.image = frame
+                self._update_image()
 
         elif self.movement_mode == "teleport":
             self.teleport_timer += dt
@@ -90,12 +100,7 @@ class Boss(pygame.sprite.Sprite):
             if self.animation_timer >= self.animation_speed:
                 self.animation_timer = 0
                 self.current_frame_index = (self.current_frame_index + 1) % len(self.run_animation_frames)
-                frame = self.run_animation_frames[self.current_frame_index]
-                # 判断是否向左移动
-                if self.current_direction.x < 0:
-                    self.image = pygame.transform.flip(frame, True, False)
-                else:
-                    self.image = frame
+                self._update_image()
             if self.is_teleporting_warning:
                 if self.teleport_timer >= self.teleport_warning_duration:
                     self.is_teleporting_warning = False
@@ -103,41 +108,47 @@ class Boss(pygame.sprite.Sprite):
                     if self.teleport_target_pos:
                         self.pos = self.teleport_target_pos
                         self.rect.center = self.pos
-                    self.image.set_alpha(255) # Become visible
+                    self._update_image() # Become visible
             elif self.teleport_timer >= self.teleport_cooldown:
                 self.teleport_timer = 0 # Reset timer for warning
                 self.is_teleporting_warning = True
                 self.teleport_target_pos = pygame.math.Vector2(
-                    random.randint(self.rect.width // 2, screen_width - self.rect.width // 2),
-                    random.randint(self.rect.height // 2, screen_height - self.rect.height // 2)
+                    self.rng.randint(self.rect.width // 2, screen_width - self.rect.width // 2),
+                    self.rng.randint(self.rect.height // 2, screen_height - self.rect.height // 2)
                 )
-                self.image.set_alpha(100) # Semi-transparent during warning
+                self._update_image() # Semi-transparent during warning
 
 
         # --- Attack ---
         self.attack_timer += dt
         if self.attack_timer >= self.attack_cooldown:
             self.attack_timer = 0
-            self.attack()
+            self.attack(players_group)
             if self.movement_mode == "teleport": # Faster attacks in teleport mode
-                self.attack_cooldown = random.uniform(0.8, 1.5)
+                self.attack_cooldown = self.rng.uniform(0.8, 1.5)
             else:
-                self.attack_cooldown = random.uniform(1.5, 2.5)
+                self.attack_cooldown = self.rng.uniform(1.5, 2.5)
 
 
+        self.pattern_emitter.update(dt, self.projectiles)
         self.projectiles.update(dt)
 
-    def attack(self):
-        # Throw projectiles in 4 or 8 directions
-        directions = [
-            pygame.math.Vector2(1, 0), pygame.math.Vector2(-1, 0),
-            pygame.math.Vector2(0, 1), pygame.math.Vector2(0, -1),
-            pygame.math.Vector2(1, 1).normalize(), pygame.math.Vector2(1, -1).normalize(),
-            pygame.math.Vector2(-1, 1).normalize(), pygame.math.Vector2(-1, -1).normalize()
-        ]
-        for direction in random.sample(directions, random.randint(4,8)): # Random number of projectiles
-            proj = BossProjectile(self.rect.centerx, self.rect.centery, direction)
-            self.projectiles.add(proj)
+    def _update_image(self):
+        # 判断是否向左移动；瞬移预警期间用半透明版本
+        self.image = self.run_animation_frames.get(self.current_frame_index, self.current_direction.x < 0,
+                                                   self.is_teleporting_warning)
+
+    def attack(self, players_group=None):
+        # 依階段（血量是否過半）和移動模式挑一個彈幕；瞄準型的彈幕朝最近的活著的玩家發射
+        phase = "phase2" if self.current_health <= self.max_health / 2 else "phase1"
+        self.last_pattern = choose_pattern(BOSS_PATTERN_SCHEDULE, phase, self.movement_mode, self.rng)
+        target = None
+        if players_group:
+            alive_players = [player for player in players_group if getattr(player, "is_alive", True)]
+            if alive_players:
+                nearest = min(alive_players, key=lambda player: self.pos.distance_squared_to(player.rect.center))
+                target = nearest.rect.center
+        self.pattern_emitter.fire(self.last_pattern, self.rect.center, target)
 
     def take_damage(self, amount):
         self.current_health -= amount
@@ -145,6 +156,8 @@ class Boss(pygame.sprite.Sprite):
         # Removed visual feedback for damage
 
     def revert_color(self):
+        # 動畫幀是共用的，先複製再塗色
+        self.image = self.image.copy()
         self.image.fill((200, 0, 0))
 
     def draw_health_bar(self, surface):
@@ -158,7 +171,7 @@ class Boss(pygame.sprite.Sprite):
 
         pygame.draw.rect(surface, (100, 100, 100), (bar_x, bar_y, bar_width, bar_height)) # Background
         pygame.draw.rect(surface, (0, 200, 0), (bar_x, bar_y, current_bar_width, bar_height)) # Health
-        pygame.draw.rect(surface, (255,255,255), (bar_x, bar_y, bar_width, bar_height),1) # Border
+        return pygame.draw.rect(surface, (255,255,255), (bar_x, bar_y, bar_width, bar_height),1) # Border
 
         # Health text
         # health_text_surf = self.font.render(f"{self.current_health}/{self.max_health}", True, (255,255,255))
@@ -166,85 +179,103 @@ class Boss(pygame.sprite.Sprite):
 
 
     def draw(self, surface):
+        # Returns the screen areas touched, for dirty rect rendering
+        dirty_rects = []
         if self.is_teleporting_warning and self.teleport_target_pos:
              # Draw a warning marker at the target teleport location
-            pygame.draw.circle(surface, (255, 255, 0, 150), self.teleport_target_pos, self.rect.width // 2, 5)
+            dirty_rects.append(pygame.draw.circle(surface, (255, 255, 0, 150), self.teleport_target_pos,
+                                                  self.rect.width // 2, 5))
+
+        dirty_rects.append(surface.blit(self.image, self.rect))
+        # 子彈在主迴圈畫在可投擲物上面（self.projectiles.draw），這裡不重複畫
+        dirty_rects.append(self.draw_health_bar(surface))
+        return dirty_rects
+
+
+def build_boss_projectile_image():
+    image = pygame.Surface([15, 15])
+    image.fill((255, 120, 0)) # Orange projectile
+    pygame.draw.circle(image, (255,0,0), (7,7), 7) # Smaller red circle
+    return image
+
+
+def build_throwable_image(spawned_by_player_id, detected_shape):
+    image = pygame.Surface([PLAYER_RADIUS * 1.8, PLAYER_RADIUS * 1.8]) # Slightly smaller than player
+    if spawned_by_player_id == 1: # P2 (Witch) spawns it
+        object_size = PLAYER_RADIUS * 1.8
+        fill_color = (150, 50, 200)  # 紫色
+        border_color = (200, 100, 250)  # 淺紫色邊框
+        # 繪製形狀
+        if detected_shape == "Circle":
+            # 圓形
+            radius = object_size // 2
+            pygame.draw.circle(image, fill_color, (object_size // 2, object_size // 2), radius)
+            # 圓形通常不需要額外的邊框，但如果需要可以再畫一個
+            pygame.draw.circle(image, border_color, (object_size // 2, object_size // 2), radius, 3)
+        elif detected_shape == "Triangle":
+            # 三角形 (等邊三角形)
+            # 計算頂點位置
+            height = object_size * (math.sqrt(3) / 2)  # 等邊三角形高
+            points = [
+                (object_size // 2, object_size - height),  # 頂點
+                (0, object_size),  # 左下角
+                (object_size, object_size)  # 右下角
+            ]
+            pygame.draw.polygon(image, fill_color, points)
+            pygame.draw.polygon(image, border_color, points, 3)  # 邊框
+        elif detected_shape == "Rectangle":  # 預設為矩形，或當形狀名稱不匹配時
+            # 矩形
+            image.fill(fill_color)
+            pygame.draw.rect(image, border_color, image.get_rect(), 3)
+    else: # Default or P1 related (though P1 doesn't spawn)
+        image.fill((100, 100, 100)) # Grey
+    return image
 
-        surface.blit(self.image, self.rect)
-        self.projectiles.draw(surface)
-        self.draw_health_bar(surface)
 
+class ThrowableObject(pygame.sprite.Sprite):
+    # Sprite 本身有 __dict__，這裡的屬性放在 slots 裡，重複使用時只是改值，不會再長出新的 dict 項目
+    __slots__ = ("original_image", "image", "rect", "pos", "is_held", "held_by_player_id", "throw_velocity",
+                 "is_thrown", "damage", "throw_gravity", "throw_speed", "pool", "in_pool", "spawned_by_player_id",
+                 "detected_shape")
 
-class BossProjectile(pygame.sprite.Sprite):
-    def __init__(self, x, y, direction_vector):
+    def __init__(self, x, y, spawned_by_player_id,detected_shape):
         super().__init__()
-        self.image = pygame.Surface([15, 15])
-        self.image.fill((255, 120, 0)) # Orange projectile
-        pygame.draw.circle(self.image, (255,0,0), (7,7), 7) # Smaller red circle
-        self.rect = self.image.get_rect(center=(x,y))
         self.pos = pygame.math.Vector2(x,y)
-        self.speed = 4
-        self.direction = direction_vector.normalize()
-        self.lifetime = 7 # seconds
-        self.timer = 0
-
-    def update(self, dt):
-        self.pos += self.direction * self.speed
-        self.rect.center = self.pos
-        self.timer += dt
-        if self.timer > self.lifetime:
-            self.kill() # Remove if off-screen or lifetime expires
-        if not (0 < self.rect.centerx < SCREEN_WIDTH and 0 < self.rect.centery < SCREEN_HEIGHT):
-            self.kill()
+        self.throw_velocity = pygame.math.Vector2(0,0)
+        self.pool = None  # 由 throwable_pool 建立時會設定，kill() 時放回池子
+        self.in_pool = False
+        self.reset(x, y, spawned_by_player_id, detected_shape)
 
-class ThrowableObject(pygame.sprite.Sprite):
-    def __init__(self, x, y, spawned_by_player_id,detected_shape):
-        super().__init__()
-        self.original_image = pygame.Surface([PLAYER_RADIUS * 1.8, PLAYER_RADIUS * 1.8]) # Slightly smaller than player
+    def reset(self, x, y, spawned_by_player_id, detected_shape):
+        """（重新）初始化成剛生成的狀態；從 throwable_pool 取出舊物件時也會呼叫。"""
         if spawned_by_player_id == 1: # P2 (Witch) spawns it
             print(detected_shape)
-            object_size = PLAYER_RADIUS * 1.8
-            fill_color = (150, 50, 200)  # 紫色
-            border_color = (200, 100, 250)  # 淺紫色邊框
-            # 繪製形狀
-            if detected_shape == "Circle":
-                # 圓形
-                radius = object_size // 2
-                pygame.draw.circle(self.original_image, fill_color, (object_size // 2, object_size // 2), radius)
-                # 圓形通常不需要額外的邊框，但如果需要可以再畫一個
-                pygame.draw.circle(self.original_image, border_color, (object_size // 2, object_size // 2), radius, 3)
-            elif detected_shape == "Triangle":
-                # 三角形 (等邊三角形)
-                # 計算頂點位置
-                height = object_size * (math.sqrt(3) / 2)  # 等邊三角形高
-                points = [
-                    (object_size // 2, object_size - height),  # 頂點
-                    (0, object_size),  # 左下角
-                    (object_size, object_size)  # 右下角
-                ]
-                pygame.draw.polygon(self.original_image, fill_color, points)
-                pygame.draw.polygon(self.original_image, border_color, points, 3)  # 邊框
-            elif detected_shape == "Rectangle":  # 預設為矩形，或當形狀名稱不匹配時
-                # 矩形
-                self.original_image.fill(fill_color)
-                pygame.draw.rect(self.original_image, border_color, self.original_image.get_rect(), 3)
-        else: # Default or P1 related (though P1 doesn't spawn)
-            self.original_image.fill((100, 100, 100)) # Grey
-
-        self.image = self.original_image.copy()
+        # 同樣的生成者 + 形狀共用一張圖，不必每次生成都重畫
+        shape_key = detected_shape if spawned_by_player_id == 1 else None
+        self.spawned_by_player_id = spawned_by_player_id  # 存檔時要記下來，讀檔才畫得出同樣的圖
+        self.detected_shape = detected_shape
+        self.original_image = sprite_cache.get(("throwable", shape_key),
+                                               lambda: build_throwable_image(spawned_by_player_id, detected_shape),
+                                               alpha=False)
+        self.image = self.original_image
         self.rect = self.image.get_rect(center=(x,y))
-        self.pos = pygame.math.Vector2(x,y)
+        self.pos.update(x, y)
         self.is_held = False
         self.held_by_player_id = None
-        self.throw_velocity = pygame.math.Vector2(0,0)
+        self.throw_velocity.update(0, 0)
         self.is_thrown = False
         self.damage = 50 # Damage this object does to the boss
         self.throw_gravity = 0.2 # A little drop when thrown
         self.throw_speed = 10
 
+    def kill(self):
+        super().kill()
+        if self.pool is not None:
+            self.pool.release(self)
+
     def update(self, dt, held_pos=None, facing_left=False):
         if self.is_held and held_pos:
-            self.pos = pygame.math.Vector2(held_pos)
+            self.pos.update(held_pos)
             # Position slightly in front of player based on facing direction
             offset = PLAYER_RADIUS * 1.5
             if facing_left:
@@ -253,7 +284,7 @@ class ThrowableObject(pygame.sprite.Sprite):
                 self.pos.x += offset
             self.rect.center = self.pos
         elif self.is_thrown:
-            self.throw_velocity.y += self.throw_gravity # Apply gravity
+            self.throw_velocity.y += self.throw_gravity * dt * 60 # Apply gravity
             self.pos += self.throw_velocity * dt * 60 # Scale by 60 assuming dt is 1/60
             self.rect.center = self.pos
             # Remove if off-screen
@@ -265,15 +296,18 @@ class ThrowableObject(pygame.sprite.Sprite):
     def pickup(self, player_id):
         self.is_held = True
         self.is_thrown = False
-        self.throw_velocity = pygame.math.Vector2(0,0)
+        self.throw_velocity.update(0, 0)
         self.held_by_player_id = player_id
 
     def throw(self, direction_vector):
         self.is_held = False
         self.is_thrown = True
-        self.throw_velocity = direction_vector.normalize() * self.throw_speed
+        self.throw_velocity.update(direction_vector.normalize() * self.throw_speed)
         self.held_by_player_id = None
 
     def draw(self, surface):
         surface.blit(self.image, self.rect)
 
+
+# P2 畫出來的可投擲物都從這裡取用，被 kill()（打中 Boss、飛出畫面）後放回來重複使用
+throwable_pool = ObjectPool(ThrowableObject)
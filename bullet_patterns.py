@@ -0,0 +1,215 @@
+import math
+import random
+
+import numpy as np
+
+# --- Boss 彈幕的資料定義 ---
+# 每個 pattern 是一個 dict，"type" 決定怎麼展開成子彈，其他欄位是參數（角度用度，時間用秒，速度是每 1/60 秒移動的距離）。
+# 所有 pattern 在載入時編譯成 CompiledPattern（NumPy 表格），發射時只是把表格的列加進 ProjectileStore。
+BOSS_PATTERNS = {
+    # 原本的攻擊：八方位中隨機挑 4~8 個方向
+    "compass_scatter": {"type": "ring", "count": 8, "speed": 4, "random_subset": (4, 8)},
+    "ring": {"type": "ring", "count": 16, "speed": 3.5, "angle": 11.25},
+    "aimed_burst": {"type": "aimed_burst", "shots": 4, "pellets": 3, "spread": 20, "interval": 0.12, "speed": 5},
+    "spiral": {"type": "spiral", "arms": 4, "shots": 24, "interval": 0.05, "turn": 9, "speed": 3.5},
+    "wave": {"type": "wave", "rings": 4, "count": 20, "interval": 0.25, "speed": 2.5, "speed_step": 0.5},
+    # 母彈飛到 split_after 秒時在它的位置分裂成一圈子彈；母彈在那之前撞到玩家被 kill() 的話，那一圈就不會出現
+    "split_ring": {"type": "split", "count": 6, "speed": 3, "split_after": 0.6,
+                   "children": 6, "child_speed": 3.5},
+}
+
+# 依階段（血量是否過半）和移動模式選 pattern：(phase, movement_mode) -> [(pattern 名稱, 權重), ...]
+BOSS_PATTERN_SCHEDULE = {
+    ("phase1", "simple_four_way"): [("compass_scatter", 3), ("ring", 1), ("aimed_burst", 1)],
+    ("phase2", "simple_four_way"): [("compass_scatter", 1), ("ring", 1), ("wave", 1)],
+    ("phase2", "teleport"): [("spiral", 2), ("wave", 1), ("split_ring", 1), ("aimed_burst", 2)],
+}
+
+DEFAULT_PROJECTILE_LIFETIME = 7  # seconds，和原本的 BossProjectile 相同
+FRAMES_PER_SECOND = 60  # 子彈速度是「每 1/60 秒」的距離，換算延遲分裂的位置時用
+
+
+class CompiledPattern:
+    """
+    編譯後的彈幕：每一列是一顆子彈，依發射時間排序。
+    times: 相對於發射瞬間的延遲（秒）
+    offsets: 出生位置相對於發射點的偏移（延遲分裂的子彈從母彈分裂的位置出生）
+    directions / speeds / lifetimes: 方向（單位向量）、每 1/60 秒的速度、存活秒數
+    parents: 分裂出來的子彈對應的母彈是第幾列（沒有母彈是 -1），母彈被 kill() 的話子彈不發射
+    aimed: True 表示整組要旋轉到朝向目標（表格是以朝右 0 度為基準）
+    random_subset: (最少, 最多) 表示每次只隨機挑其中幾列發射
+    """
+
+    def __init__(self, name, rows, aimed=False, random_subset=None, parents=None):
+        self.name = name
+        self.aimed = aimed
+        self.random_subset = random_subset
+        # sorted() 是穩定排序，同時間的子彈維持定義順序；parents 是排序前的列號，跟著換成排序後的
+        order = sorted(range(len(rows)), key=lambda index: rows[index][0])
+        new_index = {old: new for new, old in enumerate(order)}
+        if parents is None:
+            parents = [-1] * len(rows)
+        self.parents = np.array([new_index[parents[old]] if parents[old] >= 0 else -1 for old in order],
+                                dtype=np.int64)
+        table = np.array([rows[old] for old in order], dtype=float).reshape(-1, 7)
+        self.times = table[:, 0].copy()
+        self.offsets = table[:, 1:3].copy()
+        self.directions = table[:, 3:5].copy()
+        self.speeds = table[:, 5].copy()
+        self.lifetimes = table[:, 6].copy()
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def duration(self):
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+
+def _unit(angle_degrees):
+    radians = math.radians(angle_degrees)
+    return math.cos(radians), math.sin(radians)
+
+
+def _ring_rows(count, angle, speed, lifetime, time=0.0, offset=(0.0, 0.0)):
+    return [(time, offset[0], offset[1]) + _unit(angle + 360 * i / count) + (speed, lifetime) for i in range(count)]
+
+
+def compile_pattern(name, spec):
+    """把一個 pattern 定義展開成 CompiledPattern，只在載入時執行一次。"""
+    kind = spec["type"]
+    lifetime = spec.get("lifetime", DEFAULT_PROJECTILE_LIFETIME)
+    delay = spec.get("delay", 0.0)
+    rows = []
+    parents = None
+    if kind == "ring":
+        rows = _ring_rows(spec["count"], spec.get("angle", 0), spec["speed"], lifetime, delay)
+    elif kind == "spiral":
+        for shot in range(spec["shots"]):
+            rows += _ring_rows(spec["arms"], spec.get("angle", 0) + spec["turn"] * shot, spec["speed"], lifetime,
+                               delay + spec["interval"] * shot)
+    elif kind == "aimed_burst":
+        pellets, spread = spec["pellets"], spec["spread"]
+        for shot in range(spec["shots"]):
+            for pellet in range(pellets):
+                angle = (pellet - (pellets - 1) / 2) * spread
+                rows.append((delay + spec["interval"] * shot, 0.0, 0.0) + _unit(angle) + (spec["speed"], lifetime))
+    elif kind == "wave":
+        count = spec["count"]
+        for ring in range(spec["rings"]):
+            # 每一圈錯開半格，速度逐圈增加，形成一波一波往外推的效果
+            rows += _ring_rows(count, spec.get("angle", 0) + (180 / count) * (ring % 2),
+                               spec["speed"] + spec.get("speed_step", 0) * ring, lifetime,
+                               delay + spec["interval"] * ring)
+    elif kind == "split":
+        split_after, children = spec["split_after"], spec["children"]
+        parents = []
+        for i in range(spec["count"]):
+            angle = spec.get("angle", 0) + 360 * i / spec["count"]
+            dx, dy = _unit(angle)
+            # 母彈活到 split_after 就消失；分裂位置 = 母彈在那個時間點的位置（母彈被 kill() 時子彈不發射）
+            parent = len(rows)
+            rows.append((delay, 0.0, 0.0, dx, dy, spec["speed"], split_after))
+            parents.append(-1)
+            travel = spec["speed"] * split_after * FRAMES_PER_SECOND
+            rows += _ring_rows(children, angle + 180 / children, spec["child_speed"], lifetime,
+                               delay + split_after, (dx * travel, dy * travel))
+            parents += [parent] * children
+    else:
+        raise ValueError(f"未知的彈幕類型：{kind}")
+    return CompiledPattern(name, rows, aimed=kind == "aimed_burst" or spec.get("aimed", False),
+                           random_subset=spec.get("random_subset"), parents=parents)
+
+
+def compile_patterns(specs):
+    return {name: compile_pattern(name, spec) for name, spec in specs.items()}
+
+
+class PatternEmitter:
+    """
+    正在發射中的彈幕（螺旋、連發等有延遲的子彈）。fire() 把編譯好的表格換算成這次的位置 / 速度，
+    之後每幀 update() 用 searchsorted 找出時間到了的列，整段 append 到 ProjectileStore。
+    random_subset 的抽選使用 rng（預設是 random 模組本身）。
+    每一列放出時記下它在 store 裡的編號；有母彈的列到時間時，母彈已經被 kill()（store.killed_ids）
+    或母彈自己就沒有放出來的話，就不發射。
+    """
+
+    def __init__(self, patterns, rng=None):
+        self.patterns = patterns
+        self.rng = rng if rng is not None else random
+        self._volleys = []  # [times, positions, velocities, lifetimes, elapsed, next_row, parents, ids]
+        self.fired = {}  # pattern 名稱 -> 發射次數
+
+    def fire(self, name, origin, target=None):
+        pattern = self.patterns[name]
+        rows = slice(None)
+        if pattern.random_subset:
+            low, high = pattern.random_subset
+            # 排序後仍然依發射時間排列，update() 才能用 searchsorted
+            rows = sorted(self.rng.sample(range(len(pattern)), self.rng.randint(low, high)))
+        times = pattern.times[rows]
+        parents = pattern.parents[rows]
+        if pattern.random_subset and (parents >= 0).any():
+            # 母彈的列號換成抽出來的這幾列裡的位置；母彈沒被抽到的子彈一起不發射
+            position = np.full(len(pattern), -2, dtype=np.int64)
+            position[rows] = np.arange(len(rows))
+            parents = np.where(parents >= 0, position[np.maximum(parents, 0)], -1)
+        offsets = pattern.offsets[rows]
+        directions = pattern.directions[rows]
+        if pattern.aimed and target is not None:
+            angle = math.atan2(target[1] - origin[1], target[0] - origin[0])
+            cos, sin = math.cos(angle), math.sin(angle)
+            rotation = np.array([[cos, sin], [-sin, cos]])
+            offsets = offsets @ rotation
+            directions = directions @ rotation
+        velocities = directions * pattern.speeds[rows][:, None]
+        self._volleys.append([times, offsets + origin, velocities, pattern.lifetimes[rows], 0.0, 0, parents,
+                              np.full(len(times), -1, dtype=np.int64)])
+        self.fired[name] = self.fired.get(name, 0) + 1
+
+    def update(self, dt, store):
+        """把時間到了的子彈加進 store，然後把所有彈幕的時間往前推 dt。"""
+        finished = False
+        for volley in self._volleys:
+            times, elapsed, start = volley[0], volley[4], volley[5]
+            end = int(np.searchsorted(times, elapsed, side="right"))
+            if end > start:
+                self._release(store, volley, start, end)
+                volley[5] = end
+            volley[4] = elapsed + dt
+            finished = finished or end == len(times)
+        if finished:
+            self._volleys = [volley for volley in self._volleys if volley[5] < len(volley[0])]
+
+    def _release(self, store, volley, start, end):
+        positions, velocities, lifetimes, parents, ids = volley[1], volley[2], volley[3], volley[6], volley[7]
+        rows = slice(start, end)
+        row_parents = parents[rows]
+        if (row_parents != -1).any():
+            # 母彈沒有放出來（編號還是 -1）、沒被抽到（-2）或已經被 kill() 的子彈不發射
+            parent_ids = ids[np.maximum(row_parents, 0)]
+            has_parent = row_parents >= 0
+            dead = (row_parents == -2) | (has_parent & (parent_ids < 0))
+            if store.killed_ids:
+                dead |= has_parent & np.isin(parent_ids, list(store.killed_ids))
+            rows = np.arange(start, end)[~dead]
+        first_id = store.spawned
+        store.spawn_rows(positions[rows], velocities[rows], lifetimes[rows])
+        ids[rows] = np.arange(first_id, store.spawned)
+
+    def clear(self):
+        self._volleys = []
+
+    @property
+    def pending(self):
+        return sum(len(volley[0]) - volley[5] for volley in self._volleys)
+
+
+def choose_pattern(schedule, phase, movement_mode, rng=random):
+    options = schedule.get((phase, movement_mode)) or schedule[("phase1", "simple_four_way")]
+    names = [name for name, _ in options]
+    weights = [weight for _, weight in options]
+    return rng.choices(names, weights)[0]
+
+
+compiled_boss_patterns = compile_patterns(BOSS_PATTERNS)
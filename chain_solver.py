@@ -0,0 +1,104 @@
+"""
+鎖鏈的距離限制：每一條鎖鏈（link）連著兩位玩家，長度不能超過 max_length。
+
+    兩端都活著            兩個人各往對方移動超出長度的一半
+    一端活著、一端死了    死掉的那一端固定在 death_pos（錨點），活著的人整段往錨點移動
+    兩端都死了            不處理
+
+每一輪依序處理每一條鎖鏈（前一條移動過的位置，後一條馬上用得到），移動後直接把位置限制在畫面內；
+一整輪都沒有鎖鏈超出長度就提早結束，最多 iterations 輪。
+tolerance 是 0 時結果和「固定跑滿 iterations 輪」完全一樣（沒有修正的那一輪之後什麼都不會再變）；
+大於 0 時超出不到 tolerance 的鎖鏈不再修正，可以少跑幾輪，但重播檔的結果會不同。
+
+三、四位玩家時只要多給幾條鎖鏈（例如 chain_links(3) 是 0-1、1-2），每一輪的成本是 O(鎖鏈數)。
+"""
+import math
+
+from game_objects import CHAIN_ITERATIONS, CHAIN_MAX_LENGTH, SCREEN_HEIGHT, SCREEN_WIDTH
+
+
+def chain_links(player_count, loop=False):
+    """依序串起來的鎖鏈 [(0, 1), (1, 2), ...]；loop 時最後一位再連回第一位。"""
+    links = [(index, index + 1) for index in range(player_count - 1)]
+    if loop and player_count > 2:
+        links.append((player_count - 1, 0))
+    return links
+
+
+def _clamp(value, low, high):
+    # 和 max(low, min(value, high)) 相同
+    if high < value:
+        value = high
+    if value <= low:
+        value = low
+    return value
+
+
+class ChainSolver:
+    def __init__(self, links, max_length=CHAIN_MAX_LENGTH, iterations=CHAIN_ITERATIONS, tolerance=0.0):
+        self.links = list(links)  # [(玩家 index, 玩家 index), ...]
+        self.max_length = max_length
+        self.iterations = iterations
+        self.tolerance = tolerance
+        self.last_iterations = 0  # 上一次 solve() 跑了幾輪
+
+    def solve(self, players):
+        """players 是有 pos（Vector2）、rect、is_alive、death_pos 的物件；回傳跑了幾輪。"""
+        max_length = self.max_length
+        limit = max_length + self.tolerance
+        moved = 0  # 移動過的玩家（第 i 位是 1 << i）
+        iteration = 0
+        while iteration < self.iterations:
+            iteration += 1
+            corrected = False
+            for index_a, index_b in self.links:
+                a = players[index_a]
+                b = players[index_b]
+                if a.is_alive and b.is_alive:
+                    pos_a, pos_b = a.pos, b.pos
+                    delta_x = pos_b.x - pos_a.x
+                    delta_y = pos_b.y - pos_a.y
+                    distance = math.sqrt(delta_x * delta_x + delta_y * delta_y)
+                    if distance <= limit or distance == 0:
+                        continue
+                    diff = (distance - max_length) / distance
+                    shift_x = delta_x * 0.5 * diff
+                    shift_y = delta_y * 0.5 * diff
+                    # 兩個人的新位置都用移動前的位置算，再各自限制在畫面內
+                    new_ax, new_ay = pos_a.x + shift_x, pos_a.y + shift_y
+                    new_bx, new_by = pos_b.x - shift_x, pos_b.y - shift_y
+                    self._place(a, new_ax, new_ay)
+                    self._place(b, new_bx, new_by)
+                    moved |= (1 << index_a) | (1 << index_b)
+                elif a.is_alive != b.is_alive:
+                    alive, anchor = (a, b.death_pos) if a.is_alive else (b, a.death_pos)
+                    if not anchor:
+                        continue
+                    pos = alive.pos
+                    delta_x = anchor.x - pos.x
+                    delta_y = anchor.y - pos.y
+                    distance = math.sqrt(delta_x * delta_x + delta_y * delta_y)
+                    if distance <= limit or distance == 0:
+                        continue
+                    diff = (distance - max_length) / distance
+                    self._place(alive, pos.x + delta_x * diff, pos.y + delta_y * diff)
+                    moved |= 1 << (index_a if a.is_alive else index_b)
+                else:
+                    continue
+                corrected = True
+            if not corrected:
+                break
+        if moved:
+            # rect 只在最後跟著位置更新一次
+            for index, player in enumerate(players):
+                if moved >> index & 1:
+                    player.rect.center = player.pos
+        self.last_iterations = iteration
+        return iteration
+
+    @staticmethod
+    def _place(player, x, y):
+        half_width = player.rect.width // 2
+        half_height = player.rect.height // 2
+        player.pos.x = _clamp(x, half_width, SCREEN_WIDTH - half_width)
+        player.pos.y = _clamp(y, half_height, SCREEN_HEIGHT - half_height)
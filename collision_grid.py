@@ -0,0 +1,278 @@
+import pygame
+
+
+class StaticCollisionGrid:
+    """
+    關卡中不會移動的障礙物（雷射牆、地刺）的碰撞索引。
+    把畫面切成 cell_size 大小的格子，每個物件登記到它的 rect 蓋到的格子；
+    查詢時只看查詢範圍蓋到的那幾格，牆壁再多每幀的成本也不會跟著線性增加。
+
+    query() 回傳的物件順序和加入的順序相同，所以原本「依序檢查、碰到第一個就 break」的邏輯結果不變。
+    物件不會移動，同一組格子的查詢結果也不會變：第一次查詢時算好存起來，之後直接回傳同一個 list（呼叫端不要修改它）。
+    每一組格子的結果旁邊另外存一份 rect 的 list，查詢時先用 Rect.collidelist() 在 C 裡比對這幾格的候選：
+    一個都沒碰到（大部分的時候）就直接回傳空的 tuple。唯一的配置是算格子時讀 rect 座標的暫存 int 和 key 的 tuple（用完就釋放），
+    不會留下任何物件。queries / average_candidates 只算有碰到候選的查詢。
+    可以像 Group 一樣 iterate / len() / 判斷是否為空（得到全部物件）。
+    """
+
+    def __init__(self, width, height, cell_size=64):
+        self.cell_size = cell_size
+        self.cols = max(1, -(-width // cell_size))
+        self.rows = max(1, -(-height // cell_size))
+        self._cells = [[] for _ in range(self.cols * self.rows)]  # 每格存物件的 index（遞增）
+        self._objects = []
+        self._results = {}  # (col0, col1, row0, row1) -> (那幾格裡的物件, 它們的 rect)
+        self.queries = 0
+        self.candidates_returned = 0
+
+    @classmethod
+    def build(cls, width, height, objects, cell_size=64):
+        grid = cls(width, height, cell_size)
+        for obj in objects:
+            grid.add(obj)
+        return grid
+
+    def _cell_range(self, rect):
+        # 超出畫面的部分算在最邊邊的格子，查詢時也用同樣的規則，所以不會漏掉
+        col0 = min(max(rect.left // self.cell_size, 0), self.cols - 1)
+        col1 = min(max((rect.right - 1) // self.cell_size, 0), self.cols - 1)
+        row0 = min(max(rect.top // self.cell_size, 0), self.rows - 1)
+        row1 = min(max((rect.bottom - 1) // self.cell_size, 0), self.rows - 1)
+        return col0, col1, row0, row1
+
+    def add(self, obj):
+        index = len(self._objects)
+        self._objects.append(obj)
+        self._results.clear()
+        col0, col1, row0, row1 = self._cell_range(obj.rect)
+        for row in range(row0, row1 + 1):
+            for col in range(col0, col1 + 1):
+                self._cells[row * self.cols + col].append(index)
+
+    def query(self, rect):
+        """回傳 rect 附近（同一格）的物件，呼叫端仍然要自己做 colliderect。"""
+        cell_range = self._cell_range(rect)
+        entry = self._results.get(cell_range)
+        if entry is None:
+            entry = self._results[cell_range] = self._collect(*cell_range)
+        result, rects = entry
+        if rect.collidelist(rects) == -1:
+            return ()
+        self.queries += 1
+        self.candidates_returned += len(result)
+        return result
+
+    def _collect(self, col0, col1, row0, row1):
+        if col0 == col1 and row0 == row1:
+            indices = self._cells[row0 * self.cols + col0]
+        else:
+            seen = set()
+            for row in range(row0, row1 + 1):
+                for col in range(col0, col1 + 1):
+                    seen.update(self._cells[row * self.cols + col])
+            indices = sorted(seen)
+        result = [self._objects[i] for i in indices]
+        return result, [obj.rect for obj in result]
+
+    def __iter__(self):
+        return iter(self._objects)
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __bool__(self):
+        return bool(self._objects)
+
+    def get_stats(self):
+        return {
+            "objects": len(self._objects),
+            "occupied_cells": sum(1 for cell in self._cells if cell),
+            "queries": self.queries,
+            "average_candidates": self.candidates_returned / self.queries if self.queries else 0.0,
+        }
+
+
+class RectGroup(pygame.sprite.Group):
+    """
+    會移動的障礙物（合作箱）用的 Group：另外維護成員 rect 的 list（依加入順序），
+    可以直接交給 Rect.collidelist() 在 C 裡一次比對，不必 iterate Group（每次都會複製一份 sprite list）。
+    成員移動時要原地修改自己的 rect（rect.center = ...），不能換成新的 Rect 物件。
+    """
+
+    def __init__(self, *sprites):
+        self.rects = []
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.rects.append(sprite.rect)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        rects = self.rects
+        for index in range(len(rects)):
+            if rects[index] is sprite.rect:
+                del rects[index]
+                break
+
+
+class SpatialHash:
+    """
+    會移動的物件（隕石、可投擲物）的 broadphase。
+    每個 tick 開始時 rebuild() 一次，依類別（"boss_projectiles"、"meteors"...）分開登記；
+    collide(rect, category) 回傳真的和 rect 重疊的物件（依加入順序）。
+
+    格子在第一次查詢時建立，條件是這一類的物件有 min_objects 個以上，或同一個 tick 裡查詢次數超過 build_after_queries：
+    物件只有幾個時直接用 Rect.collidelistall() 在 C 裡掃過全部 rect 反而比較快，
+    物件多了（或很多物件互相檢查）才值得花一次 O(n) 把物件放進格子，之後每次查詢只看附近的格子。
+
+    candidates / hits 計數用來看 broadphase 篩掉了多少：candidates 是實際做 rect 比對的次數（效能面板上會顯示）。
+    """
+
+    def __init__(self, cell_size=64, build_after_queries=4, min_objects=16):
+        self.cell_size = cell_size
+        self.build_after_queries = build_after_queries
+        self.min_objects = min_objects
+        self._categories = {}  # category -> _HashCategory
+        self._views = {}
+        self.candidates = {}  # category -> 累計候選數
+        self.hits = {}  # category -> 累計真的重疊的數量
+
+    def clear(self):
+        self._categories = {}
+
+    def rebuild(self, groups_by_category):
+        """清空後重新登記，例如 rebuild({"meteors": meteor_sprites})。"""
+        self._categories = {category: _HashCategory(list(objects))
+                            for category, objects in groups_by_category.items()}
+
+    def insert(self, obj, category):
+        entry = self._categories.get(category)
+        if entry is None:
+            entry = self._categories[category] = _HashCategory([])
+        entry.add(obj, self.cell_size)
+
+    def collide(self, rect, category):
+        entry = self._categories.get(category)
+        if entry is None:
+            return []
+        entry.queries += 1
+        if entry.cells is None and (len(entry.objects) >= self.min_objects
+                                    or entry.queries > self.build_after_queries):
+            entry.build_cells(self.cell_size)
+
+        objects = entry.objects
+        if entry.cells is None:
+            # 還沒建格子：在 C 裡一次比對全部 rect（rect 是物件本身的 Rect，位置永遠是最新的）
+            indices = rect.collidelistall(entry.rects)
+            candidate_count = len(objects)
+        else:
+            indices = entry.query_cells(rect, self.cell_size)
+            candidate_count = len(indices)
+            indices = [index for index in indices if rect.colliderect(objects[index].rect)]
+
+        # 同一個 tick 裡已經被 kill() 的 sprite（例如被 P1 撞掉的子彈）不再算
+        hits = [objects[index] for index in indices
+                if not hasattr(objects[index], "alive") or objects[index].alive()]
+        self.candidates[category] = self.candidates.get(category, 0) + candidate_count
+        self.hits[category] = self.hits.get(category, 0) + len(hits)
+        return hits
+
+    def view(self, category):
+        """把某一類別包成可以直接傳給 Player.update_movement 的物件（可 iterate，也有 collide()）。"""
+        view = self._views.get(category)
+        if view is None:
+            view = self._views[category] = SpatialHashView(self, category)
+        return view
+
+    def objects(self, category):
+        entry = self._categories.get(category)
+        return entry.objects if entry is not None else []
+
+    def get_stats(self):
+        return {
+            category: {
+                "objects": len(self.objects(category)),
+                "candidates": self.candidates.get(category, 0),
+                "hits": self.hits.get(category, 0),
+            }
+            for category in sorted(set(self._categories) | set(self.candidates))
+        }
+
+
+class _HashCategory:
+    def __init__(self, objects):
+        self.objects = objects
+        self.rects = [obj.rect for obj in objects]
+        self.cells = None  # {(col, row): [index, ...]}，需要時才建立
+        self.queries = 0
+
+    def add(self, obj, cell_size):
+        self.objects.append(obj)
+        self.rects.append(obj.rect)
+        if self.cells is not None:
+            self._insert(len(self.objects) - 1, cell_size)
+
+    def build_cells(self, cell_size):
+        self.cells = {}
+        for index in range(len(self.objects)):
+            self._insert(index, cell_size)
+
+    def _insert(self, index, cell_size):
+        rect = self.rects[index]
+        cells = self.cells
+        for row in range(rect.top // cell_size, (rect.bottom - 1) // cell_size + 1):
+            for col in range(rect.left // cell_size, (rect.right - 1) // cell_size + 1):
+                cell = cells.get((col, row))
+                if cell is None:
+                    cells[(col, row)] = [index]
+                else:
+                    cell.append(index)
+
+    def query_cells(self, rect, cell_size):
+        col0, col1 = rect.left // cell_size, (rect.right - 1) // cell_size
+        row0, row1 = rect.top // cell_size, (rect.bottom - 1) // cell_size
+        if col0 == col1 and row0 == row1:
+            return self.cells.get((col0, row0), [])
+        seen = set()
+        for row in range(row0, row1 + 1):
+            for col in range(col0, col1 + 1):
+                cell = self.cells.get((col, row))
+                if cell:
+                    seen.update(cell)
+        return sorted(seen)
+
+
+class SpatialHashView:
+    """SpatialHash 中單一類別的物件，介面和 Group 相近（iterate / len / bool），另外有 collide(rect)。"""
+
+    def __init__(self, spatial_hash, category):
+        self.spatial_hash = spatial_hash
+        self.category = category
+
+    def collide(self, rect):
+        return self.spatial_hash.collide(rect, self.category)
+
+    def __iter__(self):
+        return iter(self.spatial_hash.objects(self.category))
+
+    def __len__(self):
+        return len(self.spatial_hash.objects(self.category))
+
+    def __bool__(self):
+        return bool(self.spatial_hash.objects(self.category))
+
+
+def collide_objects(objects, rect):
+    """回傳 objects 中和 rect 重疊的物件；objects 是 SpatialHashView 時走 broadphase，否則逐一檢查。"""
+    collide = getattr(objects, "collide", None)
+    if collide is not None:
+        return collide(rect)
+    return [obj for obj in objects if rect.colliderect(obj.rect)]
+
+
+def query_obstacles(obstacles, rect):
+    """obstacles 是 StaticCollisionGrid 時只回傳 rect 附近的物件；一般的 Group / list 原樣回傳。"""
+    if isinstance(obstacles, StaticCollisionGrid):
+        return obstacles.query(rect)
+    return obstacles
@@ -0,0 +1,93 @@
+import pygame
+
+
+class DirtyRectRenderer:
+    """
+    Dirty rectangle 模式：每幀只把有變動的區域送到螢幕（pygame.display.update(rects)），
+    取代整張畫面的 pygame.display.flip()。
+
+    畫面上會動的東西（玩家、子彈、隕石、HUD 文字、輸入游標...）在畫完之後用 add() 登記範圍，
+    present() 會把「這一幀」和「上一幀」登記的區域一起送出，這樣物體移走後留下的舊位置也會被更新。
+    場景切換（遊戲狀態改變、背景重建）或呼叫 request_full_redraw() 時會退回整張 flip。
+    """
+
+    def __init__(self, width, height, enabled=False):
+        self.screen_rect = pygame.Rect(0, 0, width, height)
+        self.enabled = enabled
+        self._scene_key = None
+        self._full_redraw = True
+        self._current_rects = []
+        self._previous_rects = []
+        # 統計：每幀送出的像素數，用來確認省下多少
+        self.pixels_pushed = 0
+        self.total_pixels_pushed = 0
+        self.frames_presented = 0
+        self.full_redraws = 0
+
+    def begin_frame(self, scene_key):
+        if scene_key != self._scene_key:
+            self._scene_key = scene_key
+            self._full_redraw = True
+
+    def request_full_redraw(self):
+        self._full_redraw = True
+
+    def add(self, rect):
+        """登記一個（或一串）已經畫到 screen 上的區域，回傳原本的參數方便串接 blit。"""
+        if rect is None:
+            return rect
+        if isinstance(rect, (list, tuple)) and (not rect or not isinstance(rect[0], (int, float))):
+            for r in rect:
+                self.add(r)
+            return rect
+        r = pygame.Rect(rect)
+        if r.width > 0 and r.height > 0:
+            self._current_rects.append(r)
+        return rect
+
+    def add_sprites(self, sprites):
+        for sprite in sprites:
+            self._current_rects.append(sprite.rect.copy())
+
+    def present(self):
+        if not self.enabled or self._full_redraw:
+            pygame.display.flip()
+            self.pixels_pushed = self.screen_rect.width * self.screen_rect.height
+            self.full_redraws += 1
+            self._full_redraw = False
+        else:
+            rects = self._merge_rects(self._current_rects + self._previous_rects)
+            if rects:
+                pygame.display.update(rects)
+            self.pixels_pushed = sum(r.width * r.height for r in rects)
+
+        self.total_pixels_pushed += self.pixels_pushed
+        self.frames_presented += 1
+        self._previous_rects = self._current_rects
+        self._current_rects = []
+
+    def _merge_rects(self, rects):
+        # 裁切到畫面範圍，並把互相重疊的區域合併，避免同一塊像素送兩次
+        merged = []
+        for rect in rects:
+            rect = rect.clip(self.screen_rect)
+            if rect.width <= 0 or rect.height <= 0:
+                continue
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
+
+    def get_stats(self):
+        full_frame_pixels = self.screen_rect.width * self.screen_rect.height
+        average = self.total_pixels_pushed / self.frames_presented if self.frames_presented else 0
+        return {
+            "enabled": self.enabled,
+            "pixels_pushed": self.pixels_pushed,
+            "average_pixels_pushed": average,
+            "average_fraction_of_full_frame": average / full_frame_pixels,
+            "frames_presented": self.frames_presented,
+            "full_redraws": self.full_redraws,
+        }
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import types
+
+import pygame
+
+# 改了檔案格式或切割流程的共用邏輯時把版本加一，舊的快取檔就會全部失效（下次啟動時整個資料夾清掉）
+CACHE_VERSION = 2
+_VERSION_FILE = "VERSION"
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".frame_cache")
+
+_MAGIC = b"RTFRAMES"
+_HEADER_LENGTH = struct.Struct("<I")
+_PIXEL_FORMAT = "RGBA"
+_BYTES_PER_PIXEL = 4
+
+_image_to_bytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+
+
+def code_digest(function):
+    """loader 的 bytecode + 常數（幀數、切割方向、使用哪一段圖...），改了 loader 快取就自動失效。"""
+    digest = hashlib.sha1()
+    _update_code_digest(digest, function.__code__)
+    return digest.hexdigest()
+
+
+def _update_code_digest(digest, code):
+    # 每次啟動都要算出一樣的值：巢狀的 code object（comprehension、lambda、內部函式）的 repr 含記憶體位址，
+    # frozenset 的 repr 順序跟著字串 hash 每次啟動都不同，所以都不能直接用 repr
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode("utf-8"))
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            digest.update(b"<code>")
+            _update_code_digest(digest, const)
+            digest.update(b"</code>")
+        elif isinstance(const, frozenset):
+            digest.update(repr(sorted(repr(item) for item in const)).encode("utf-8"))
+        else:
+            digest.update(repr(const).encode("utf-8"))
+
+
+class FrameDiskCache:
+    """
+    動畫幀的硬碟快取：切割、裁邊、smoothscale 之後的結果存成原始 RGBA 像素，
+    下次啟動直接用 mmap + pygame.image.frombuffer() 讀回來，不必再處理一次精靈圖集。
+
+    每組幀一個檔案，檔名是「(loader, 參數) 的 hash _ (loader, 參數, loader 程式碼) 的 hash」；
+    loader 改了之後寫入新檔時，同一組 (loader, 參數) 的舊檔會一起刪掉，資料夾不會越來越大。
+    檔頭記錄用到的來源圖片和它們的 sha1，圖片內容變了就視為失效並重建（寫回同一個檔名）。
+    資料夾裡的 VERSION 和 CACHE_VERSION 不同時，第一次讀寫前整個清掉。
+
+    檔案格式：MAGIC | header 長度 (uint32) | header JSON | 各幀 RGBA 像素
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._file_hashes = {}  # path -> (mtime_ns, size, sha1)，同一個檔案只算一次
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.writes = 0
+        self.pruned = 0
+        self._version_checked = False
+
+    def make_key(self, frames_key, loader_digest):
+        slot = hashlib.sha1(repr(frames_key).encode("utf-8")).hexdigest()[:16]
+        text = repr((CACHE_VERSION, frames_key, loader_digest))
+        return f"{slot}_{hashlib.sha1(text.encode('utf-8')).hexdigest()}"
+
+    def _check_version(self):
+        if self._version_checked:
+            return
+        self._version_checked = True
+        version_path = os.path.join(self.cache_dir, _VERSION_FILE)
+        try:
+            with open(version_path, encoding="utf-8") as f:
+                if f.read().strip() == str(CACHE_VERSION):
+                    return
+        except OSError:
+            pass
+        try:
+            self.pruned += self.clear()
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(version_path, "w", encoding="utf-8") as f:
+                f.write(str(CACHE_VERSION))
+        except OSError as e:
+            print(f"警告：無法清除舊版的動畫快取 {self.cache_dir}：{e}")
+
+    def _prune_slot(self, disk_key):
+        """刪掉同一組 (loader, 參數) 其他版本的檔案（loader 程式碼改過之前寫的）。"""
+        prefix = disk_key.split("_", 1)[0] + "_"
+        keep = disk_key + ".frames"
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if name.startswith(prefix) and name.endswith(".frames") and name != keep:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    self.pruned += 1
+                except OSError:
+                    pass
+
+    def _path_for(self, disk_key):
+        return os.path.join(self.cache_dir, disk_key + ".frames")
+
+    def file_hash(self, path):
+        stat = os.stat(path)
+        cached = self._file_hashes.get(path)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        with open(path, "rb") as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        self._file_hashes[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def _sources_match(self, sources):
+        try:
+            return all(self.file_hash(path) == digest for path, digest in sources.items())
+        except OSError:
+            return False
+
+    def load(self, disk_key):
+        """
+        讀取快取。
+        Returns:
+            tuple: (frames, source_paths)；沒有快取或已失效時回傳 (None, None)。
+        """
+        self._check_version()
+        path = self._path_for(disk_key)
+        try:
+            f = open(path, "rb")
+        except OSError:
+            self.misses += 1
+            return None, None
+
+        with f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None, None
+            try:
+                header = self._read_header(mapped)
+                if header is None or not self._sources_match(header["sources"]):
+                    self.stale += 1
+                    return None, None
+                try:
+                    frames = self._read_frames(mapped, header)
+                except (ValueError, pygame.error):
+                    # 檔案被截斷或格式不對，當作失效重建
+                    self.stale += 1
+                    return None, None
+            finally:
+                mapped.close()
+
+        self.hits += 1
+        return frames, set(header["sources"])
+
+    def _read_header(self, mapped):
+        if mapped[:len(_MAGIC)] != _MAGIC:
+            return None
+        start = len(_MAGIC) + _HEADER_LENGTH.size
+        (header_length,) = _HEADER_LENGTH.unpack_from(mapped, len(_MAGIC))
+        try:
+            header = json.loads(mapped[start:start + header_length].decode("utf-8"))
+        except ValueError:
+            return None
+        if header.get("version") != CACHE_VERSION:
+            return None
+        header["data_offset"] = start + header_length
+        return header
+
+    def _read_frames(self, mapped, header):
+        frames = []
+        view = memoryview(mapped)
+        try:
+            offset = header["data_offset"]
+            for width, height in header["frames"]:
+                length = width * height * _BYTES_PER_PIXEL
+                pixels = view[offset:offset + length]
+                # frombuffer 不複製像素；convert_alpha() 轉成 display format 時才複製一份，之後 mmap 就可以關掉
+                raw = pygame.image.frombuffer(pixels, (width, height), _PIXEL_FORMAT)
+                frames.append(raw.convert_alpha() if pygame.display.get_surface() else raw.copy())
+                del raw
+                pixels.release()
+                offset += length
+        finally:
+            view.release()
+        return frames
+
+    def store(self, disk_key, frames, source_paths):
+        try:
+            sources = {path: self.file_hash(path) for path in sorted(source_paths)}
+        except OSError as e:
+            print(f"警告：無法計算來源圖片的 hash，略過動畫快取：{e}")
+            return
+        header = json.dumps({
+            "version": CACHE_VERSION,
+            "sources": sources,
+            "frames": [list(frame.get_size()) for frame in frames],
+        }).encode("utf-8")
+
+        self._check_version()
+        path = self._path_for(disk_key)
+        temp_path = path + ".tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(_MAGIC)
+                f.write(_HEADER_LENGTH.pack(len(header)))
+                f.write(header)
+                for frame in frames:
+                    f.write(_image_to_bytes(frame, _PIXEL_FORMAT))
+            # 先寫暫存檔再改名，遊戲中途被關掉也不會留下寫一半的快取
+            os.replace(temp_path, path)
+            self.writes += 1
+            self._prune_slot(disk_key)
+        except OSError as e:
+            print(f"警告：無法寫入動畫快取 {path}：{e}")
+
+    def clear(self):
+        """刪掉所有快取檔，回傳刪了幾個。"""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".frames") or name.endswith(".tmp"):
+                os.remove(os.path.join(self.cache_dir, name))
+                removed += 1
+        return removed
+
+    def get_stats(self):
+        return {
+            "cache_dir": self.cache_dir,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "writes": self.writes,
+            "pruned": self.pruned,
+        }
@@ -0,0 +1,82 @@
+import time
+from array import array
+
+from span_trace import span_trace
+
+# 每幀拆開計時的部分（依畫面上的順序）：事件處理、果實效果、兩位玩家的移動、鎖鏈、Boss、背景、物件、HUD 文字、flip
+SECTIONS = ("events", "effects", "move_p1", "move_p2", "chain", "boss", "background", "sprites", "hud", "flip")
+
+
+class FrameTimings:
+    """
+    每幀各部分花了多少時間。量測的地方呼叫 lap(name, start)：把 start 到現在的時間加到 name，回傳現在的時間，
+    可以直接接著量下一段。一幀裡同一段量好幾次（例如一幀跑兩個模擬步驟）會累加起來。
+
+    end_frame() 把這一幀的結果（毫秒）寫進固定長度的環狀陣列，之後可以取最近幾幀的平均或某一幀的值。
+    陣列在建立時就配置好，量測本身不會產生新物件，效能面板關著的時候也一直在記錄。
+    每一段和整幀也會記成 span（trace，預設是 span_trace），匯出 Chrome trace 時就有每幀的各個階段。
+    """
+
+    def __init__(self, sections=SECTIONS, history=240, trace=span_trace):
+        self.sections = tuple(sections)
+        self.history = history
+        self._index = {name: index for index, name in enumerate(self.sections)}
+        self._current = [0] * len(self.sections)
+        self._samples = [array("d", bytes(8 * history)) for _ in self.sections]
+        self._frame_ms = array("d", bytes(8 * history))  # 整幀（不含 clock.tick 等待）的時間
+        self.frames = 0  # 已記錄的幀數
+        self.trace = trace
+        self._frame_start = time.perf_counter_ns()
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter_ns()
+        return self._frame_start
+
+    def lap(self, name, start):
+        now = time.perf_counter_ns()
+        self._current[self._index[name]] += now - start
+        if self.trace is not None:
+            self.trace.record(name, start, now)
+        return now
+
+    def end_frame(self):
+        """結束這一幀，回傳結束的時間（perf_counter_ns）。"""
+        slot = self.frames % self.history
+        current = self._current
+        for index, samples in enumerate(self._samples):
+            samples[slot] = current[index] / 1e6
+            current[index] = 0
+        now = time.perf_counter_ns()
+        self._frame_ms[slot] = (now - self._frame_start) / 1e6
+        self.frames += 1
+        if self.trace is not None:
+            self.trace.record("frame", self._frame_start, now)
+        return now
+
+    def _slots(self, frames):
+        count = min(frames, self.frames, self.history)
+        return [(self.frames - 1 - back) % self.history for back in range(count)]
+
+    def last(self, name=None):
+        """最近一幀某一段（name 是 None 時是整幀）的毫秒數。"""
+        if not self.frames:
+            return 0.0
+        samples = self._frame_ms if name is None else self._samples[self._index[name]]
+        return samples[(self.frames - 1) % self.history]
+
+    def average(self, name=None, frames=60):
+        slots = self._slots(frames)
+        if not slots:
+            return 0.0
+        samples = self._frame_ms if name is None else self._samples[self._index[name]]
+        return sum(samples[slot] for slot in slots) / len(slots)
+
+    def peak(self, name=None, frames=60):
+        slots = self._slots(frames)
+        if not slots:
+            return 0.0
+        samples = self._frame_ms if name is None else self._samples[self._index[name]]
+        return max(samples[slot] for slot in slots)
+
+
+frame_timings = FrameTimings()
@@ -0,0 +1,538 @@
+import os
+import random
+import time
+
+import pygame
+
+from player import Player, ACTION_KEY_P1, DRAW_ITEM_KEY_P2
+from boss_entities import Boss, throwable_pool
+from chain_solver import ChainSolver, chain_links
+from assets import asset_registry
+from collision_grid import RectGroup, SpatialHash, StaticCollisionGrid
+from frame_timings import frame_timings
+from span_trace import traced
+from game_objects import *
+
+
+def init_headless():
+    """
+    不開視窗跑遊戲邏輯（QA 機器人、效能測試、平衡調整）之前呼叫：使用 SDL dummy 影像 / 音效驅動，
+    建立 1x1 的 display（圖片的 convert_alpha() 需要有 display 才能用）。
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+
+
+class InputState:
+    """
+    一個模擬步驟的輸入。
+    held: 按住的鍵（key code 的集合），input_state[key] 和 pygame.key.get_pressed()[key] 的用法相同。
+    pressed: 這一步剛按下的動作鍵（P1 拾取 / 投擲、P2 畫出物品），依按下的順序。
+    detected_shape: P2 在繪圖視窗畫出的形狀，"None" 表示沒有。
+    """
+
+    __slots__ = ("held", "pressed", "detected_shape")
+
+    def __init__(self, held=(), pressed=(), detected_shape="None"):
+        self.held = frozenset(held)
+        self.pressed = tuple(pressed)
+        self.detected_shape = detected_shape
+
+    @classmethod
+    def from_keys(cls, keys, watched_keys, pressed=(), detected_shape="None"):
+        """把 pygame.key.get_pressed() 的結果轉成 InputState（只保留遊戲邏輯會讀的鍵）。"""
+        return cls([key for key in watched_keys if keys[key]], pressed, detected_shape)
+
+    def __getitem__(self, key):
+        return key in self.held
+
+
+class GameEngine:
+    """
+    遊戲邏輯本體：關卡、玩家、Boss、果實效果、鎖鏈、復活。不畫圖也不播音樂，
+    main.py 負責畫面和選單；QA 機器人 / 效能測試可以在 SDL dummy 驅動下直接呼叫：
+
+        init_headless()
+        engine = GameEngine()
+        engine.reset(0)
+        for _ in range(1200):
+            engine.step(InputState({pygame.K_d}), SIMULATION_DT)
+        print(engine.snapshot())
+
+    換關、進入 Boss 關、擊敗 Boss 時會呼叫 listener(event, engine)（event 是 "level_loaded"、
+    "boss_level_started"、"boss_defeated"），main.py 用它切換音樂和背景層。
+
+    所有遊戲邏輯的隨機數（Boss 移動 / 瞬移 / 彈幕、隕石、死亡震動）都來自同一個 self.rng，
+    reset() 會從 self.seed 重新開始這個亂數序列，所以同樣的種子 + 同樣的輸入一定得到同樣的結果（replay.py）。
+    """
+
+    # 每一步「剛按下」的動作鍵依這個順序處理（錄製和重播的順序才會一致）
+    ACTION_KEYS = (ACTION_KEY_P1, DRAW_ITEM_KEY_P2)
+
+    def __init__(self, listener=None, seed=None):
+        self.listener = listener
+        self.seed = seed if seed is not None else random.randrange(1 << 32) # 沒指定時隨機挑一個，重播檔會記下來
+        self.rng = random.Random(self.seed)
+        self.state = STATE_START_SCREEN
+        self.current_level_index = 0
+        self.game_time_elapsed = 0.0
+        self.current_score = 0
+        self.final_player_score = 0
+        self.final_game_time = 0.0
+        self.revive_progress = 0.0
+        self.revive_target = None
+        self.boss_defeated_area_rect = None # Boss 被擊敗後出現的出口區域
+        self.steps = 0
+
+        # 圖片載入（統一經過 asset_registry，同一個檔案只讀一次）
+        self.box_img = asset_registry.load_image("box.png")
+        self.spike_trap_img_out = asset_registry.load_image("spike_trap_out.png")
+        self.spike_trap_img_in = asset_registry.load_image("spike_trap_in.png")
+
+        # --- 遊戲物件群組 ---
+        self.laser_wall_sprites = pygame.sprite.Group()
+        self.goal_sprites = pygame.sprite.Group()
+        self.player_sprites = pygame.sprite.Group()
+        self.coop_box_group = RectGroup() # 另外維護 rect 的 list，玩家移動時直接用 collidelist() 檢查
+        self.spike_trap_group = pygame.sprite.Group()
+        self.fruit_sprites = pygame.sprite.Group()
+        self.meteor_sprites = pygame.sprite.Group()
+        self.warning_sprites = pygame.sprite.Group()
+        # Boss 物件群組
+        self.boss_group = pygame.sprite.GroupSingle() # For single boss
+        self.throwable_objects_group = pygame.sprite.Group()
+        self.boss_enemy = None # setup_boss_level() 時才建立
+
+        # 靜態碰撞索引：雷射牆、地刺不會移動，load_level() 時建立，碰撞檢查只看附近格子裡的物件
+        self.laser_wall_grid = StaticCollisionGrid(SCREEN_WIDTH, SCREEN_HEIGHT, COLLISION_GRID_CELL_SIZE)
+        self.spike_trap_grid = StaticCollisionGrid(SCREEN_WIDTH, SCREEN_HEIGHT, COLLISION_GRID_CELL_SIZE)
+        # 動態物件（隕石、可投擲物）的 spatial hash，每個 tick 開始時重建
+        self.dynamic_hash = SpatialHash(COLLISION_GRID_CELL_SIZE)
+
+        # --- 遊戲玩家實體 ---
+        self.player1 = Player(0, 0, PLAYER1_COLOR, PLAYER1_DEAD_COLOR,
+                              {'up': pygame.K_w, 'down': pygame.K_s, 'left': pygame.K_a, 'right': pygame.K_d}, 0,
+                              rng=self.rng)
+        self.player2 = Player(0, 0, PLAYER2_COLOR, PLAYER2_DEAD_COLOR,
+                              {'up': pygame.K_UP, 'down': pygame.K_DOWN, 'left': pygame.K_LEFT,
+                               'right': pygame.K_RIGHT}, 1, rng=self.rng)
+        self.player_sprites.add(self.player1, self.player2)
+        # 鎖鏈：依序串起 chain_players（目前兩位玩家一條；更多玩家時 chain_links 會多給幾條）
+        self.chain_players = (self.player1, self.player2)
+        self.chain_solver = ChainSolver(chain_links(len(self.chain_players)))
+        # 遊戲邏輯會讀的「按住」鍵（InputState.from_keys 只保留這些）
+        self.input_keys = [key for player in (self.player1, self.player2)
+                           for key in player.control_keys.values()] + [REVIVE_KEYP1, REVIVE_KEYP2]
+
+        #過關地板實體
+        self.goal1 = Goal(0, 0, GOAL_P1_COLOR, 0)
+        self.goal2 = Goal(0, 0, GOAL_P2_COLOR, 1)
+
+        #果實效果管理
+        self.effect_manager = EffectManager(self.rng)
+
+    def _emit(self, event):
+        if self.listener:
+            self.listener(event, self)
+
+    # --- 重建靜態碰撞索引（關卡的雷射牆、地刺擺好之後呼叫） ---
+    def build_static_collision_grids(self):
+        self.laser_wall_grid = StaticCollisionGrid.build(SCREEN_WIDTH, SCREEN_HEIGHT, self.laser_wall_sprites,
+                                                         COLLISION_GRID_CELL_SIZE)
+        self.spike_trap_grid = StaticCollisionGrid.build(SCREEN_WIDTH, SCREEN_HEIGHT, self.spike_trap_group,
+                                                         COLLISION_GRID_CELL_SIZE)
+
+    def clear_throwable_objects(self):
+        # 用 kill() 而不是 empty()：kill() 會把物件放回 throwable_pool，之後重複使用
+        for obj in self.throwable_objects_group.sprites():
+            obj.kill()
+
+    def get_pool_stats(self):
+        """物件池 / 子彈陣列的使用統計（給效能面板用）。"""
+        stats = {"throwables": throwable_pool.get_stats()}
+        if self.boss_enemy and hasattr(self.boss_enemy, 'projectiles'):
+            stats["boss_projectiles"] = self.boss_enemy.projectiles.get_stats()
+        return stats
+
+    def _clear_level_sprites(self):
+        self.laser_wall_sprites.empty()
+        self.goal_sprites.empty()
+        self.coop_box_group.empty()
+        self.spike_trap_group.empty()
+        self.fruit_sprites.empty()
+        self.meteor_sprites.empty()
+        self.warning_sprites.empty()
+        self.clear_throwable_objects() # Clear throwable from previous attempts
+        self.effect_manager.reset_all_effects()
+        if self.boss_enemy:
+            self.boss_enemy.projectiles.empty()
+            self.boss_enemy.pattern_emitter.clear()
+        self.boss_group.empty()
+        self.boss_enemy = None
+
+    def reseed(self, seed=None):
+        """換一個種子（None 表示隨機挑一個）並從頭開始亂數序列，回傳新的種子。"""
+        self.seed = seed if seed is not None else random.randrange(1 << 32)
+        self.rng.seed(self.seed)
+        return self.seed
+
+    def reset(self, level=0, seed=None):
+        """
+        從頭開始一個關卡（時間、分數歸零）。level 是 levels_data 的 index，"boss" 表示 Boss 關。
+        亂數序列從 seed（沒給的話用目前的 self.seed）重新開始。回傳 snapshot()。
+        """
+        self.reseed(seed if seed is not None else self.seed)
+        self.game_time_elapsed = 0.0
+        self.current_score = 0
+        self.final_player_score = 0
+        self.final_game_time = 0.0
+        self.revive_progress = 0.0
+        self.revive_target = None
+        self.boss_defeated_area_rect = None
+        self.steps = 0
+        if level == "boss":
+            self.setup_boss_level()
+        else:
+            self.current_level_index = level
+            self.load_level(level)
+        return self.snapshot()
+
+    # --- Boss 初始設定 ---
+    @traced()
+    def setup_boss_level(self):
+        # Clear regular level sprites if any could persist (though load_level should handle most)
+        self._clear_level_sprites() # No fruits in boss level by default
+        # Reset players to starting positions for boss arena
+        self.player1.start_pos = pygame.math.Vector2(100, SCREEN_HEIGHT - 100)
+        self.player2.start_pos = pygame.math.Vector2(150, SCREEN_HEIGHT - 100)
+        self.player1.reset()
+        self.player2.reset()
+
+        # Initialize Boss
+        self.boss_enemy = Boss(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4, rng=self.rng) #
+        self.boss_group.add(self.boss_enemy)
+        self.build_static_collision_grids()
+
+        # No laser walls, goals, coop boxes, spikes in this basic boss level setup. Can be added if needed.
+        self.state = STATE_BOSS_LEVEL
+        self._emit("boss_level_started")
+
+    # --- 關卡載入函數 ---
+    @traced()
+    def load_level(self, level_idx): #
+        if level_idx >= len(levels_data):
+            self.setup_boss_level() # Directly set up the boss level if all regular levels are done
+            return
+
+        level = levels_data[level_idx]
+        self.current_level_index = level_idx # Keep track of the actual level number being played
+
+        self._clear_level_sprites()
+        self.game_time_elapsed = 0.0 # Reset timer for new regular level
+        self.current_score = 0 # Reset score for new regular level
+
+        player1, player2 = self.player1, self.player2
+        player1.start_pos = pygame.math.Vector2(level["player1_start"])
+        player2.start_pos = pygame.math.Vector2(level["player2_start"])
+        player1.reset();
+        player2.reset()
+
+        for lw_data in level["laser_walls"]: self.laser_wall_sprites.add(LaserWall(*lw_data))
+        self.goal1.rect.center = level["goal1_pos"];
+        self.goal2.rect.center = level["goal2_pos"]
+        self.goal1.is_active = False;
+        self.goal2.is_active = False;
+        self.goal_sprites.add(self.goal1, self.goal2)
+
+        coop_box_starts = level.get("coop_box_start", [])
+        if coop_box_starts:
+            if isinstance(coop_box_starts[0], (list, tuple)) and not isinstance(coop_box_starts[0], int):
+                for pos_data in coop_box_starts:
+                    if len(pos_data) == 2: self.coop_box_group.add(CoopBox(pos_data[0], pos_data[1], img=self.box_img))
+            elif len(coop_box_starts) == 2 and isinstance(coop_box_starts[0], (int, float)):
+                self.coop_box_group.add(CoopBox(coop_box_starts[0], coop_box_starts[1], img=self.box_img))
+
+        for spike_data in level.get("spike_traps", []): self.spike_trap_group.add(
+            SpikeTrap(*spike_data, img_out=self.spike_trap_img_out, img_in=self.spike_trap_img_in))
+        self.build_static_collision_grids()
+
+        obstacle_sprites_for_fruits = pygame.sprite.Group(self.laser_wall_sprites.sprites(),
+                                                          self.spike_trap_group.sprites(),
+                                                          self.coop_box_group.sprites(), self.goal_sprites.sprites())
+        for fruit_data in level.get("fruits", []):
+            fx, fy, ftype = fruit_data
+            original_pos_valid = True
+            fruit_rect = pygame.Rect(0, 0, FRUIT_RADIUS * 2, FRUIT_RADIUS * 2)
+            fruit_rect.center = (fx, fy)
+            for obs in obstacle_sprites_for_fruits:
+                if fruit_rect.colliderect(obs.rect): original_pos_valid = False; break
+            if original_pos_valid:
+                if not (FRUIT_RADIUS <= fruit_rect.centerx <= SCREEN_WIDTH - FRUIT_RADIUS and
+                        FRUIT_RADIUS <= fruit_rect.centery <= SCREEN_HEIGHT - FRUIT_RADIUS): original_pos_valid = False
+            if original_pos_valid:
+                self.fruit_sprites.add(Fruit(fx, fy, ftype))
+            else:
+                print(f"Warning: Predefined fruit spawn for '{ftype}' at ({fx},{fy}) is invalid. Skipping.")
+
+        self.state = STATE_PLAYING
+        self._emit("level_loaded")
+
+    # --- Boss 關卡的動作鍵 ---
+    def handle_action_key(self, key, detected_shape="None"):
+        if key == ACTION_KEY_P1:
+            self.player1.handle_action_key(self.throwable_objects_group)
+        elif key == DRAW_ITEM_KEY_P2:
+            target_spawn_pos = self.player1.pos if self.player1.is_alive else pygame.math.Vector2(
+                ITEM_SPAWN_POS_DEFAULT)
+            self.player2.handle_draw_item_key(self.throwable_objects_group, target_spawn_pos, detected_shape)
+
+    # --- 鎖鏈拉扯判斷 ---
+    def apply_chain_constraint(self):
+        """鎖鏈長度限制（chain_solver.py），回傳跑了幾輪。"""
+        return self.chain_solver.solve(self.chain_players)
+
+    def step(self, input_state, dt=SIMULATION_DT):
+        """
+        遊戲邏輯的一個固定步驟。input_state[key] 表示 key 是否按住（InputState 或 pygame.key.get_pressed() 皆可），
+        另外可以有 pressed（這一步剛按下的動作鍵）和 detected_shape。
+        只有 STATE_PLAYING / STATE_BOSS_LEVEL / STATE_BOSS_DEFEATED 會更新，其他狀態（選單、暫停）什麼都不做。
+        """
+        if not self.is_simulating():
+            return
+        self.steps += 1
+        keys = input_state
+        player1, player2 = self.player1, self.player2
+        effect_manager = self.effect_manager
+        # 效能面板的分段計時（frame_timings.lap 回傳現在的時間，直接接著量下一段）
+        lap = frame_timings.lap
+        clock = time.perf_counter_ns
+        if self.state == STATE_PLAYING:
+            self.game_time_elapsed += dt
+            start = clock()
+            effect_manager.update(dt)
+            lap("effects", start)
+            self.dynamic_hash.rebuild({"meteors": self.meteor_sprites})
+            start = clock()
+            player1.update_movement(self.laser_wall_grid, self.coop_box_group, self.spike_trap_grid,
+                                    self.dynamic_hash.view("meteors"), effect_manager, dt, keys=keys)
+            start = lap("move_p1", start)
+            player2.update_movement(self.laser_wall_grid, self.coop_box_group, self.spike_trap_grid,
+                                    self.dynamic_hash.view("meteors"), effect_manager, dt, keys=keys)
+            lap("move_p2", start)
+
+            for player in self.player_sprites:
+                if player.is_alive:
+                    collided_fruits = pygame.sprite.spritecollide(player, self.fruit_sprites, True)
+                    for fruit in collided_fruits:
+
+                        if self.current_score < MAX_TOTAL_SCORE:
+                                self.current_score += SCORE_FRUIT_VALUE
+
+                        effect_manager.apply_effect(fruit.fruit_type, player.player_id)
+
+            if effect_manager.should_spawn_meteor():
+                spawn_x = self.rng.randint(METEOR_SIZE, SCREEN_WIDTH - METEOR_SIZE)
+                spawn_y = self.rng.randint(METEOR_SIZE, SCREEN_HEIGHT - METEOR_SIZE)
+                self.warning_sprites.add(Warning(spawn_x, spawn_y, METEOR_WARNING_TIME))
+                effect_manager.reset_meteor_timer()
+            for warning in list(self.warning_sprites):
+                if warning.update(dt): self.meteor_sprites.add(Meteor(warning.spawn_pos[0], warning.spawn_pos[1]))
+            self.warning_sprites.update(dt)
+            self.meteor_sprites.update(dt)
+
+            # 箱子推動判斷
+            if player1.is_alive and player2.is_alive:
+                for coop_box in self.coop_box_group:
+                    p1_near = player1.pos.distance_to(coop_box.pos) < COOP_BOX_PUSH_RADIUS
+                    p2_near = player2.pos.distance_to(coop_box.pos) < COOP_BOX_PUSH_RADIUS
+                    if p1_near and p2_near:
+                        total_dir = pygame.math.Vector2(0, 0)
+                        if keys[player1.control_keys['right']]: total_dir.x += 1;
+                        if keys[player1.control_keys['left']]: total_dir.x -= 1
+                        if keys[player1.control_keys['down']]: total_dir.y += 1
+                        if keys[player1.control_keys['up']]: total_dir.y -= 1
+                        if keys[player2.control_keys['right']]: total_dir.x += 1
+                        if keys[player2.control_keys['left']]: total_dir.x -= 1
+                        if keys[player2.control_keys['down']]: total_dir.y += 1
+                        if keys[player2.control_keys['up']]: total_dir.y -= 1
+                        if total_dir.length_squared() > 0: total_dir.normalize_ip(); coop_box.move(total_dir, self.laser_wall_grid, dt)
+            start = clock()
+            self.apply_chain_constraint()
+            lap("chain", start)
+
+            # 地刺的伸縮也是遊戲邏輯（暫停時不會繼續計時）
+            for spike in self.spike_trap_group:
+                spike.update(dt)
+
+            #過關判斷
+            self.goal1.update_status(player1)
+            self.goal2.update_status(player2)
+            if self.goal1.is_active and self.goal2.is_active and player1.is_alive and player2.is_alive:
+                self.current_level_index += 1
+                # 關卡過關時累加分數
+                self.final_player_score += self.current_score
+                self.load_level(self.current_level_index) # This might change state to STATE_BOSS_LEVEL
+            if not player1.is_alive and not player2.is_alive: self.state = STATE_GAME_OVER
+
+        # Boss 關卡判斷
+        elif self.state == STATE_BOSS_LEVEL:
+            boss_enemy = self.boss_enemy
+            pressed = getattr(input_state, "pressed", ())
+            for key in self.ACTION_KEYS:
+                if key in pressed:
+                    self.handle_action_key(key, getattr(input_state, "detected_shape", "None"))
+            self.game_time_elapsed += dt
+            # Boss 子彈本身是 ProjectileStore，碰撞直接在 NumPy 陣列上整批算，不必放進 dynamic_hash
+            self.dynamic_hash.rebuild({"throwables": self.throwable_objects_group})
+            start = clock()
+            player1.update_movement(None, None, None, None, effect_manager, dt, boss_enemy,
+                                    boss_enemy.projectiles, self.throwable_objects_group, keys=keys)
+            start = lap("move_p1", start)
+            player2.update_movement(None, None, None, None, effect_manager, dt, boss_enemy,
+                                    boss_enemy.projectiles, self.throwable_objects_group, keys=keys)
+            lap("move_p2", start)
+            player1.update_boss_interactions(dt)
+            player2.update_boss_interactions(dt)
+
+            if boss_enemy:
+                start = clock()
+                boss_enemy.update(dt, self.player_sprites, SCREEN_WIDTH, SCREEN_HEIGHT)
+                lap("boss", start)
+                for obj in self.dynamic_hash.collide(boss_enemy.rect, "throwables"):
+                    if obj.is_thrown:
+                        boss_enemy.take_damage(obj.damage)
+                        obj.kill()
+                        if boss_enemy.current_health <= 0:
+                            # Game state transition to ASK_CAMERA will be handled below
+                            break
+                if boss_enemy.current_health <= 0:
+                    self.final_game_time = self.game_time_elapsed
+                     # Use current_score from regular levels as boss doesn't have separate scoring
+
+                    self.boss_group.empty()
+                    self.clear_throwable_objects()
+                    if hasattr(boss_enemy, 'projectiles'): boss_enemy.projectiles.empty()
+
+                    # 產生 Boss 被擊敗後的正方形區域
+                    boss_defeated_area_size = 120
+                    self.boss_defeated_area_rect = pygame.Rect(0, 0, boss_defeated_area_size, boss_defeated_area_size)
+                    self.boss_defeated_area_rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+                    # 進入 boss_defeated_area_rect 狀態時所有死亡的 player 都會復活
+                    if not player1.is_alive:
+                        player1.is_alive = True
+                        player1.revive() if hasattr(player1, 'revive') else None
+                    if not player2.is_alive:
+                        player2.is_alive = True
+                        player2.revive() if hasattr(player2, 'revive') else None
+                    self.state = STATE_BOSS_DEFEATED
+                    self._emit("boss_defeated")
+                elif not player1.is_alive and not player2.is_alive:
+                    self.state = STATE_GAME_OVER
+
+            self.throwable_objects_group.update(dt)
+            if player1.held_object: player1.held_object.update(dt, player1.pos, player1.facing_left)
+            start = clock()
+            self.apply_chain_constraint() # Chain logic for boss level
+            lap("chain", start)
+
+        # Boss 被擊敗過場
+        elif self.state == STATE_BOSS_DEFEATED:
+            # 玩家可自由移動，並檢查兩位玩家是否都在 boss_defeated_area_rect 上
+            start = clock()
+            player1.update_movement(None, None, None, None, effect_manager, dt, keys=keys)
+            start = lap("move_p1", start)
+            player2.update_movement(None, None, None, None, effect_manager, dt, keys=keys)
+            start = lap("move_p2", start)
+            self.apply_chain_constraint()
+            lap("chain", start)
+
+            if self.boss_defeated_area_rect:
+                p1_in = player1.rect.colliderect(self.boss_defeated_area_rect)
+                p2_in = player2.rect.colliderect(self.boss_defeated_area_rect)
+                if p1_in and p2_in:
+                    self.state = STATE_ASK_CAMERA
+
+        # 復活判斷
+        if self.state == STATE_PLAYING or self.state == STATE_BOSS_LEVEL:
+            self.update_revive(keys, dt)
+
+    def is_simulating(self):
+        """目前的狀態 step() 會不會更新遊戲（選單、暫停、遊戲結束時不會）。"""
+        return self.state in (STATE_PLAYING, STATE_BOSS_LEVEL, STATE_BOSS_DEFEATED)
+
+    def update_revive(self, keys, dt):
+        player1, player2 = self.player1, self.player2
+        current_revive_initiator = None
+        potential_target_player = None #
+        if player1.is_alive and not player2.is_alive and player2.death_pos:
+            if player1.pos.distance_to(player2.death_pos) <= REVIVAL_RADIUS:
+                if keys[REVIVE_KEYP1]: current_revive_initiator = player1; potential_target_player = player2
+        elif player2.is_alive and not player1.is_alive and player1.death_pos:
+            if player2.pos.distance_to(player1.death_pos) <= REVIVAL_RADIUS:
+                if keys[REVIVE_KEYP2]: current_revive_initiator = player2; potential_target_player = player1
+
+        if current_revive_initiator and potential_target_player:
+            if self.revive_target != potential_target_player:
+                self.revive_target = potential_target_player; self.revive_progress = 0
+            self.revive_progress += dt
+        else: # Logic to reset progress if key is released or conditions change #
+            reset_progress_flag = True #
+            if self.revive_target == player2 and keys[
+                REVIVE_KEYP1] and player1.is_alive and player2.death_pos and player1.pos.distance_to(
+                    player2.death_pos) <= REVIVAL_RADIUS:
+                reset_progress_flag = False
+            if self.revive_target == player1 and keys[
+                REVIVE_KEYP2] and player2.is_alive and player1.death_pos and player2.pos.distance_to(
+                    player1.death_pos) <= REVIVAL_RADIUS:
+                reset_progress_flag = False
+            if reset_progress_flag:
+                self.revive_progress = 0
+
+        if self.revive_progress >= REVIVE_HOLD_TIME and self.revive_target is not None:
+            if self.revive_target == player2:
+                player2.revive()
+            elif self.revive_target == player1:
+                player1.revive()
+            self.revive_progress = 0
+            self.revive_target = None
+
+    def snapshot(self):
+        """目前遊戲狀態的摘要（只有 int / float / str / list / dict，可以直接 json.dump 或比對）。"""
+        players = []
+        for player in (self.player1, self.player2):
+            players.append({
+                "pos": [player.pos.x, player.pos.y],
+                "is_alive": player.is_alive,
+                "facing_left": player.facing_left,
+                "death_pos": [player.death_pos.x, player.death_pos.y] if player.death_pos else None,
+                "holding": player.held_object is not None,
+            })
+        boss = None
+        if self.boss_enemy and self.boss_enemy.alive():
+            boss = {
+                "pos": [self.boss_enemy.pos.x, self.boss_enemy.pos.y],
+                "health": self.boss_enemy.current_health,
+                "movement_mode": self.boss_enemy.movement_mode,
+                "projectiles": len(self.boss_enemy.projectiles),
+            }
+        return {
+            "seed": self.seed,
+            "state": self.state,
+            "steps": self.steps,
+            "level": self.current_level_index,
+            "time": self.game_time_elapsed,
+            "score": self.current_score,
+            "total_score": self.final_player_score,
+            "players": players,
+            "boss": boss,
+            "coop_boxes": [[box.pos.x, box.pos.y] for box in self.coop_box_group],
+            "fruits": len(self.fruit_sprites),
+            "meteors": len(self.meteor_sprites),
+            "warnings": len(self.warning_sprites),
+            "throwables": len(self.throwable_objects_group),
+            "active_effects": [key for key, data in self.effect_manager.effects.items() if data["active"]],
+            "revive_progress": self.revive_progress,
+        }
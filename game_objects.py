@@ -0,0 +1,449 @@
+import math
+import os
+import random
+
+import pygame
+
+from assets import asset_registry
+from collision_grid import query_obstacles
+from sprite_cache import sprite_cache, sample_pulse_frame
+
+# 遊戲物件（果實、流星、雷射牆、目標、箱子、地刺）、關卡資料和遊戲邏輯用到的常數。
+# main.py（畫面、選單）和 game_engine.py（不開視窗也能跑的遊戲邏輯）共用。
+
+SCREEN_WIDTH = 1080
+SCREEN_HEIGHT = 720
+PLAYER_RADIUS = 15
+# 遊戲邏輯固定每秒跑 SIMULATION_HZ 步，和畫面更新率無關；畫面在最後兩步之間內插位置
+SIMULATION_HZ = 120
+SIMULATION_DT = 1.0 / SIMULATION_HZ
+MAX_SIMULATION_STEPS = 8 # 一幀最多補跑的步數（卡頓超過 MAX_SIMULATION_STEPS / SIMULATION_HZ 秒時丟掉多的時間）
+
+# 顏色定義
+WHITE = (255, 255, 255)
+PLAYER1_COLOR = (0, 0, 255)
+PLAYER1_DEAD_COLOR = (0, 0, 100)
+PLAYER2_COLOR = (255, 0, 0)
+PLAYER2_DEAD_COLOR = (100, 0, 0)
+LASER_WALL_COLOR = (255, 0, 255)
+GOAL_P1_COLOR = (255, 100, 100)
+GOAL_P2_COLOR = (100, 100, 255)
+COOP_BOX_COLOR = (180, 140, 0)
+SCORE_FRUIT_COLOR = (255, 223, 0) #
+SCORE_FRUIT_VALUE = 1 #
+MAX_TOTAL_SCORE = 3 #
+
+# 玩家參數
+CHAIN_MAX_LENGTH = 400
+CHAIN_ITERATIONS = 5
+REVIVAL_RADIUS = CHAIN_MAX_LENGTH
+REVIVE_KEYP1 = pygame.K_f
+REVIVE_KEYP2 = pygame.K_PERIOD
+REVIVE_HOLD_TIME = 1.5
+
+# 協力推箱子常數
+COOP_BOX_SIZE = 40
+COOP_BOX_SPEED = 2
+COOP_BOX_PUSH_RADIUS = 60
+
+# 地刺參數
+SAFE_COLOR = (220, 220, 220)
+DANGER_COLOR = (220, 40, 40)
+
+# 遊戲狀態
+STATE_START_SCREEN = 4
+STATE_PLAYING = 0
+STATE_GAME_OVER = 1
+STATE_LEVEL_COMPLETE = 2 # No longer used directly for "all levels", see PRE_BOSS
+STATE_PRE_BOSS_COMPLETE = 3 # This state will no longer be actively used for a waiting screen
+STATE_BOSS_LEVEL = 5 # New state for Boss Level #
+STATE_BOSS_DEFEATED = 6 # New state for when Boss is defeated
+STATE_ASK_CAMERA = 9
+STATE_CAMERA_INPUT = 7
+STATE_SHOW_LEADERBOARD = 8
+STATE_PAUSED = 10 # NEW: Pause Menu State
+STATE_LEVEL_SELECT = 11 # NEW: Level Selection State
+# 狀態值 -> 名稱（profiler / 卡頓紀錄用）
+STATE_NAMES = {value: name[len("STATE_"):] for name, value in list(globals().items())
+               if name.startswith("STATE_") and isinstance(value, int)}
+
+# --- 果實相關常數 ---
+FRUIT_RADIUS = 15
+FRUIT_EFFECT_DURATION = 30.0
+MIRROR_FRUIT_COLOR = (255, 215, 0)
+INVISIBLE_WALL_COLOR = (138, 43, 226)
+VOLCANO_FRUIT_COLOR = (255, 69, 0)
+
+# 火山效果相關常數
+METEOR_WARNING_TIME = 1.5
+METEOR_FALL_TIME = 0.5
+METEOR_SIZE = 75
+METEOR_COLOR = (139, 69, 19)
+WARNING_COLOR = (255, 255, 0)
+WARNING_FLASH_SPEED = 10 # 警告圈閃爍的角速度（sin 的倍率）
+WARNING_PULSE_FRAMES = 32 # 一個閃爍週期預先畫好的幀數
+
+# Boss Level Item Spawn Point (P2 "draws" here if P1 not available)
+ITEM_SPAWN_POS_DEFAULT = (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50)
+
+# 靜態碰撞索引 / spatial hash 的格子大小
+COLLISION_GRID_CELL_SIZE = 64
+
+# 按鈕圖像（過關地板）
+BUTTON_IMAGE_PATHS = {
+    0: (os.path.join('plays_animation_art', 'button_red_up.png'),
+        os.path.join('plays_animation_art', 'button_red_down.png')),
+    1: (os.path.join('plays_animation_art', 'button_blue_up.png'),
+        os.path.join('plays_animation_art', 'button_blue_down.png')),
+}
+
+# --- 果實類別 ---
+class Fruit(pygame.sprite.Sprite):
+    def __init__(self, x, y, fruit_type):
+        super().__init__()
+        self.fruit_type = fruit_type
+        if fruit_type == "volcano":
+            self.image = asset_registry.get_image('./plays_animation_art/book_1.png',
+                                                  (FRUIT_RADIUS * 2, FRUIT_RADIUS * 2), "smoothscale")
+        elif fruit_type == "invisible_wall":
+            self.image = asset_registry.get_image('./plays_animation_art/book_2.png',
+                                                  (FRUIT_RADIUS * 2, FRUIT_RADIUS * 2), "smoothscale")
+        elif fruit_type == "mirror":
+            self.image = asset_registry.get_image('./plays_animation_art/book_3.png',
+                                                  (FRUIT_RADIUS * 2, FRUIT_RADIUS * 2), "smoothscale")
+        else:
+            self.image = pygame.Surface([FRUIT_RADIUS * 2, FRUIT_RADIUS * 2], pygame.SRCALPHA)
+            color = (255, 255, 255)
+            pygame.draw.circle(self.image, color, (FRUIT_RADIUS, FRUIT_RADIUS), FRUIT_RADIUS)
+            pygame.draw.circle(self.image, WHITE, (FRUIT_RADIUS, FRUIT_RADIUS), FRUIT_RADIUS, 2)
+        self.rect = self.image.get_rect(center=(x, y))
+
+# --- 流星類別 (火山爆發效果) ---
+def build_meteor_image():
+    image = pygame.Surface([METEOR_SIZE, METEOR_SIZE], pygame.SRCALPHA)
+    pygame.draw.circle(image, METEOR_COLOR, (METEOR_SIZE // 2, METEOR_SIZE // 2), METEOR_SIZE // 2)
+    pygame.draw.ellipse(image, (0, 0, 0, 100), [0, 0, METEOR_SIZE, METEOR_SIZE], 2)
+    return image
+
+class Meteor(pygame.sprite.Sprite): #
+    def __init__(self, x, y, lifetime=METEOR_FALL_TIME):
+        super().__init__()
+        self.image = sprite_cache.get(("meteor", METEOR_SIZE, METEOR_COLOR), build_meteor_image)
+        self.rect = self.image.get_rect(center=(x, y))
+        self.active = True
+        self.lifetime = lifetime
+        self.timer = 0
+
+    def update(self, dt):
+        self.timer += dt
+        if self.timer >= self.lifetime: self.kill()
+
+# --- 警告標記類別 ---
+def build_warning_pulse_frame(index):
+    # 第 index 幀對應 sin 週期上的相位，透明度公式和原本每幀重畫時相同
+    alpha = int(159 + 96 * math.sin(2 * math.pi * index / WARNING_PULSE_FRAMES))
+    image = pygame.Surface([METEOR_SIZE * 1.5, METEOR_SIZE * 1.5], pygame.SRCALPHA)
+    pygame.draw.circle(image, WARNING_COLOR + (alpha,), (image.get_width() // 2, image.get_height() // 2),
+                       int(METEOR_SIZE * 0.75), 3)
+    return image
+
+class Warning(pygame.sprite.Sprite): #
+    def __init__(self, x, y, duration):
+        super().__init__()
+        self.pulse_frames = sprite_cache.get_sequence(("warning_pulse", METEOR_SIZE, WARNING_COLOR),
+                                                      WARNING_PULSE_FRAMES, build_warning_pulse_frame)
+        self.image = self.pulse_frames[0]
+        self.rect = self.image.get_rect(center=(x, y))
+        self.duration = duration
+        self.timer = 0
+        self.spawn_pos = (x, y)
+
+    def update(self, dt):
+        self.timer += dt
+        self.image = sample_pulse_frame(self.pulse_frames, self.timer, WARNING_FLASH_SPEED)
+        if self.timer >= self.duration:
+            self.kill()
+            return True # Indicate meteor should spawn
+        return False
+
+# --- 效果管理器 ---
+class EffectManager: #
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random # 隕石間隔的隨機數（GameEngine 傳入有種子的 random.Random）
+        self.default_laser_wall_alpha = 255
+        self.effects = {
+            "mirror_p1": {"active": False, "timer": 0, "name": "P1 反向"},
+            "mirror_p2": {"active": False, "timer": 0, "name": "P2 反向"},
+            "invisible_wall": {"active": False, "timer": 0, "flash_timer": 0,
+                               "current_alpha": self.default_laser_wall_alpha, "name": "牆壁隱形"},
+            "volcano": {"active": False, "timer": 0, "meteor_timer": 0, "name": "火山爆發"}
+        }
+
+    def apply_effect(self, effect_type, player_id=None):
+        if effect_type == "mirror":
+            if player_id == 0:
+                self.effects["mirror_p1"]["active"] = True
+                self.effects["mirror_p1"]["timer"] = FRUIT_EFFECT_DURATION
+            elif player_id == 1:
+                self.effects["mirror_p2"]["active"] = True
+                self.effects["mirror_p2"]["timer"] = FRUIT_EFFECT_DURATION
+        elif effect_type == "invisible_wall":
+            self.effects["invisible_wall"]["active"] = True
+            self.effects["invisible_wall"]["timer"] = FRUIT_EFFECT_DURATION
+            self.effects["invisible_wall"]["flash_timer"] = 0
+            self.effects["invisible_wall"]["current_alpha"] = 0
+        elif effect_type == "volcano":
+            self.effects["volcano"]["active"] = True
+            self.effects["volcano"]["timer"] = FRUIT_EFFECT_DURATION
+            self.effects["volcano"]["meteor_timer"] = 0
+
+    def update(self, dt):
+        for key in ["mirror_p1", "mirror_p2"]:
+            if self.effects[key]["active"]: self.effects[key]["timer"] -= dt
+            if self.effects[key]["timer"] <= 0: self.effects[key]["active"] = False
+        if self.effects["invisible_wall"]["active"]:
+            self.effects["invisible_wall"]["timer"] -= dt
+            self.effects["invisible_wall"]["flash_timer"] += dt
+            target_alpha = 0
+            if self.effects["invisible_wall"]["timer"] <= 0:
+                self.effects["invisible_wall"]["active"] = False
+                self.effects["invisible_wall"]["current_alpha"] = self.default_laser_wall_alpha
+            else:
+                cycle_duration = 5.0
+                hidden_duration = 4.0
+                visible_duration = 1.0
+                fade_time = visible_duration / 2
+                current_cycle_time = self.effects["invisible_wall"]["flash_timer"] % cycle_duration
+                if current_cycle_time < hidden_duration:
+                    target_alpha = 0
+                else:
+                    time_in_visible_phase = current_cycle_time - hidden_duration
+                    if time_in_visible_phase < fade_time:
+                        target_alpha = int((time_in_visible_phase / fade_time) * 255)
+                    else:
+                        time_in_fade_out = time_in_visible_phase - fade_time
+                        target_alpha = int(
+                            (1.0 - (time_in_fade_out / fade_time)) * 255)
+                self.effects["invisible_wall"]["current_alpha"] = max(0, min(255, target_alpha))
+        else:
+            if self.effects["invisible_wall"]["current_alpha"] != self.default_laser_wall_alpha:
+                self.effects["invisible_wall"]["current_alpha"] = self.default_laser_wall_alpha
+
+        if self.effects["volcano"]["active"]:
+            self.effects["volcano"]["timer"] -= dt
+            self.effects["volcano"]["meteor_timer"] += dt
+            if self.effects["volcano"]["timer"] <= 0: self.effects["volcano"]["active"] = False
+
+    def get_laser_wall_alpha(self):
+        if self.effects["invisible_wall"]["active"]: return self.effects["invisible_wall"]["current_alpha"]
+        return self.default_laser_wall_alpha
+
+    def is_mirror_active(self, player_id):
+        if player_id == 0:
+            return self.effects["mirror_p1"]["active"]
+        elif player_id == 1:
+            return self.effects["mirror_p2"]["active"]
+        return False
+
+    def should_spawn_meteor(self):
+        return (self.effects["volcano"]["active"] and
+                self.effects["volcano"]["meteor_timer"] >= self.rng.uniform(0.6, 1.2))
+
+    def reset_meteor_timer(self):
+        self.effects["volcano"]["meteor_timer"] = 0
+
+    def reset_all_effects(self):
+        for effect_key in self.effects:
+            self.effects[effect_key]["active"] = False
+            self.effects[effect_key]["timer"] = 0
+            if "flash_timer" in self.effects[effect_key]: self.effects[effect_key]["flash_timer"] = 0
+            if "showing" in self.effects[effect_key]: self.effects[effect_key]["showing"] = True
+            if "meteor_timer" in self.effects[effect_key]: self.effects[effect_key]["meteor_timer"] = 0
+            if effect_key == "invisible_wall": self.effects[effect_key]["current_alpha"] = self.default_laser_wall_alpha
+
+    def get_active_effects_info(self):
+        info = []
+        for key, data in self.effects.items():
+            if data["active"]: info.append(f"{data['name']}: {data['timer']:.1f}s")
+        return info
+
+# --- 牆壁類別 (雷射牆壁) ---
+# 只負責碰撞；畫面由 static_background 的雷射牆圖層一次畫出（隱形牆效果只改整張圖層的 alpha）
+class LaserWall(pygame.sprite.Sprite): #
+    def __init__(self, x, y, width, height):
+        super().__init__()
+        self.original_color = LASER_WALL_COLOR
+        self.rect = pygame.Rect(x, y, width, height)
+
+# --- 目標類別 (顏色地板) ---
+class Goal(pygame.sprite.Sprite): #
+    def __init__(self, x, y, color, player_id_target):
+        super().__init__()
+        self.color = color
+        self.player_id_target = player_id_target
+        self.is_active = False
+        self.rect = pygame.Rect(0, 0, int(PLAYER_RADIUS * 2.5), int(PLAYER_RADIUS * 2.5))
+        self.rect.center = (x, y)
+        # For player1 (id=0), use button images
+        if player_id_target in BUTTON_IMAGE_PATHS:
+            up_path, down_path = BUTTON_IMAGE_PATHS[player_id_target]
+            self.img_up = asset_registry.get_image(up_path, self.rect.size)
+            self.img_down = asset_registry.get_image(down_path, self.rect.size)
+        else:
+            self.img_up = None
+            self.img_down = None
+        self.image = pygame.Surface([self.rect.width, self.rect.height], pygame.SRCALPHA)
+        self.image.fill(color)
+
+    def update_status(self, player):
+        if player.is_alive and self.rect.colliderect(player.rect) and player.player_id == self.player_id_target:
+            self.is_active = True
+        else:
+            self.is_active = False
+
+    def draw(self, surface):
+        if self.player_id_target in [0, 1]:
+            # Player1/Player2's goal: use button images
+            if self.is_active:
+                surface.blit(self.img_down, self.rect)
+            else:
+                surface.blit(self.img_up, self.rect)
+        else:
+            # Other: keep original color
+            surface.blit(self.image, self.rect)
+        if self.is_active:
+            pygame.draw.rect(surface, WHITE, self.rect, 3)
+        return self.rect
+
+# --- 協力推箱子類別 ---
+class CoopBox(pygame.sprite.Sprite): #
+    def __init__(self, x, y, img=None):
+        super().__init__()
+        self.collision_size = COOP_BOX_SIZE;
+        self.display_size = 60
+        self.rect = pygame.Rect(0, 0, self.collision_size, self.collision_size);
+        self.rect.center = (x, y)
+        self.pos = pygame.math.Vector2(x, y)
+        if img:
+            self.image = asset_registry.get_transformed(img, (self.display_size, self.display_size))
+        else:
+            self.image = pygame.Surface([self.display_size, self.displaySize]);
+            self.image.fill(COOP_BOX_COLOR)
+
+    def move(self, direction, obstacles, dt=1 / 60):
+        tentative_pos = self.pos + direction * COOP_BOX_SPEED * dt * 60; # COOP_BOX_SPEED 是每 1/60 秒的距離
+        test_rect = self.rect.copy()
+        test_rect.center = tentative_pos
+        for obs in query_obstacles(obstacles, test_rect):
+            if test_rect.colliderect(obs.rect) and isinstance(obs, LaserWall): return
+        if not (self.collision_size // 2 <= tentative_pos.x <= SCREEN_WIDTH - self.collision_size // 2 and
+                self.collision_size // 2 <= tentative_pos.y <= SCREEN_HEIGHT - self.collision_size // 2): return
+        self.pos = tentative_pos
+        self.rect.center = self.pos
+
+    def draw(self, surface):
+        img_rect = self.image.get_rect(center=self.rect.center);
+        return surface.blit(self.image, img_rect)
+
+# ---地刺類別---
+class SpikeTrap(pygame.sprite.Sprite): #
+    def __init__(self, x, y, width=40, height=40, out_time=1.0, in_time=1.5, phase_offset=0.0, img_out=None,
+                 img_in=None):
+        super().__init__()
+        self.rect = pygame.Rect(x, y, width, height)
+        self.out_time = out_time
+        self.in_time = in_time
+        self.cycle_time = self.out_time + self.in_time
+        self.timer = phase_offset
+        self.active = False
+        # 建立時就縮放好（共用 asset_registry 的結果），不必每幀 transform.scale
+        self.img_out = asset_registry.get_transformed(img_out, (width, height)) if img_out else None
+        self.img_in = asset_registry.get_transformed(img_in, (width, height)) if img_in else None
+
+    def update(self, dt):
+        self.timer += dt
+        phase = self.timer % self.cycle_time
+        self.active = phase < self.out_time
+
+    def is_dangerous(self):
+        return self.active
+
+    def draw(self, surface):
+        current_img = None
+        if self.active and self.img_out:
+            current_img = self.img_out
+        elif not self.active and self.img_in:
+            current_img = self.img_in
+        if current_img:
+            return surface.blit(current_img, self.rect)
+        else:
+            return pygame.draw.rect(surface, DANGER_COLOR if self.active else SAFE_COLOR, self.rect)
+
+
+# --- 關卡資料 ---
+levels_data = [ #
+    { # Level 1 Data (existing)
+        "player1_start": (100, SCREEN_HEIGHT // 2), "player2_start": (150, SCREEN_HEIGHT // 2),
+        "goal1_pos": (SCREEN_WIDTH - 50, 150), "goal2_pos": (SCREEN_WIDTH - 50, SCREEN_HEIGHT - 150),
+        "laser_walls": [(SCREEN_WIDTH // 2 - 10, 150, 20, SCREEN_HEIGHT - 300),
+                        (200, SCREEN_HEIGHT // 2 - 10, SCREEN_WIDTH // 2 - 200 - 10, 20),
+                        (SCREEN_WIDTH // 2 + 10, SCREEN_HEIGHT // 2 - 10, SCREEN_WIDTH // 2 - 20 - 10, 20)],
+        "coop_box_start": [(SCREEN_WIDTH // 4, SCREEN_HEIGHT // 4), (SCREEN_WIDTH // 4 + 50, SCREEN_HEIGHT // 4 + 50)],
+        "spike_traps": [(100, 540, 40, 40, 1.0, 2.0, 0.0), (160, 540, 40, 40, 0.7, 1.5, 0.5),
+                        (220, 540, 40, 40, 1.2, 1.0, 1.0)],
+        "fruits": [(SCREEN_WIDTH - 220, SCREEN_HEIGHT - 200, "mirror"),
+                   (SCREEN_WIDTH - 260, SCREEN_HEIGHT - 200, "invisible_wall"),
+                   (SCREEN_WIDTH - 300, SCREEN_HEIGHT - 200, "volcano")]
+    },
+    { # Level 2 Data (existing)
+        "player1_start": (50, 50), "player2_start": (100, 50),
+        "goal1_pos": (200, SCREEN_HEIGHT - 100), "goal2_pos": (200, SCREEN_HEIGHT - 50),
+        "laser_walls": [(0, 0, SCREEN_WIDTH, 20), (0, SCREEN_HEIGHT - 20, SCREEN_WIDTH, 20), (0, 0, 20, SCREEN_HEIGHT),
+                        (SCREEN_WIDTH - 20, 0, 20, SCREEN_HEIGHT), (150, 20, 20, SCREEN_HEIGHT // 2 - 25),
+                        (150, SCREEN_HEIGHT // 2 + 50, 20, SCREEN_HEIGHT // 2 - 95),
+                        (SCREEN_WIDTH - 150, 20, 20, SCREEN_HEIGHT // 2 - 100),
+                        (SCREEN_WIDTH - 150, SCREEN_HEIGHT // 2, 20, SCREEN_HEIGHT // 2 - 100),
+                        (150, SCREEN_HEIGHT // 3, SCREEN_WIDTH - 300, 20),
+                        (150, SCREEN_HEIGHT * 2 // 3, SCREEN_WIDTH - 300, 20)],
+        "coop_box_start": [(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)],
+        "fruits": [(160, SCREEN_HEIGHT // 2 + 20, "volcano"), (SCREEN_WIDTH - 140, SCREEN_HEIGHT // 2 - 30, "mirror"),
+                   (SCREEN_WIDTH - 140, SCREEN_HEIGHT - 60, "invisible_wall")]
+    },
+    {   # Level 3 Data (existing)
+        "player1_start": (40, SCREEN_HEIGHT // 2 + 70), "player2_start": (40, SCREEN_HEIGHT // 2 - 50),
+        "goal1_pos": (SCREEN_WIDTH - 50, 190), "goal2_pos": (SCREEN_WIDTH - 50, SCREEN_HEIGHT - 190),
+        "laser_walls": [ # 衡的外面
+            (0, 100, 550, 20), (0, SCREEN_HEIGHT - 100, 550, 20),
+            (600, 100, 150, 20), (600, SCREEN_HEIGHT - 100, 150, 20),
+            (800, 100, 90, 20), (800, SCREEN_HEIGHT - 100, 100, 20),
+            # 值得裡面
+            (80, 120, 20, 150), (80, SCREEN_HEIGHT - 260, 20, 180),
+            (180, 210, 20, 150), (180, SCREEN_HEIGHT - 340, 20, 180),
+            (280, 120, 20, 150), (280, SCREEN_HEIGHT - 260, 20, 180),
+            (380, 210, 20, 150), (380, SCREEN_HEIGHT - 340, 20, 180),
+            (480, 80, 20, 180), (480, SCREEN_HEIGHT - 250, 20, 180),
+
+            # 終點乓圈圈
+            (980, 330, 100, 20), (980, SCREEN_HEIGHT - 330, 150, 20),
+            (950, 150, 20, 150), (950, SCREEN_HEIGHT - 300, 20, 150),
+
+            (850, 220, 20, 150), (850, SCREEN_HEIGHT - 350, 20, 180),
+
+            (650, SCREEN_HEIGHT // 2 -140, 20, 300),
+
+            (750, 100, 20, 220), (750, SCREEN_HEIGHT - 300, 20, 220),
+            (0, SCREEN_HEIGHT // 2, 500, 20)],
+        "coop_box_start": [(1010, 120), (1050, 120), (SCREEN_WIDTH - 70, SCREEN_HEIGHT - 120),
+                           (SCREEN_WIDTH - 30, SCREEN_HEIGHT - 120)],
+        "spike_traps": [(750, 325, 40, 40, 1.5, 2.5, 0.0), (750, 365, 40, 40, 1.5, 2.5, 0.0),
+                        (75, 300, 40, 40, 1.5, 2.5, 1.5), (175, 570, 40, 40, 1.5, 2.5, 0.4),
+                        (275, 300, 40, 40, 1.5, 2.5, 0.3), (375, 570, 40, 40, 1.5, 2.5, 1.6),
+                        (475, 300, 40, 40, 1.5, 2.5, 2.5), (475, 400, 40, 40, 1.5, 2.5, 0.5),
+                        (40, 40, 40, 40, 1.0, 2.0, 0.0), (100, 40, 40, 40, 0.7, 1.5, 0.5),
+                        (160, 40, 40, 40, 1.2, 1.0, 1.0)],
+        "fruits": [(SCREEN_WIDTH - 260, SCREEN_HEIGHT - 180, "mirror"),
+                   (40,  200, "invisible_wall"),
+                   (SCREEN_WIDTH - 500, SCREEN_HEIGHT - 350, "volcano")]
+    },
+    # Boss level will be handled separately, not in this list structure.
+]
@@ -0,0 +1,148 @@
+"""
+依 game_state 控制 Python 的循環垃圾回收（gc），讓回收發生在不會被看到的時候，而不是打 Boss 打到一半。
+
+- 啟動、素材都載入完之後 freeze()：先整個回收一次，再把留下來的物件（圖片、字型、動畫幀快取……）
+  移到 permanent generation，之後的 gen2 回收就不用每次都掃過它們。
+- 進入 STATE_PLAYING / STATE_BOSS_LEVEL 時依 mode 調整：
+    "raise"   gen2 的門檻調到很高（gen0 / gen1 照常，停頓很短），幾乎不會在遊戲中做完整回收；
+    "disable" 整個關掉自動回收，只在待回收的物件超過 max_pending 時於幀結束後補一次 gen0；
+    "off"     不調整，只統計停頓時間。
+- 安全點手動 gc.collect()：換關（level 改變）、暫停、選單、STATE_BOSS_DEFEATED 等非遊戲中的畫面，
+  以及從選單載入關卡進到遊戲中的時候。從暫停回到遊戲不再回收（進暫停時已經回收過）。
+
+每一次回收（自動的和安全點的分開）都用 gc.callbacks 計時，依當時的畫面統計次數、總時間和最長停頓，
+report() 可以確認遊戲中還有沒有長的停頓。
+"""
+import gc
+import time
+from collections import defaultdict
+
+from game_objects import STATE_BOSS_LEVEL, STATE_NAMES, STATE_PAUSED, STATE_PLAYING
+
+GAMEPLAY_STATES = (STATE_PLAYING, STATE_BOSS_LEVEL)
+MODES = ("raise", "disable", "off")
+
+
+class _PauseStats:
+    __slots__ = ("count", "total_ms", "max_ms", "generations")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.generations = [0, 0, 0]
+
+    def add(self, generation, ms):
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        self.generations[generation] += 1
+
+
+class GCPolicy:
+    def __init__(self, mode="raise", gameplay_threshold2=1_000_000, max_pending=50_000):
+        if mode not in MODES:
+            raise ValueError(f"未知的 gc 模式: {mode}（可用: {', '.join(MODES)}）")
+        self.mode = mode
+        self.gameplay_threshold2 = gameplay_threshold2  # "raise" 模式遊戲中 gen2 的門檻
+        self.max_pending = max_pending  # "disable" 模式下累積多少個待回收物件就補一次 gen0
+        self.default_thresholds = gc.get_threshold()
+        self.stats = defaultdict(_PauseStats)  # (畫面名稱, "auto" / "safe") -> 停頓統計
+        self.state = None
+        self.level = None
+        self.in_gameplay = False
+        self.frozen = 0
+        self._collecting = False  # 安全點的回收也會觸發 callback，用這個分開統計
+        self._start = 0
+        self.installed = False
+
+    def install(self):
+        if not self.installed:
+            gc.callbacks.append(self._on_gc)
+            self.installed = True
+
+    def uninstall(self):
+        if self.installed:
+            gc.callbacks.remove(self._on_gc)
+            self.installed = False
+        self._leave_gameplay()
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._start = time.perf_counter_ns()
+            return
+        ms = (time.perf_counter_ns() - self._start) / 1e6
+        state_name = STATE_NAMES.get(self.state, "STARTUP")
+        self.stats[(state_name, "safe" if self._collecting else "auto")].add(info["generation"], ms)
+
+    def collect(self, generation=2):
+        """在安全點手動回收，回傳花了幾毫秒。"""
+        start = time.perf_counter_ns()
+        self._collecting = True
+        try:
+            gc.collect(generation)
+        finally:
+            self._collecting = False
+        return (time.perf_counter_ns() - start) / 1e6
+
+    def freeze(self):
+        """素材都載入完之後呼叫：回收一次，再把現存的物件都移出之後的回收範圍。"""
+        ms = self.collect()
+        gc.freeze()
+        self.frozen = gc.get_freeze_count()
+        return ms
+
+    def _enter_gameplay(self):
+        if self.in_gameplay:
+            return
+        self.in_gameplay = True
+        if self.mode == "raise":
+            gc.set_threshold(self.default_thresholds[0], self.default_thresholds[1], self.gameplay_threshold2)
+        elif self.mode == "disable":
+            gc.disable()
+
+    def _leave_gameplay(self):
+        if not self.in_gameplay:
+            return
+        self.in_gameplay = False
+        if self.mode == "raise":
+            gc.set_threshold(*self.default_thresholds)
+        elif self.mode == "disable":
+            gc.enable()
+
+    def update(self, state, level=None):
+        """每幀呼叫，state / level 有變化時就是一個安全點。"""
+        if state == self.state and level == self.level:
+            return
+        previous_state, previous_level = self.state, self.level
+        self.state, self.level = state, level
+        if state in GAMEPLAY_STATES:
+            if previous_state != STATE_PAUSED or level != previous_level:
+                self.collect()
+            self._enter_gameplay()
+        else:
+            self._leave_gameplay()
+            self.collect()
+
+    def end_frame(self):
+        """幀結束後呼叫："disable" 模式下待回收的物件太多時補一次 gen0（避免記憶體一直長）。"""
+        if self.in_gameplay and self.mode == "disable" and gc.get_count()[0] > self.max_pending:
+            self.collect(0)
+
+    def report(self):
+        """依畫面列出自動 / 安全點回收的次數、總時間、最長停頓。"""
+        lines = []
+        for (state_name, kind), stats in sorted(self.stats.items(), key=lambda item: -item[1].total_ms):
+            generations = "/".join(str(count) for count in stats.generations)
+            lines.append(f"{state_name:<16} {kind:<4} {stats.count:>5} 次（gen0/1/2 {generations}）"
+                         f" 共 {stats.total_ms:7.2f} ms，最長 {stats.max_ms:6.2f} ms")
+        return lines
+
+    def gameplay_max_pause(self):
+        """遊戲中（自動回收）最長的一次停頓，毫秒。"""
+        return max((stats.max_ms for (state_name, kind), stats in self.stats.items()
+                    if kind == "auto" and state_name in ("PLAYING", "BOSS_LEVEL")), default=0.0)
+
+
+gc_policy = GCPolicy()
@@ -0,0 +1,218 @@
+"""
+卡頓偵測：每幀結束時檢查這一幀花的時間（不含 clock.tick 的等待），超過預算就記一筆「卡頓」，
+寫下這一幀裡跑過哪些有記 span 的操作（span_trace）、發生了哪幾次 GC（gc.callbacks）以及各花了多少時間。
+
+紀錄是 JSON Lines，一行一筆，很小，可以直接從各台機台收回來合併：
+
+    {"type":"session","session":1760770000,"host":"arcade-01","budget_ms":16.67}
+    {"type":"hitch","session":1760770000,"t":1760770123.4,"frame":5120,"state":"BOSS_LEVEL","ms":84.2,
+     "cause":"boss_animation.load_boos_run2_animation","spans":[["boss_animation.load_boos_run2_animation",79.8]],
+     "gc":[[2,3.1,1520]],"sections":{"boss":81.0,"sprites":1.2}}
+
+cause 是「至少占了這一幀一半時間的 span 裡最短的那一個」，也就是最內層、最具體的那個呼叫；
+GC 也算進去（名稱是 gc.gen0 / gc.gen1 / gc.gen2）。沒有任何一段占到一半時 cause 是 "unknown"。
+
+合併、統計收回來的紀錄：
+
+    python hitch_monitor.py hitch_log.jsonl [其他機台的 hitch_log.jsonl ...]
+"""
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from collections import Counter, defaultdict
+
+from frame_timings import frame_timings
+from game_objects import STATE_NAMES
+from span_trace import span_trace
+
+# 每一幀都會有、本身不是原因的 span（整幀、模擬、繪圖這種外層區段）
+FRAME_SPANS = ("frame", "simulation", "render", "GameEngine.step")
+
+
+class HitchMonitor:
+    def __init__(self, path=None, budget_ms=1000 / 60, timings=frame_timings, trace=span_trace, top_spans=8,
+                 flush_interval=10.0):
+        self.path = path  # None 時只在記憶體裡計數，不寫檔
+        self.budget_ms = budget_ms
+        self.timings = timings
+        self.trace = trace
+        self.top_spans = top_spans
+        self.flush_interval = flush_interval
+        self.session = int(time.time())
+        self.hitches = 0
+        self.causes = Counter()
+        self.gc_counts = [0, 0, 0]  # 每一代累計的次數和時間（包含沒有卡頓的幀）
+        self.gc_ms = [0.0, 0.0, 0.0]
+        self._gc_events = []  # 這一幀的 (世代, 開始 ns, 長度 ns, 回收數量)
+        self._gc_start = 0
+        self._file = None
+        self._last_flush = time.monotonic()
+        self.installed = False
+
+    def install(self):
+        if not self.installed:
+            gc.callbacks.append(self._on_gc)
+            self.installed = True
+
+    def uninstall(self):
+        if self.installed:
+            gc.callbacks.remove(self._on_gc)
+            self.installed = False
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = time.perf_counter_ns()
+            return
+        now = time.perf_counter_ns()
+        generation = info["generation"]
+        duration = now - self._gc_start
+        self.gc_counts[generation] += 1
+        self.gc_ms[generation] += duration / 1e6
+        self._gc_events.append((generation, self._gc_start, duration, info["collected"]))
+
+    def end_frame(self, frame_start, frame_end, state=None):
+        """每幀在 frame_timings.end_frame() 之後呼叫；這一幀超過預算時記錄並回傳那一筆，否則回傳 None。"""
+        gc_events = self._gc_events
+        frame_ms = (frame_end - frame_start) / 1e6
+        if frame_ms <= self.budget_ms:
+            if gc_events:
+                gc_events.clear()
+            return None
+        record = self._build_record(frame_start, frame_end, frame_ms, state)
+        gc_events.clear()
+        self.hitches += 1
+        self.causes[record["cause"]] += 1
+        self._write(record)
+        return record
+
+    def _build_record(self, frame_start, frame_end, frame_ms, state):
+        totals = defaultdict(int)  # 同一幀裡同名的 span 合併
+        sections = set(self.timings.sections)
+        main_thread = None
+        for name, start, duration, ident in self.trace.spans(since=frame_start, until=frame_end):
+            if name in FRAME_SPANS or name in sections:
+                main_thread = ident
+                continue
+            # 只算落在這一幀裡的部分（背景執行緒的 span 可能比這一幀長）
+            overlap = min(start + duration, frame_end) - max(start, frame_start)
+            if overlap > 0:
+                totals[(name, ident)] += overlap
+        spans = {}
+        for (name, ident), duration in totals.items():
+            if main_thread is not None and ident != main_thread:
+                name = f"{name}@{self.trace.thread_name(ident)}"
+            spans[name] = spans.get(name, 0) + duration
+        gc_list = []
+        for generation, start, duration, collected in self._gc_events:
+            if start + duration < frame_start:
+                continue
+            gc_list.append([generation, round(duration / 1e6, 2), collected])
+            key = f"gc.gen{generation}"
+            spans[key] = spans.get(key, 0) + duration
+        ranked = sorted(((name, duration / 1e6) for name, duration in spans.items()), key=lambda item: -item[1])
+        # 占了一半以上時間的 span 裡最短的那個 = 最內層的原因（外層的 events、boss 區段本身不算）
+        candidates = [(ms, name) for name, ms in ranked if ms >= frame_ms / 2]
+        cause = min(candidates)[1] if candidates else "unknown"
+        section_ms = {}
+        for name in self.timings.sections:
+            ms = self.timings.last(name)
+            if ms >= 0.5:
+                section_ms[name] = round(ms, 2)
+        return {
+            "type": "hitch",
+            "session": self.session,
+            "t": round(time.time(), 1),
+            "frame": self.timings.frames,
+            "state": STATE_NAMES.get(state, str(state)) if state is not None else None,
+            "ms": round(frame_ms, 2),
+            "cause": cause,
+            "spans": [[name, round(ms, 2)] for name, ms in ranked[:self.top_spans]],
+            "gc": gc_list,
+            "sections": section_ms,
+        }
+
+    def _write(self, record):
+        if self.path is None:
+            return
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(json.dumps({"type": "session", "session": self.session, "host": platform.node(),
+                                         "budget_ms": round(self.budget_ms, 2)}, separators=(",", ":")) + "\n")
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        # 寫檔也會花時間，累積一陣子才 flush 一次
+        now = time.monotonic()
+        if now - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = now
+
+    def close(self):
+        self.uninstall()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def summary(self):
+        if not self.hitches:
+            return "沒有卡頓"
+        causes = "、".join(f"{cause} {count}" for cause, count in self.causes.most_common(5))
+        return f"{self.hitches} 次卡頓（{causes}）"
+
+
+hitch_monitor = HitchMonitor()
+
+
+# --- 合併紀錄 ---
+def load_records(paths):
+    sessions = {}
+    hitches = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 機台關機時沒寫完的最後一行
+                if record.get("type") == "session":
+                    sessions[(record["session"], record.get("host"))] = record
+                elif record.get("type") == "hitch":
+                    hitches.append(record)
+    return sessions, hitches
+
+
+def summarize(hitches):
+    """依 cause 分組：次數、平均 / 最長毫秒數、最常發生在哪個畫面。"""
+    groups = defaultdict(list)
+    for record in hitches:
+        groups[record["cause"]].append(record)
+    rows = []
+    for cause, records in groups.items():
+        durations = [record["ms"] for record in records]
+        states = Counter(record["state"] for record in records)
+        rows.append((cause, len(records), sum(durations) / len(durations), max(durations), states.most_common(1)[0][0]))
+    rows.sort(key=lambda row: -row[1])
+    return rows
+
+
+def main():
+    paths = [arg for arg in sys.argv[1:] if not arg.startswith("--")] or ["hitch_log.jsonl"]
+    paths = [path for path in paths if os.path.exists(path)]
+    if not paths:
+        print("找不到卡頓紀錄檔")
+        return 1
+    sessions, hitches = load_records(paths)
+    hosts = {host for _, host in sessions}
+    print(f"{len(paths)} 個檔案，{len(hosts)} 台機台，{len(sessions)} 次遊戲，{len(hitches)} 次卡頓")
+    print(f"{'cause':<40} {'次數':>6} {'平均ms':>8} {'最長ms':>8}  最常發生的畫面")
+    for cause, count, mean_ms, max_ms, state in summarize(hitches):
+        print(f"{cause:<40} {count:>6} {mean_ms:>8.1f} {max_ms:>8.1f}  {state}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
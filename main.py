@@ -2,13 +2,29 @@ import pygame
 import cv2
 import numpy as np
 import math
-import random
 import json
 import os
+import sys
+import time
 from player import *
 from boss_entities import *
 from music import *
 from drawing import *
+from assets import asset_registry
+from render_layers import StaticLayer
+from render_interpolation import RenderInterpolator
+from game_objects import *
+from game_engine import GameEngine, InputState
+from replay import ReplayRecorder
+from dirty_renderer import DirtyRectRenderer
+from text_cache import TextCache, truncate_text_to_width
+from sprite_cache import sprite_cache
+from frame_timings import frame_timings
+from perf_overlay import PerfOverlay
+from span_trace import span_trace, traced
+from sampling_profiler import SamplingProfiler
+from hitch_monitor import hitch_monitor
+from gc_policy import MODES as GC_POLICY_MODES, gc_policy
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -20,77 +36,43 @@ FPS = 60
 # 顏色定義
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
-PLAYER1_COLOR = (0, 0, 255)
-PLAYER1_DEAD_COLOR = (0, 0, 100)
-PLAYER2_COLOR = (255, 0, 0)
-PLAYER2_DEAD_COLOR = (100, 0, 0)
 CHAIN_COLOR = (150, 150, 150)
-LASER_WALL_COLOR = (255, 0, 255)
-GOAL_P1_COLOR = (255, 100, 100)
-GOAL_P2_COLOR = (100, 100, 255)
 TEXT_COLOR = (200, 200, 200)
 REVIVE_PROMPT_COLOR = (50, 200, 50)
-COOP_BOX_COLOR = (180, 140, 0)
-SCORE_FRUIT_COLOR = (255, 223, 0) #
-SCORE_FRUIT_VALUE = 1 #
-MAX_TOTAL_SCORE = 3 #
 MENU_OPTION_COLOR = (220, 220, 220) # NEW
 MENU_SELECTED_OPTION_COLOR = (255, 255, 0) # NEW
 PAUSE_OVERLAY_COLOR = (0, 0, 0, 150) # NEW
 
+# 以 --dirty-rects 啟動時只更新畫面有變動的區域（預設仍是整張 flip）
+DIRTY_RECT_RENDERING = "--dirty-rects" in sys.argv
+# 動畫幀預設會快取到 .frame_cache/，以 --no-frame-cache 啟動時每次都重新切割、縮放
+# 以 --uncapped 啟動時畫面不限制在 FPS，遊戲速度仍由固定頻率的模擬決定
+RENDER_FPS_LIMIT = 0 if "--uncapped" in sys.argv else FPS
+FRAME_DISK_CACHE = "--no-frame-cache" not in sys.argv
+# --seed N 固定遊戲邏輯的亂數種子；--record 檔名 把每一次從關卡開頭玩起的輸入錄成重播檔（python replay.py 檔名 重播）
+GAME_SEED = int(sys.argv[sys.argv.index("--seed") + 1]) if "--seed" in sys.argv else None
+REPLAY_RECORD_PATH = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv else None
+# 效能面板（F3 開關）：--perf-overlay 啟動時就打開
+PERF_OVERLAY_AT_START = "--perf-overlay" in sys.argv
+# 關閉遊戲時把最近的 span 匯出成 Chrome trace（F4 隨時匯出）
+TRACE_OUTPUT_PATH = sys.argv[sys.argv.index("--trace-out") + 1] if "--trace-out" in sys.argv else None
+# 取樣式 profiler（F6 開始 / 停止）：--profile 啟動時就開始，關閉遊戲時寫出 collapsed stack
+PROFILE_OUTPUT_PATH = sys.argv[sys.argv.index("--profile") + 1] if "--profile" in sys.argv else None
+PROFILE_SAMPLE_HZ = float(sys.argv[sys.argv.index("--profile-hz") + 1]) if "--profile-hz" in sys.argv else 200
+# 卡頓紀錄：超過 --hitch-budget 毫秒（預設一幀 1000/FPS）的幀寫進 --hitch-log 檔（JSON Lines），--no-hitch-log 不寫檔
+HITCH_LOG_PATH = None if "--no-hitch-log" in sys.argv else (
+    sys.argv[sys.argv.index("--hitch-log") + 1] if "--hitch-log" in sys.argv else "hitch_log.jsonl")
+HITCH_BUDGET_MS = float(sys.argv[sys.argv.index("--hitch-budget") + 1]) if "--hitch-budget" in sys.argv else 1000 / FPS
+# 遊戲中的 gc 策略（raise / disable / off，見 gc_policy.py）；--gc-report 關閉時列出每個畫面的 gc 停頓
+GC_POLICY_MODE = sys.argv[sys.argv.index("--gc-policy") + 1] if "--gc-policy" in sys.argv else "raise"
+GC_REPORT = "--gc-report" in sys.argv
+
 #---排行榜---
 LEADERBOARD_FILE = "leaderboard.json"
 MAX_LEADERBOARD_ENTRIES = 10 # Show top 10
 FACE_IMAGE_SAVE_DIR = "CatchFace"
 LEADERBOARD_FACE_SIZE = (60, 60) # Individual face size
 
-# 玩家參數
-CHAIN_MAX_LENGTH = 400
-CHAIN_ITERATIONS = 5
-REVIVAL_RADIUS = CHAIN_MAX_LENGTH
-REVIVE_KEYP1 = pygame.K_f
-REVIVE_KEYP2 = pygame.K_PERIOD
-
-# 協力推箱子常數
-COOP_BOX_SIZE = 40
-COOP_BOX_SPEED = 2
-COOP_BOX_PUSH_RADIUS = 60
-
-# 地刺參數
-SAFE_COLOR = (220, 220, 220)
-DANGER_COLOR = (220, 40, 40)
-
-# 遊戲狀態
-STATE_START_SCREEN = 4
-STATE_PLAYING = 0
-STATE_GAME_OVER = 1
-STATE_LEVEL_COMPLETE = 2 # No longer used directly for "all levels", see PRE_BOSS
-STATE_PRE_BOSS_COMPLETE = 3 # This state will no longer be actively used for a waiting screen
-STATE_BOSS_LEVEL = 5 # New state for Boss Level #
-STATE_BOSS_DEFEATED = 6 # New state for when Boss is defeated
-STATE_ASK_CAMERA = 9
-STATE_CAMERA_INPUT = 7
-STATE_SHOW_LEADERBOARD = 8
-STATE_PAUSED = 10 # NEW: Pause Menu State
-STATE_LEVEL_SELECT = 11 # NEW: Level Selection State
-
-# --- 果實相關常數 ---
-FRUIT_RADIUS = 15
-FRUIT_EFFECT_DURATION = 30.0
-MIRROR_FRUIT_COLOR = (255, 215, 0)
-INVISIBLE_WALL_COLOR = (138, 43, 226)
-VOLCANO_FRUIT_COLOR = (255, 69, 0)
-
-# 火山效果相關常數
-METEOR_WARNING_TIME = 1.5
-METEOR_FALL_TIME = 0.5
-METEOR_SIZE = 75
-METEOR_COLOR = (139, 69, 19)
-WARNING_COLOR = (255, 255, 0)
-
-# Boss Level Item Spawn Point (P2 "draws" here if P1 not available)
-ITEM_SPAWN_POS_DEFAULT = (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50)
-
 # --- 檔案相關 ---
 SAVE_FILE = "savegame.json"
 SAVE_MESSAGE_COLOR = (255, 0, 0)
@@ -98,12 +80,8 @@ show_save_feedback = False
 save_feedback_timer = 0.0
 SAVE_FEEDBACK_DURATION = 2.0
 
-# --- 遊戲速度和分數與排行榜 ---
-game_time_elapsed = 0.0
+# --- 排行榜（遊戲時間、分數在 engine 裡） ---
 leaderboard_data = []
-final_game_time = 0.0
-current_score = 0
-final_player_score = 0
 
 # 相機
 camera_capture_active = False
@@ -120,6 +98,7 @@ cap = None
 face_cascade = None
 camera_frame_surface = None # Pygame surface for camera feed
 loaded_face_images_cache = {} # Cache for loaded face images for leaderboard
+leaderboard_table_surface = None # 排行榜表格預先畫好的畫面，資料變動時才重建
 
 boss_music_playing = False # 追蹤BOSS_MUSIC是否正在播放
 
@@ -161,6 +140,9 @@ pygame.init()
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("雙人合作遊戲 Demo - 果實能力 & Boss") # Updated Caption
 clock = pygame.time.Clock()
+dirty_renderer = DirtyRectRenderer(SCREEN_WIDTH, SCREEN_HEIGHT, enabled=DIRTY_RECT_RENDERING)
+if FRAME_DISK_CACHE:
+    asset_registry.enable_disk_cache()
 
 #排行榜頭貼路徑
 if not os.path.exists(FACE_IMAGE_SAVE_DIR):
@@ -171,8 +153,7 @@ try:
     profile_jpg_path = os.path.join(FACE_IMAGE_SAVE_DIR, "PROFILE.jpg")
     absolute_profile_jpg_path = os.path.normpath(os.path.join(SCRIPT_DIR, profile_jpg_path))
 
-    raw_default_face = pygame.image.load(absolute_profile_jpg_path).convert_alpha()
-    default_face_image_surface = pygame.transform.scale(raw_default_face, LEADERBOARD_FACE_SIZE)
+    default_face_image_surface = asset_registry.get_image(absolute_profile_jpg_path, LEADERBOARD_FACE_SIZE)
     print("PROFILE.jpg 已成功從 CatchFace 資料夾載入並縮放。")
 except pygame.error as e:
     print(f"警告：無法載入 PROFILE.jpg: {e}。將使用預留位置顏色。")
@@ -183,26 +164,17 @@ LEVEL_1_MUSIC = os.path.join("game_music", "04 - Silent Forest.mp3")
 BOSS_MUSIC = os.path.join("game_music", "10 - Lost Shrine.mp3")
 FINAL_BATTLE_MUSIC = os.path.join("game_music", "21 - Final Battle - For Love.mp3")
 
-# 圖片載入
-box_img = pygame.image.load("box.png").convert_alpha()
-spike_trap_img_out = pygame.image.load("spike_trap_out.png").convert_alpha()
-spike_trap_img_in = pygame.image.load("spike_trap_in.png").convert_alpha()
-
+# 圖片載入（統一經過 asset_registry，同一個檔案只讀一次）
 # 載入 floor.png 作為平鋪背景
-floor_tile = pygame.image.load(os.path.join('plays_animation_art', 'floor.png')).convert_alpha()
+floor_tile = asset_registry.load_image(os.path.join('plays_animation_art', 'floor.png'))
 floor_tile_width, floor_tile_height = floor_tile.get_width(), floor_tile.get_height()
+# 地板、雷射牆等靜態畫面預先合成的背景層，換關時重建
+static_background = StaticLayer(SCREEN_WIDTH, SCREEN_HEIGHT, floor_tile, BLACK)
 
 # 新增：載入 floor_ladder.png 作為 boss_defeated_area_rect 圖像
-floor_ladder_img = pygame.image.load(os.path.join('plays_animation_art', 'floor_ladder.png')).convert_alpha()
+floor_ladder_img = asset_registry.load_image(os.path.join('plays_animation_art', 'floor_ladder.png'))
 floor_ladder_width, floor_ladder_height = floor_ladder_img.get_width(), floor_ladder_img.get_height()
 
-# 載入按鈕圖像
-button_red_up_img = pygame.image.load(os.path.join('plays_animation_art', 'button_red_up.png')).convert_alpha()
-button_red_down_img = pygame.image.load(os.path.join('plays_animation_art', 'button_red_down.png')).convert_alpha()
-button_blue_up_img = pygame.image.load(os.path.join('plays_animation_art', 'button_blue_up.png')).convert_alpha()
-button_blue_down_img = pygame.image.load(os.path.join('plays_animation_art', 'button_blue_down.png')).convert_alpha()
-floor_ladder_img = pygame.image.load(os.path.join('plays_animation_art', 'floor_ladder.png')).convert_alpha()
-
 # 加載支持中文的字體
 try:
     system_fonts = pygame.font.get_fonts()
@@ -238,399 +210,77 @@ except Exception as e:
     font_effect = pygame.font.Font(None, 18)
     font_menu = pygame.font.Font(None, 48) # NEW: For menus
 
-# --- 果實類別 ---
-class Fruit(pygame.sprite.Sprite):
-    def __init__(self, x, y, fruit_type):
-        super().__init__()
-        self.fruit_type = fruit_type
-        if fruit_type == "volcano":
-            img = pygame.image.load('./plays_animation_art/book_1.png').convert_alpha()
-            img = pygame.transform.smoothscale(img, (FRUIT_RADIUS * 2, FRUIT_RADIUS * 2))
-            self.image = img
-        elif fruit_type == "invisible_wall":
-            img = pygame.image.load('./plays_animation_art/book_2.png').convert_alpha()
-            img = pygame.transform.smoothscale(img, (FRUIT_RADIUS * 2, FRUIT_RADIUS * 2))
-            self.image = img
-        elif fruit_type == "mirror":
-            img = pygame.image.load('./plays_animation_art/book_3.png').convert_alpha()
-            img = pygame.transform.smoothscale(img, (FRUIT_RADIUS * 2, FRUIT_RADIUS * 2))
-            self.image = img
-        else:
-            self.image = pygame.Surface([FRUIT_RADIUS * 2, FRUIT_RADIUS * 2], pygame.SRCALPHA)
-            color = (255, 255, 255)
-            pygame.draw.circle(self.image, color, (FRUIT_RADIUS, FRUIT_RADIUS), FRUIT_RADIUS)
-            pygame.draw.circle(self.image, WHITE, (FRUIT_RADIUS, FRUIT_RADIUS), FRUIT_RADIUS, 2)
-        self.rect = self.image.get_rect(center=(x, y))
-
-# --- 流星類別 (火山爆發效果) ---
-class Meteor(pygame.sprite.Sprite): #
-    def __init__(self, x, y, lifetime=METEOR_FALL_TIME):
-        super().__init__()
-        self.image = pygame.Surface([METEOR_SIZE, METEOR_SIZE], pygame.SRCALPHA)
-        pygame.draw.circle(self.image, METEOR_COLOR, (METEOR_SIZE // 2, METEOR_SIZE // 2), METEOR_SIZE // 2)
-        pygame.draw.ellipse(self.image, (0, 0, 0, 100), [0, 0, METEOR_SIZE, METEOR_SIZE], 2)
-        self.rect = self.image.get_rect(center=(x, y))
-        self.active = True
-        self.lifetime = lifetime
-        self.timer = 0
-
-    def update(self, dt):
-        self.timer += dt
-        if self.timer >= self.lifetime: self.kill()
-
-# --- 警告標記類別 ---
-class Warning(pygame.sprite.Sprite): #
-    def __init__(self, x, y, duration):
-        super().__init__()
-        self.image = pygame.Surface([METEOR_SIZE * 1.5, METEOR_SIZE * 1.5], pygame.SRCALPHA)
-        self.rect = self.image.get_rect(center=(x, y))
-        self.duration = duration
-        self.timer = 0
-        self.spawn_pos = (x, y)
-
-    def update(self, dt):
-        self.timer += dt
-        flash_speed = 10
-        alpha = int(159 + 96 * math.sin(self.timer * flash_speed))
-        self.image.fill((0, 0, 0, 0))
-        pygame.draw.circle(self.image, WARNING_COLOR + (alpha,), (self.rect.width // 2, self.rect.height // 2),
-                           int(METEOR_SIZE * 0.75), 3)
-        if self.timer >= self.duration:
-            self.kill()
-            return True # Indicate meteor should spawn
-        return False
-
-# --- 效果管理器 ---
-class EffectManager: #
-    def __init__(self):
-        self.default_laser_wall_alpha = 255
-        self.effects = {
-            "mirror_p1": {"active": False, "timer": 0, "name": "P1 反向"},
-            "mirror_p2": {"active": False, "timer": 0, "name": "P2 反向"},
-            "invisible_wall": {"active": False, "timer": 0, "flash_timer": 0,
-                               "current_alpha": self.default_laser_wall_alpha, "name": "牆壁隱形"},
-            "volcano": {"active": False, "timer": 0, "meteor_timer": 0, "name": "火山爆發"}
-        }
+# 已 render 過的文字快取（HUD、選單、教學文字）
+text_cache = TextCache()
+
+# --- 遊戲邏輯（關卡、玩家、Boss），main.py 只負責畫面、音樂和選單 ---
+def on_engine_event(event, engine):
+    """engine 換關 / 進入 Boss 關 / 擊敗 Boss 時切換音樂和預先合成的背景層。"""
+    global leaderboard_menu_selected_index
+    if event == "level_loaded":
+        play_music(LEVEL_1_MUSIC) #
+        static_background.set_level(engine.current_level_index,
+                                    levels_data[engine.current_level_index]["laser_walls"], LASER_WALL_COLOR)
+        static_background.get_surface() # 預先合成背景層
+    elif event == "boss_level_started":
+        # 播放Boss關卡音樂
+        play_music(BOSS_MUSIC) #
+        static_background.set_level("boss")
+        static_background.get_surface() # 預先合成背景層
+    elif event == "boss_defeated":
+        pygame.mixer.music.stop()
+        leaderboard_menu_selected_index = 0
+        # 出口梯子不會移動，直接合成進背景層
+        area_rect = engine.boss_defeated_area_rect
+        exit_ladder_img = asset_registry.get_transformed(floor_ladder_img, area_rect.size).copy()
+        pygame.draw.rect(exit_ladder_img, (255, 255, 255), exit_ladder_img.get_rect(), 4)
+        static_background.set_level("boss_defeated", decor=[(exit_ladder_img, area_rect.topleft)])
+
+engine = GameEngine(on_engine_event, seed=GAME_SEED)
+replay_recorder = None # 錄製中的 ReplayRecorder（以 --record 啟動時）
+
+# 以下物件在整個遊戲中不會被換掉，直接用短名稱
+player1 = engine.player1
+player2 = engine.player2
+player_sprites = engine.player_sprites
+laser_wall_sprites = engine.laser_wall_sprites
+goal_sprites = engine.goal_sprites
+coop_box_group = engine.coop_box_group
+spike_trap_group = engine.spike_trap_group
+fruit_sprites = engine.fruit_sprites
+meteor_sprites = engine.meteor_sprites
+warning_sprites = engine.warning_sprites
+boss_group = engine.boss_group
+throwable_objects_group = engine.throwable_objects_group
+effect_manager = engine.effect_manager
+clear_throwable_objects = engine.clear_throwable_objects
+get_pool_stats = engine.get_pool_stats
+
+# 效能面板：每幀各部分的時間（frame_timings）、物件數量、快取命中率
+perf_overlay = PerfOverlay(font_effect, engine, {"assets": asset_registry, "sprites": sprite_cache, "text": text_cache})
+perf_overlay.visible = PERF_OVERLAY_AT_START
+
+# 取樣式 profiler：每個樣本標上當時的 game_state
+sampling_profiler = SamplingProfiler(lambda: game_state, interval=1.0 / PROFILE_SAMPLE_HZ)
+
+# 卡頓偵測：記下超過預算的幀裡跑過的操作和 GC
+hitch_monitor.path = HITCH_LOG_PATH
+hitch_monitor.budget_ms = HITCH_BUDGET_MS
+hitch_monitor.install()
+
+# gc 策略：遊戲中少做完整回收，改在換關、暫停、選單時回收
+if GC_POLICY_MODE not in GC_POLICY_MODES:
+    print(f"未知的 gc 策略 {GC_POLICY_MODE}，改用 raise（可用: {', '.join(GC_POLICY_MODES)}）")
+    GC_POLICY_MODE = "raise"
+gc_policy.mode = GC_POLICY_MODE
+gc_policy.install()
 
-    def apply_effect(self, effect_type, player_id=None):
-        if effect_type == "mirror":
-            if player_id == 0:
-                self.effects["mirror_p1"]["active"] = True
-                self.effects["mirror_p1"]["timer"] = FRUIT_EFFECT_DURATION
-            elif player_id == 1:
-                self.effects["mirror_p2"]["active"] = True
-                self.effects["mirror_p2"]["timer"] = FRUIT_EFFECT_DURATION
-        elif effect_type == "invisible_wall":
-            self.effects["invisible_wall"]["active"] = True
-            self.effects["invisible_wall"]["timer"] = FRUIT_EFFECT_DURATION
-            self.effects["invisible_wall"]["flash_timer"] = 0
-            self.effects["invisible_wall"]["current_alpha"] = 0
-        elif effect_type == "volcano":
-            self.effects["volcano"]["active"] = True
-            self.effects["volcano"]["timer"] = FRUIT_EFFECT_DURATION
-            self.effects["volcano"]["meteor_timer"] = 0
-
-    def update(self, dt):
-        for key in ["mirror_p1", "mirror_p2"]:
-            if self.effects[key]["active"]: self.effects[key]["timer"] -= dt
-            if self.effects[key]["timer"] <= 0: self.effects[key]["active"] = False
-        if self.effects["invisible_wall"]["active"]:
-            self.effects["invisible_wall"]["timer"] -= dt
-            self.effects["invisible_wall"]["flash_timer"] += dt
-            target_alpha = 0
-            if self.effects["invisible_wall"]["timer"] <= 0:
-                self.effects["invisible_wall"]["active"] = False
-                self.effects["invisible_wall"]["current_alpha"] = self.default_laser_wall_alpha
-            else:
-                cycle_duration = 5.0
-                hidden_duration = 4.0
-                visible_duration = 1.0
-                fade_time = visible_duration / 2
-                current_cycle_time = self.effects["invisible_wall"]["flash_timer"] % cycle_duration
-                if current_cycle_time < hidden_duration:
-                    target_alpha = 0
-                else:
-                    time_in_visible_phase = current_cycle_time - hidden_duration
-                    if time_in_visible_phase < fade_time:
-                        target_alpha = int((time_in_visible_phase / fade_time) * 255)
-                    else:
-                        time_in_fade_out = time_in_visible_phase - fade_time
-                        target_alpha = int(
-                            (1.0 - (time_in_fade_out / fade_time)) * 255)
-                self.effects["invisible_wall"]["current_alpha"] = max(0, min(255, target_alpha))
-        else:
-            if self.effects["invisible_wall"]["current_alpha"] != self.default_laser_wall_alpha:
-                self.effects["invisible_wall"]["current_alpha"] = self.default_laser_wall_alpha
-
-        if self.effects["volcano"]["active"]:
-            self.effects["volcano"]["timer"] -= dt
-            self.effects["volcano"]["meteor_timer"] += dt
-            if self.effects["volcano"]["timer"] <= 0: self.effects["volcano"]["active"] = False
-
-    def get_laser_wall_alpha(self):
-        if self.effects["invisible_wall"]["active"]: return self.effects["invisible_wall"]["current_alpha"]
-        return self.default_laser_wall_alpha
-
-    def is_mirror_active(self, player_id):
-        if player_id == 0:
-            return self.effects["mirror_p1"]["active"]
-        elif player_id == 1:
-            return self.effects["mirror_p2"]["active"]
-        return False
-
-    def should_spawn_meteor(self):
-        return (self.effects["volcano"]["active"] and self.effects["volcano"]["meteor_timer"] >= random.uniform(0.6,
-                                                                                                                1.2))
-
-    def reset_meteor_timer(self):
-        self.effects["volcano"]["meteor_timer"] = 0
-
-    def reset_all_effects(self):
-        for effect_key in self.effects:
-            self.effects[effect_key]["active"] = False
-            self.effects[effect_key]["timer"] = 0
-            if "flash_timer" in self.effects[effect_key]: self.effects[effect_key]["flash_timer"] = 0
-            if "showing" in self.effects[effect_key]: self.effects[effect_key]["showing"] = True
-            if "meteor_timer" in self.effects[effect_key]: self.effects[effect_key]["meteor_timer"] = 0
-            if effect_key == "invisible_wall": self.effects[effect_key]["current_alpha"] = self.default_laser_wall_alpha
-
-    def get_active_effects_info(self):
-        info = []
-        for key, data in self.effects.items():
-            if data["active"]: info.append(f"{data['name']}: {data['timer']:.1f}s")
-        return info
-
-# --- 牆壁類別 (雷射牆壁) ---
-class LaserWall(pygame.sprite.Sprite): #
-    def __init__(self, x, y, width, height):
-        super().__init__()
-        self.original_color = LASER_WALL_COLOR
-        self.image = pygame.Surface([width, height], pygame.SRCALPHA)
-        self.image.fill((self.original_color[0], self.original_color[1], self.original_color[2], 255))
-        self.rect = self.image.get_rect(topleft=(x, y))
-        self._current_alpha = 255
-
-    def update_visuals(self, alpha_value):
-        alpha_value = max(0, min(255, int(alpha_value)))
-        if self._current_alpha != alpha_value:
-            self._current_alpha = alpha_value
-            self.image.fill(
-                (self.original_color[0], self.original_color[1], self.original_color[2], self._current_alpha))
-
-# --- 目標類別 (顏色地板) ---
-class Goal(pygame.sprite.Sprite): #
-    def __init__(self, x, y, color, player_id_target):
-        super().__init__()
-        self.color = color
-        self.player_id_target = player_id_target
-        self.is_active = False
-        self.rect = pygame.Rect(0, 0, int(PLAYER_RADIUS * 2.5), int(PLAYER_RADIUS * 2.5))
-        self.rect.center = (x, y)
-        # For player1 (id=0), use button images
-        if player_id_target == 0:
-            self.img_up = pygame.transform.scale(button_red_up_img, (self.rect.width, self.rect.height))
-            self.img_down = pygame.transform.scale(button_red_down_img, (self.rect.width, self.rect.height))
-        elif player_id_target == 1:
-            self.img_up = pygame.transform.scale(button_blue_up_img, (self.rect.width, self.rect.height))
-            self.img_down = pygame.transform.scale(button_blue_down_img, (self.rect.width, self.rect.height))
-        else:
-            self.img_up = None
-            self.img_down = None
-        self.image = pygame.Surface([self.rect.width, self.rect.height], pygame.SRCALPHA)
-        self.image.fill(color)
-
-    def update_status(self, player):
-        if player.is_alive and self.rect.colliderect(player.rect) and player.player_id == self.player_id_target:
-            self.is_active = True
-        else:
-            self.is_active = False
-
-    def draw(self, surface):
-        if self.player_id_target in [0, 1]:
-            # Player1/Player2's goal: use button images
-            if self.is_active:
-                surface.blit(self.img_down, self.rect)
-            else:
-                surface.blit(self.img_up, self.rect)
-        else:
-            # Other: keep original color
-            surface.blit(self.image, self.rect)
-        if self.is_active:
-            pygame.draw.rect(surface, WHITE, self.rect, 3)
-
-# --- 協力推箱子類別 ---
-class CoopBox(pygame.sprite.Sprite): #
-    def __init__(self, x, y, img=None):
-        super().__init__()
-        self.collision_size = COOP_BOX_SIZE;
-        self.display_size = 60
-        self.rect = pygame.Rect(0, 0, self.collision_size, self.collision_size);
-        self.rect.center = (x, y)
-        self.pos = pygame.math.Vector2(x, y)
-        if img:
-            self.image = pygame.transform.scale(img, (self.display_size, self.display_size))
-        else:
-            self.image = pygame.Surface([self.display_size, self.displaySize]);
-            self.image.fill(COOP_BOX_COLOR)
-
-    def move(self, direction, obstacles):
-        tentative_pos = self.pos + direction * COOP_BOX_SPEED;
-        test_rect = self.rect.copy()
-        test_rect.center = tentative_pos
-        for obs in obstacles:
-            if test_rect.colliderect(obs.rect) and isinstance(obs, LaserWall): return
-        if not (self.collision_size // 2 <= tentative_pos.x <= SCREEN_WIDTH - self.collision_size // 2 and
-                self.collision_size // 2 <= tentative_pos.y <= SCREEN_HEIGHT - self.collision_size // 2): return
-        self.pos = tentative_pos
-        self.rect.center = self.pos
-
-    def draw(self, surface):
-        img_rect = self.image.get_rect(center=self.rect.center);
-        surface.blit(self.image, img_rect)
-
-# ---地刺類別---
-class SpikeTrap(pygame.sprite.Sprite): #
-    def __init__(self, x, y, width=40, height=40, out_time=1.0, in_time=1.5, phase_offset=0.0, img_out=None,
-                 img_in=None):
-        super().__init__()
-        self.rect = pygame.Rect(x, y, width, height)
-        self.out_time = out_time
-        self.in_time = in_time
-        self.cycle_time = self.out_time + self.in_time
-        self.timer = phase_offset
-        self.active = False
-        self.img_out = img_out
-        self.img_in = img_in
-
-    def update(self, dt):
-        self.timer += dt
-        phase = self.timer % self.cycle_time
-        self.active = phase < self.out_time
-
-    def is_dangerous(self):
-        return self.active
-
-    def draw(self, surface):
-        current_img = None
-        if self.active and self.img_out:
-            current_img = self.img_out
-        elif not self.active and self.img_in:
-            current_img = self.img_in
-        if current_img:
-            surface.blit(pygame.transform.scale(current_img, (self.rect.width, self.rect.height)), self.rect)
-        else:
-            pygame.draw.rect(surface, DANGER_COLOR if self.active else SAFE_COLOR, self.rect)
-
-
-# --- 關卡資料 ---
-levels_data = [ #
-    { # Level 1 Data (existing)
-        "player1_start": (100, SCREEN_HEIGHT // 2), "player2_start": (150, SCREEN_HEIGHT // 2),
-        "goal1_pos": (SCREEN_WIDTH - 50, 150), "goal2_pos": (SCREEN_WIDTH - 50, SCREEN_HEIGHT - 150),
-        "laser_walls": [(SCREEN_WIDTH // 2 - 10, 150, 20, SCREEN_HEIGHT - 300),
-                        (200, SCREEN_HEIGHT // 2 - 10, SCREEN_WIDTH // 2 - 200 - 10, 20),
-                        (SCREEN_WIDTH // 2 + 10, SCREEN_HEIGHT // 2 - 10, SCREEN_WIDTH // 2 - 20 - 10, 20)],
-        "coop_box_start": [(SCREEN_WIDTH // 4, SCREEN_HEIGHT // 4), (SCREEN_WIDTH // 4 + 50, SCREEN_HEIGHT // 4 + 50)],
-        "spike_traps": [(100, 540, 40, 40, 1.0, 2.0, 0.0), (160, 540, 40, 40, 0.7, 1.5, 0.5),
-                        (220, 540, 40, 40, 1.2, 1.0, 1.0)],
-        "fruits": [(SCREEN_WIDTH - 220, SCREEN_HEIGHT - 200, "mirror"),
-                   (SCREEN_WIDTH - 260, SCREEN_HEIGHT - 200, "invisible_wall"),
-                   (SCREEN_WIDTH - 300, SCREEN_HEIGHT - 200, "volcano")]
-    },
-    { # Level 2 Data (existing)
-        "player1_start": (50, 50), "player2_start": (100, 50),
-        "goal1_pos": (200, SCREEN_HEIGHT - 100), "goal2_pos": (200, SCREEN_HEIGHT - 50),
-        "laser_walls": [(0, 0, SCREEN_WIDTH, 20), (0, SCREEN_HEIGHT - 20, SCREEN_WIDTH, 20), (0, 0, 20, SCREEN_HEIGHT),
-                        (SCREEN_WIDTH - 20, 0, 20, SCREEN_HEIGHT), (150, 20, 20, SCREEN_HEIGHT // 2 - 25),
-                        (150, SCREEN_HEIGHT // 2 + 50, 20, SCREEN_HEIGHT // 2 - 95),
-                        (SCREEN_WIDTH - 150, 20, 20, SCREEN_HEIGHT // 2 - 100),
-                        (SCREEN_WIDTH - 150, SCREEN_HEIGHT // 2, 20, SCREEN_HEIGHT // 2 - 100),
-                        (150, SCREEN_HEIGHT // 3, SCREEN_WIDTH - 300, 20),
-                        (150, SCREEN_HEIGHT * 2 // 3, SCREEN_WIDTH - 300, 20)],
-        "coop_box_start": [(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)],
-        "fruits": [(160, SCREEN_HEIGHT // 2 + 20, "volcano"), (SCREEN_WIDTH - 140, SCREEN_HEIGHT // 2 - 30, "mirror"),
-                   (SCREEN_WIDTH - 140, SCREEN_HEIGHT - 60, "invisible_wall")]
-    },
-    {   # Level 3 Data (existing)
-        "player1_start": (40, SCREEN_HEIGHT // 2 + 70), "player2_start": (40, SCREEN_HEIGHT // 2 - 50),
-        "goal1_pos": (SCREEN_WIDTH - 50, 190), "goal2_pos": (SCREEN_WIDTH - 50, SCREEN_HEIGHT - 190),
-        "laser_walls": [ # 衡的外面
-            (0, 100, 550, 20), (0, SCREEN_HEIGHT - 100, 550, 20),
-            (600, 100, 150, 20), (600, SCREEN_HEIGHT - 100, 150, 20),
-            (800, 100, 90, 20), (800, SCREEN_HEIGHT - 100, 100, 20),
-            # 值得裡面
-            (80, 120, 20, 150), (80, SCREEN_HEIGHT - 260, 20, 180),
-            (180, 210, 20, 150), (180, SCREEN_HEIGHT - 340, 20, 180),
-            (280, 120, 20, 150), (280, SCREEN_HEIGHT - 260, 20, 180),
-            (380, 210, 20, 150), (380, SCREEN_HEIGHT - 340, 20, 180),
-            (480, 80, 20, 180), (480, SCREEN_HEIGHT - 250, 20, 180),
-
-            # 終點乓圈圈
-            (980, 330, 100, 20), (980, SCREEN_HEIGHT - 330, 150, 20),
-            (950, 150, 20, 150), (950, SCREEN_HEIGHT - 300, 20, 150),
-
-            (850, 220, 20, 150), (850, SCREEN_HEIGHT - 350, 20, 180),
-
-            (650, SCREEN_HEIGHT // 2 -140, 20, 300),
-
-            (750, 100, 20, 220), (750, SCREEN_HEIGHT - 300, 20, 220),
-            (0, SCREEN_HEIGHT // 2, 500, 20)],
-        "coop_box_start": [(1010, 120), (1050, 120), (SCREEN_WIDTH - 70, SCREEN_HEIGHT - 120),
-                           (SCREEN_WIDTH - 30, SCREEN_HEIGHT - 120)],
-        "spike_traps": [(750, 325, 40, 40, 1.5, 2.5, 0.0), (750, 365, 40, 40, 1.5, 2.5, 0.0),
-                        (75, 300, 40, 40, 1.5, 2.5, 1.5), (175, 570, 40, 40, 1.5, 2.5, 0.4),
-                        (275, 300, 40, 40, 1.5, 2.5, 0.3), (375, 570, 40, 40, 1.5, 2.5, 1.6),
-                        (475, 300, 40, 40, 1.5, 2.5, 2.5), (475, 400, 40, 40, 1.5, 2.5, 0.5),
-                        (40, 40, 40, 40, 1.0, 2.0, 0.0), (100, 40, 40, 40, 0.7, 1.5, 0.5),
-                        (160, 40, 40, 40, 1.2, 1.0, 1.0)],
-        "fruits": [(SCREEN_WIDTH - 260, SCREEN_HEIGHT - 180, "mirror"),
-                   (40,  200, "invisible_wall"),
-                   (SCREEN_WIDTH - 500, SCREEN_HEIGHT - 350, "volcano")]
-    },
-    # Boss level will be handled separately, not in this list structure.
-]
-current_level_index = 0
-
-# --- 遊戲物件群組 ---
-all_sprites = pygame.sprite.Group()
-laser_wall_sprites = pygame.sprite.Group()
-goal_sprites = pygame.sprite.Group()
-player_sprites = pygame.sprite.Group()
-coop_box_group = pygame.sprite.Group()
-spike_trap_group = pygame.sprite.Group()
-fruit_sprites = pygame.sprite.Group()
-meteor_sprites = pygame.sprite.Group()
-warning_sprites = pygame.sprite.Group()
-
-# Boss 物件群組
-boss_group = pygame.sprite.GroupSingle() # For single boss
-throwable_objects_group = pygame.sprite.Group()
-# boss_projectiles are managed within the Boss class instance's group
-
-# --- 遊戲玩家實體 ---
-player1 = Player(0, 0, PLAYER1_COLOR, PLAYER1_DEAD_COLOR,
-                 {'up': pygame.K_w, 'down': pygame.K_s, 'left': pygame.K_a, 'right': pygame.K_d}, 0)
-player2 = Player(0, 0, PLAYER2_COLOR, PLAYER2_DEAD_COLOR,
-                 {'up': pygame.K_UP, 'down': pygame.K_DOWN, 'left': pygame.K_LEFT, 'right': pygame.K_RIGHT}, 1)
-player_sprites.add(player1, player2)
-
-#過關地板實體
-goal1 = Goal(0, 0, GOAL_P1_COLOR, 0)
-goal2 = Goal(0, 0, GOAL_P2_COLOR, 1)
-
-#果實效果管理
-effect_manager = EffectManager()
-
-#boss實體，等後續初始化生成setup_boss_level()
-boss_enemy = None
-
-# 新增 Boss 被擊敗後的區域
-boss_defeated_area_rect = None
 
 #載入排行榜畫面
 def load_leaderboard():
-    global leaderboard_data, loaded_face_images_cache
+    global leaderboard_data, loaded_face_images_cache, leaderboard_table_surface
     loaded_face_images_cache.clear() # Clear cache when reloading leaderboard
+    leaderboard_table_surface = None
     try:
         with open(LEADERBOARD_FILE, 'r') as f:
             leaderboard_data = json.load(f)
@@ -642,7 +292,8 @@ def load_leaderboard():
 
 #排行榜儲存
 def save_leaderboard():
-    global leaderboard_data
+    global leaderboard_data, leaderboard_table_surface
+    leaderboard_table_surface = None
     leaderboard_data.sort(key=lambda x: (x.get('time', float('inf')), -x.get('score', 0)))
     leaderboard_data = leaderboard_data[:MAX_LEADERBOARD_ENTRIES]
     try:
@@ -665,6 +316,7 @@ def add_leaderboard_entry(name, time_val, score_val, image_path_p1, image_path_p
 load_leaderboard() # Load at game start
 
 # 初始化攝影機以進行拍照
+@traced()
 def initialize_camera_for_capture():
     global cap, face_cascade, camera_capture_active, game_state
     if cap and cap.isOpened():
@@ -698,6 +350,7 @@ def initialize_camera_for_capture():
         game_state = STATE_SHOW_LEADERBOARD # Fallback
 
 # 釋放攝影機資源
+@traced()
 def release_camera_resources():
     global cap, camera_capture_active, camera_frame_surface
     if cap:
@@ -709,6 +362,7 @@ def release_camera_resources():
     print("攝影機資源已釋放。")
 
 # 處理攝影機畫面-畫框、翻轉
+@traced()
 def process_camera_frame():
     global cap, face_cascade, camera_frame_surface, game_state
     if not camera_capture_active or not cap or not cap.isOpened() or not face_cascade:
@@ -738,6 +392,7 @@ def process_camera_frame():
     camera_frame_surface = pygame.transform.rotate(temp_surface, -90)
 
 # --- 處理拍照  擷取畫面到排行榜照片---
+@traced()
 def handle_photo_capture(player_capture_idx): # player_capture_idx: 0 for P1, 1 for P2
     global cap, face_cascade, current_player_name # Entry/Team name
     global captured_face_image_path_p1, captured_face_image_path_p2
@@ -811,103 +466,68 @@ def handle_photo_capture(player_capture_idx): # player_capture_idx: 0 for P1, 1
         post_capture_prompt_active = True
         return False
 
-# --- Boss 初始設定 ---
-def setup_boss_level():
-    global boss_enemy, game_state, game_time_elapsed, current_score # Added current_score for consistency
-    # 播放Boss關卡音樂
-    play_music(BOSS_MUSIC) #
-    # Clear regular level sprites if any could persist (though load_level should handle most)
-    laser_wall_sprites.empty()
-    goal_sprites.empty()
-    coop_box_group.empty()
-    spike_trap_group.empty()
-    fruit_sprites.empty() # No fruits in boss level by default
-    meteor_sprites.empty()
-    warning_sprites.empty()
-    throwable_objects_group.empty() # Clear any previous throwable items
-    effect_manager.reset_all_effects() # Reset any active fruit effects
-    # Reset players to starting positions for boss arena
-    player1.start_pos = pygame.math.Vector2(100, SCREEN_HEIGHT - 100)
-    player2.start_pos = pygame.math.Vector2(150, SCREEN_HEIGHT - 100)
-    player1.reset()
-    player2.reset()
-
-    # Initialize Boss
-    boss_enemy = Boss(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4) #
-    boss_group.add(boss_enemy)
-
-    # No laser walls, goals, coop boxes, spikes in this basic boss level setup. Can be added if needed.
-    game_state = STATE_BOSS_LEVEL
-
-# --- 關卡載入函數 ---
-def load_level(level_idx): #
-    global game_state, current_level_index, game_time_elapsed, current_score# Added game_time_elapsed, current_score reset
-    if level_idx >= len(levels_data):
-        setup_boss_level() # Directly set up the boss level if all regular levels are done
+# --- 效能追蹤 ---
+def dump_trace(path=None):
+    """把最近的 span 存成 Chrome trace JSON（用 Perfetto / chrome://tracing 打開）。"""
+    if path is None:
+        path = time.strftime("trace_%Y%m%d_%H%M%S.json")
+    span_trace.dump(path)
+    print(f"效能追蹤已儲存至 {path}（{min(span_trace.recorded, span_trace.capacity)} 個區段）")
+
+
+def toggle_profiler(path=None):
+    """開始取樣；已經在取樣時停止並寫出 collapsed stack（flame graph 工具可以直接讀）。"""
+    if not sampling_profiler.running:
+        sampling_profiler.clear()
+        sampling_profiler.start()
+        print(f"開始取樣（{PROFILE_SAMPLE_HZ:.0f} Hz），再按 F6 停止")
         return
+    sampling_profiler.stop()
+    if path is None:
+        # 用 --profile 啟動時，不管是按 F6 還是離開遊戲停止都寫到指定的檔案
+        path = PROFILE_OUTPUT_PATH or time.strftime("profile_%Y%m%d_%H%M%S.txt")
+    stacks = sampling_profiler.write_collapsed(path)
+    totals = "、".join(f"{name} {count}" for name, count in sampling_profiler.state_totals().most_common())
+    print(f"取樣結果已儲存至 {path}（{sampling_profiler.sample_count} 個樣本，{stacks} 種堆疊；{totals}）")
+
+# --- 重播錄製 ---
+def stop_recording():
+    """結束目前的錄製並存檔（沒有在錄的話什麼都不做）。"""
+    global replay_recorder
+    if replay_recorder is None:
+        return
+    if len(replay_recorder):
+        try:
+            replay_recorder.finish(engine.snapshot()).save(REPLAY_RECORD_PATH)
+            print(f"重播已儲存至 {REPLAY_RECORD_PATH}（{len(replay_recorder)} 步，種子 {engine.seed}）")
+        except Exception as e:
+            print(f"儲存重播時發生錯誤: {e}")
+    replay_recorder = None
+
+def start_level(load, record):
+    """載入關卡；錄製時先換一個種子，重播才能從同樣的亂數序列開始。"""
+    global game_state, replay_recorder
+    stop_recording()
+    if REPLAY_RECORD_PATH and record:
+        engine.reseed(GAME_SEED)
+    load()
+    game_state = engine.state
+    if REPLAY_RECORD_PATH and record:
+        replay_recorder = ReplayRecorder(engine, "boss" if game_state == STATE_BOSS_LEVEL
+                                         else engine.current_level_index)
 
-    level = levels_data[level_idx]
-    current_level_index = level_idx # Keep track of the actual level number being played
-
-    play_music(LEVEL_1_MUSIC) #
-
-    laser_wall_sprites.empty()
-    goal_sprites.empty()
-    coop_box_group.empty()
-    spike_trap_group.empty()
-    fruit_sprites.empty()
-    meteor_sprites.empty()
-    warning_sprites.empty()
-    throwable_objects_group.empty() # Clear throwable from previous attempts
-    effect_manager.reset_all_effects()
-    game_time_elapsed = 0.0 # Reset timer for new regular level
-    current_score = 0 # Reset score for new regular level
-
-    player1.start_pos = pygame.math.Vector2(level["player1_start"])
-    player2.start_pos = pygame.math.Vector2(level["player2_start"])
-    player1.reset();
-    player2.reset()
-
-    for lw_data in level["laser_walls"]: laser_wall_sprites.add(LaserWall(*lw_data))
-    goal1.rect.center = level["goal1_pos"];
-    goal2.rect.center = level["goal2_pos"]
-    goal1.is_active = False;
-    goal2.is_active = False;
-    goal_sprites.add(goal1, goal2)
-
-    coop_box_starts = level.get("coop_box_start", [])
-    if coop_box_starts:
-        if isinstance(coop_box_starts[0], (list, tuple)) and not isinstance(coop_box_starts[0], int):
-            for pos_data in coop_box_starts:
-                if len(pos_data) == 2: coop_box_group.add(CoopBox(pos_data[0], pos_data[1], img=box_img))
-        elif len(coop_box_starts) == 2 and isinstance(coop_box_starts[0], (int, float)):
-            coop_box_group.add(CoopBox(coop_box_starts[0], coop_box_starts[1], img=box_img))
-
-    for spike_data in level.get("spike_traps", []): spike_trap_group.add(
-        SpikeTrap(*spike_data, img_out=spike_trap_img_out, img_in=spike_trap_img_in))
-
-    obstacle_sprites_for_fruits = pygame.sprite.Group(laser_wall_sprites.sprites(), spike_trap_group.sprites(),
-                                                      coop_box_group.sprites(), goal_sprites.sprites())
-    for fruit_data in level.get("fruits", []):
-        fx, fy, ftype = fruit_data
-        original_pos_valid = True
-        fruit_rect = pygame.Rect(0, 0, FRUIT_RADIUS * 2, FRUIT_RADIUS * 2)
-        fruit_rect.center = (fx, fy)
-        for obs in obstacle_sprites_for_fruits:
-            if fruit_rect.colliderect(obs.rect): original_pos_valid = False; break
-        if original_pos_valid:
-            if not (FRUIT_RADIUS <= fruit_rect.centerx <= SCREEN_WIDTH - FRUIT_RADIUS and
-                    FRUIT_RADIUS <= fruit_rect.centery <= SCREEN_HEIGHT - FRUIT_RADIUS): original_pos_valid = False
-        if original_pos_valid:
-            fruit_sprites.add(Fruit(fx, fy, ftype))
-        else:
-            print(f"Warning: Predefined fruit spawn for '{ftype}' at ({fx},{fy}) is invalid. Skipping.")
+# --- Boss 初始設定 ---
+def setup_boss_level(record=True):
+    start_level(engine.setup_boss_level, record)
 
-    game_state = STATE_PLAYING
+# --- 關卡載入函數 ---
+def load_level(level_idx, record=True): #
+    start_level(lambda: engine.load_level(level_idx), record) # 超過最後一關時會進入 Boss 關
 
 # --- 儲存遊戲存檔 ---
+@traced()
 def save_game_state(): # MODIFIED to handle saving from pause
-    global current_level_index, game_state, player1, player2, boss_enemy, effect_manager, throwable_objects_group, state_before_pause
+    global game_state, player1, player2, effect_manager, throwable_objects_group, state_before_pause
 
     actual_game_state_to_save = game_state
     if game_state == STATE_PAUSED:
@@ -920,7 +540,7 @@ def save_game_state(): # MODIFIED to handle saving from pause
         return
 
     save_data = {
-        "current_level_index": current_level_index,
+        "current_level_index": engine.current_level_index,
         "game_state_on_save": actual_game_state_to_save, # Save the actual gameplay state
         "player1": {
             "pos_x": player1.pos.x,
@@ -947,9 +567,9 @@ def save_game_state(): # MODIFIED to handle saving from pause
         "throwable_objects": [],
         "coop_boxes": [],
         "fruits": [],
-        "game_time_elapsed": game_time_elapsed, # Save game time
-        "current_score": current_score,# Save current score
-        "final_player_score": final_player_score,
+        "game_time_elapsed": engine.game_time_elapsed, # Save game time
+        "current_score": engine.current_score,# Save current score
+        "final_player_score": engine.final_player_score,
     }
 
     for key, effect_data_val in effect_manager.effects.items():
@@ -965,20 +585,20 @@ def save_game_state(): # MODIFIED to handle saving from pause
             save_data["effect_manager"]["effects"][key]["meteor_timer"] = effect_data_val["meteor_timer"]
 
     if actual_game_state_to_save == STATE_BOSS_LEVEL:
-        if boss_enemy:
+        if engine.boss_enemy:
             save_data["boss_level_data"] = {
-                "boss_current_health": boss_enemy.current_health,
-                "boss_pos_x": boss_enemy.pos.x,
-                "boss_pos_y": boss_enemy.pos.y,
-                "boss_movement_mode": boss_enemy.movement_mode,
-                "boss_move_timer": boss_enemy.move_timer,
-                "boss_current_direction_x": boss_enemy.current_direction.x,
-                "boss_current_direction_y": boss_enemy.current_direction.y,
-                "boss_teleport_timer": boss_enemy.teleport_timer,
-                "boss_is_teleporting_warning": boss_enemy.is_teleporting_warning,
-                "boss_teleport_target_pos_x": boss_enemy.teleport_target_pos.x if boss_enemy.teleport_target_pos else None,
-                "boss_teleport_target_pos_y": boss_enemy.teleport_target_pos.y if boss_enemy.teleport_target_pos else None,
-                "boss_attack_timer": boss_enemy.attack_timer,
+                "boss_current_health": engine.boss_enemy.current_health,
+                "boss_pos_x": engine.boss_enemy.pos.x,
+                "boss_pos_y": engine.boss_enemy.pos.y,
+                "boss_movement_mode": engine.boss_enemy.movement_mode,
+                "boss_move_timer": engine.boss_enemy.move_timer,
+                "boss_current_direction_x": engine.boss_enemy.current_direction.x,
+                "boss_current_direction_y": engine.boss_enemy.current_direction.y,
+                "boss_teleport_timer": engine.boss_enemy.teleport_timer,
+                "boss_is_teleporting_warning": engine.boss_enemy.is_teleporting_warning,
+                "boss_teleport_target_pos_x": engine.boss_enemy.teleport_target_pos.x if engine.boss_enemy.teleport_target_pos else None,
+                "boss_teleport_target_pos_y": engine.boss_enemy.teleport_target_pos.y if engine.boss_enemy.teleport_target_pos else None,
+                "boss_attack_timer": engine.boss_enemy.attack_timer,
             }
 
         player1_held_object_temp_id = -1
@@ -993,7 +613,8 @@ def save_game_state(): # MODIFIED to handle saving from pause
                 "is_thrown": obj.is_thrown,
                 "throw_velocity_x": obj.throw_velocity.x,
                 "throw_velocity_y": obj.throw_velocity.y,
-                "spawned_by_player_id": getattr(obj, "held_by_player_id", None),
+                "spawned_by_player_id": obj.spawned_by_player_id,
+                "detected_shape": obj.detected_shape,
                 "is_held_by_p1": (id(obj) == player1_held_object_temp_id)
             }
             save_data["throwable_objects"].append(obj_data)
@@ -1025,29 +646,30 @@ def save_game_state(): # MODIFIED to handle saving from pause
         print(f"儲存遊戲狀態時發生錯誤: {e}")
 
 # --- 載入遊戲存檔 ---
+@traced()
 def load_game_state_from_file():
-    global current_level_index, game_state, player1, player2, boss_enemy, effect_manager
+    global game_state, player1, player2, effect_manager
     global laser_wall_sprites, goal_sprites, coop_box_group, spike_trap_group, fruit_sprites
     global meteor_sprites, warning_sprites, boss_group, throwable_objects_group, player_sprites
-    global game_time_elapsed, current_score, final_player_score# Add game_time_elapsed, current_score
 
+    stop_recording() # 載入的存檔不是從關卡開頭玩起，不能錄成重播
     try:
         with open(SAVE_FILE, 'r') as f:
             load_data = json.load(f)
         print(f"從 {SAVE_FILE} 載入遊戲狀態...")
     except FileNotFoundError:
         print(f"存檔 {SAVE_FILE} 未找到。開始新遊戲。")
-        current_level_index = 0
-        game_time_elapsed = 0.0
-        current_score = 0
-        load_level(current_level_index)
+        engine.current_level_index = 0
+        engine.game_time_elapsed = 0.0
+        engine.current_score = 0
+        load_level(engine.current_level_index)
         return
     except Exception as e:
         print(f"載入遊戲狀態時發生錯誤: {e}。開始新遊戲。")
-        current_level_index = 0
-        game_time_elapsed = 0.0
-        current_score = 0
-        load_level(current_level_index)
+        engine.current_level_index = 0
+        engine.game_time_elapsed = 0.0
+        engine.current_score = 0
+        load_level(engine.current_level_index)
         return
 
     laser_wall_sprites.empty()
@@ -1058,15 +680,15 @@ def load_game_state_from_file():
     meteor_sprites.empty()
     warning_sprites.empty()
     boss_group.empty()
-    throwable_objects_group.empty()
-    if boss_enemy and hasattr(boss_enemy, 'projectiles'):
-        boss_enemy.projectiles.empty()
+    clear_throwable_objects()
+    if engine.boss_enemy and hasattr(engine.boss_enemy, 'projectiles'):
+        engine.boss_enemy.projectiles.empty()
 
-    current_level_index = load_data.get("current_level_index", 0)
+    engine.current_level_index = load_data.get("current_level_index", 0)
     saved_game_state_type = load_data.get("game_state_on_save", STATE_PLAYING)
-    game_time_elapsed = load_data.get("game_time_elapsed", 0.0) # Load game time
-    current_score = load_data.get("current_score", 0) # Load score
-    final_player_score = load_data.get("final_player_score", 0)
+    engine.game_time_elapsed = load_data.get("game_time_elapsed", 0.0) # Load game time
+    engine.current_score = load_data.get("current_score", 0) # Load score
+    engine.final_player_score = load_data.get("final_player_score", 0)
 
     effect_manager.reset_all_effects()
     loaded_effects_manager_data = load_data.get("effect_manager", {}).get("effects", {})
@@ -1092,21 +714,21 @@ def load_game_state_from_file():
     if saved_game_state_type == STATE_BOSS_LEVEL:
         # setup_boss_level already resets player positions and some game elements.
         # It also sets game_state to STATE_BOSS_LEVEL.
-        setup_boss_level()
+        setup_boss_level(record=False)
     else:
-        if current_level_index >= len(levels_data):
+        if engine.current_level_index >= len(levels_data):
             print("錯誤：存檔的關卡索引超出範圍。開始新遊戲。")
-            current_level_index = 0
-            game_time_elapsed = 0.0
-            current_score = 0
-            load_level(current_level_index)
+            engine.current_level_index = 0
+            engine.game_time_elapsed = 0.0
+            engine.current_score = 0
+            load_level(engine.current_level_index)
             game_state = original_game_state # Restore UI state if error
             return
         # load_level resets player positions, timer, score, and sets game_state to STATE_PLAYING.
-        load_level(current_level_index)
+        load_level(engine.current_level_index, record=False)
         # After load_level, game_time_elapsed and current_score are reset, so restore them from save.
-        game_time_elapsed = load_data.get("game_time_elapsed", 0.0)
-        current_score = load_data.get("current_score", 0)
+        engine.game_time_elapsed = load_data.get("game_time_elapsed", 0.0)
+        engine.current_score = load_data.get("current_score", 0)
 
 
         coop_box_group.empty() # load_level populates this, so clear before loading saved positions
@@ -1165,40 +787,42 @@ def load_game_state_from_file():
 
     if saved_game_state_type == STATE_BOSS_LEVEL:
         boss_data = load_data.get("boss_level_data")
-        if boss_data and boss_enemy: # boss_enemy should be re-initialized by setup_boss_level
-            boss_enemy.current_health = boss_data.get("boss_current_health", boss_enemy.max_health)
-            if boss_enemy.current_health <= 0:
+        if boss_data and engine.boss_enemy: # boss_enemy should be re-initialized by setup_boss_level
+            engine.boss_enemy.current_health = boss_data.get("boss_current_health", engine.boss_enemy.max_health)
+            if engine.boss_enemy.current_health <= 0:
                 # This state should ideally not be saved, but handle it.
                 game_state = STATE_BOSS_DEFEATED # The game state will be set to this after load
                 boss_group.empty()
             else:
-                boss_enemy.pos = pygame.math.Vector2(boss_data.get("boss_pos_x", SCREEN_WIDTH // 2),
+                engine.boss_enemy.pos = pygame.math.Vector2(boss_data.get("boss_pos_x", SCREEN_WIDTH // 2),
                                                      boss_data.get("boss_pos_y", SCREEN_HEIGHT // 4))
-                boss_enemy.rect.center = boss_enemy.pos
-                boss_enemy.movement_mode = boss_data.get("boss_movement_mode", "simple_four_way")
-                boss_enemy.move_timer = boss_data.get("boss_move_timer", 0)
-                boss_enemy.current_direction = pygame.math.Vector2(boss_data.get("boss_current_direction_x", 0),
+                engine.boss_enemy.rect.center = engine.boss_enemy.pos
+                engine.boss_enemy.movement_mode = boss_data.get("boss_movement_mode", "simple_four_way")
+                engine.boss_enemy.move_timer = boss_data.get("boss_move_timer", 0)
+                engine.boss_enemy.current_direction = pygame.math.Vector2(boss_data.get("boss_current_direction_x", 0),
                                                                    boss_data.get("boss_current_direction_y", 0))
-                boss_enemy.teleport_timer = boss_data.get("boss_teleport_timer", 0)
-                boss_enemy.is_teleporting_warning = boss_data.get("boss_is_teleporting_warning", False)
+                engine.boss_enemy.teleport_timer = boss_data.get("boss_teleport_timer", 0)
+                engine.boss_enemy.is_teleporting_warning = boss_data.get("boss_is_teleporting_warning", False)
                 b_tp_x = boss_data.get("boss_teleport_target_pos_x")
                 b_tp_y = boss_data.get("boss_teleport_target_pos_y")
-                boss_enemy.teleport_target_pos = pygame.math.Vector2(b_tp_x,
+                engine.boss_enemy.teleport_target_pos = pygame.math.Vector2(b_tp_x,
                                                                      b_tp_y) if b_tp_x is not None and b_tp_y is not None else None
-                boss_enemy.attack_timer = boss_data.get("boss_attack_timer", 0)
-                if boss_enemy not in boss_group: boss_group.add(boss_enemy) # Ensure it's added back
+                engine.boss_enemy.attack_timer = boss_data.get("boss_attack_timer", 0)
+                if engine.boss_enemy not in boss_group: boss_group.add(engine.boss_enemy) # Ensure it's added back
 
-        throwable_objects_group.empty() # Clear before loading saved ones
+        clear_throwable_objects() # Clear before loading saved ones
         player1.held_object = None
 
         loaded_throwables_data = load_data.get("throwable_objects", [])
         p1_held_object_data_from_save = p1_data.get("held_object_info")
 
         for obj_data in loaded_throwables_data:
-            new_obj = ThrowableObject(obj_data["pos_x"], obj_data["pos_y"], obj_data.get("spawned_by_player_id", 1)) #
+            # 和遊戲中生成的一樣從 throwable_pool 取（舊存檔沒有形狀，生成者也可能是 None）
+            spawned_by = obj_data.get("spawned_by_player_id")
+            new_obj = throwable_pool.acquire(obj_data["pos_x"], obj_data["pos_y"], 1 if spawned_by is None else spawned_by,
+                                             obj_data.get("detected_shape", "None"))
             new_obj.is_thrown = obj_data.get("is_thrown", False)
-            new_obj.throw_velocity = pygame.math.Vector2(obj_data.get("throw_velocity_x", 0),
-                                                         obj_data.get("throw_velocity_y", 0))
+            new_obj.throw_velocity.update(obj_data.get("throw_velocity_x", 0), obj_data.get("throw_velocity_y", 0))
             throwable_objects_group.add(new_obj)
 
             if p1_held_object_data_from_save and \
@@ -1214,18 +838,44 @@ def load_game_state_from_file():
     player_sprites.add(player1, player2)
 
     game_state = saved_game_state_type # Ensure game_state is finally set to the loaded gameplay state
+    engine.state = game_state
     print("遊戲狀態已載入。")
 
-# --- 繪製排行榜畫面 ---
-def draw_leaderboard_screen(): # MODIFIED
-    global leaderboard_menu_selected_index # Ensure access to the global
-    screen.fill((20, 20, 40))
+# --- 排行榜頭貼（載入一次後快取） ---
+def get_leaderboard_face_image(img_path_from_json, player_label):
+    face_img_surface = None
+    if img_path_from_json:
+        if img_path_from_json in loaded_face_images_cache:
+            face_img_surface = loaded_face_images_cache[img_path_from_json]
+        else:
+            absolute_image_path = os.path.normpath(os.path.join(SCRIPT_DIR, img_path_from_json))
+            if os.path.exists(absolute_image_path):
+                try:
+                    raw_surface = pygame.image.load(absolute_image_path).convert_alpha()
+                    face_img_surface = pygame.transform.scale(raw_surface, LEADERBOARD_FACE_SIZE)
+                    loaded_face_images_cache[img_path_from_json] = face_img_surface
+                except pygame.error as e:
+                    print(f"排行榜載入 {player_label} 影像錯誤 {absolute_image_path}: {e}")
+                    face_img_surface = None
+    if face_img_surface is None:
+        if default_face_image_surface:
+            face_img_surface = default_face_image_surface
+        else:
+            face_img_surface = pygame.Surface(LEADERBOARD_FACE_SIZE, pygame.SRCALPHA)
+            face_img_surface.fill((60, 60, 70, 180))
+            pygame.draw.rect(face_img_surface, (100, 100, 110), (0, 0, *LEADERBOARD_FACE_SIZE), 1)
+    return face_img_surface
+
+# --- 排行榜表格一次畫好（標題、欄位、每一列），load/save 排行榜時才重建 ---
+def build_leaderboard_table_surface():
+    table_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+    table_surface.fill((20, 20, 40))
     title_text = font_large.render("排行榜", True, TEXT_COLOR)
-    screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 10))
+    table_surface.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 10))
 
     if not leaderboard_data:
         no_data_text = font_small.render("尚無紀錄", True, TEXT_COLOR)
-        screen.blit(no_data_text, (SCREEN_WIDTH // 2 - no_data_text.get_width() // 2, SCREEN_HEIGHT // 2))
+        table_surface.blit(no_data_text, (SCREEN_WIDTH // 2 - no_data_text.get_width() // 2, SCREEN_HEIGHT // 2))
     else:
         start_y = 150
         line_height = LEADERBOARD_FACE_SIZE[1] + 20
@@ -1236,15 +886,15 @@ def draw_leaderboard_screen(): # MODIFIED
         face_p2_x = face_p1_x + LEADERBOARD_FACE_SIZE[0] + 10 # Gap between faces
         name_x = face_p2_x + LEADERBOARD_FACE_SIZE[0] + 25
 
-        score_col_width = font_small.render("99/99", True, WHITE).get_width() + 10
-        time_col_width = font_small.render("99:99.99", True, WHITE).get_width() + 20
+        score_col_width = font_small.size("99/99")[0] + 10
+        time_col_width = font_small.size("99:99.99")[0] + 20
 
         score_x = SCREEN_WIDTH - 70 - score_col_width // 2
         time_x = score_x - 30 - time_col_width // 2
-        max_name_width = time_x - (name_x + font_small.render("...", True, WHITE).get_width()) - 20
+        max_name_width = time_x - (name_x + font_small.size("...")[0]) - 20
 
         headers_info = [
-            ("排名", rank_x + font_tiny.render("排名", True, WHITE).get_width() // 2),
+            ("排名", rank_x + font_tiny.size("排名")[0] // 2),
             ("P1", face_p1_x + LEADERBOARD_FACE_SIZE[0] // 2),
             ("P2", face_p2_x + LEADERBOARD_FACE_SIZE[0] // 2),
             ("隊名/玩家名", name_x + max_name_width // 2),
@@ -1253,7 +903,7 @@ def draw_leaderboard_screen(): # MODIFIED
         ]
         for header_text, hx_center in headers_info:
             header_surf = font_tiny.render(header_text, True, WHITE)
-            screen.blit(header_surf, (hx_center - header_surf.get_width() // 2, start_y + header_y_offset))
+            table_surface.blit(header_surf, (hx_center - header_surf.get_width() // 2, start_y + header_y_offset))
 
         for i, entry in enumerate(leaderboard_data):
             if i >= MAX_LEADERBOARD_ENTRIES: break
@@ -1262,73 +912,18 @@ def draw_leaderboard_screen(): # MODIFIED
             y_pos_center_of_row = current_entry_y + LEADERBOARD_FACE_SIZE[1] // 2
 
             rank_text_surf = font_small.render(f"{i + 1}.", True, TEXT_COLOR)
-            screen.blit(rank_text_surf, (rank_x, y_pos_center_of_row - rank_text_surf.get_height() // 2))
-
-            # Display P1 Face
-            img_path_from_json_p1 = entry.get("face_image_path_p1")
-            face_img_surface_p1 = None
-            if img_path_from_json_p1:
-                if img_path_from_json_p1 in loaded_face_images_cache:
-                    face_img_surface_p1 = loaded_face_images_cache[img_path_from_json_p1]
-                else:
-                    absolute_image_path_p1 = os.path.normpath(os.path.join(SCRIPT_DIR, img_path_from_json_p1))
-                    if os.path.exists(absolute_image_path_p1):
-                        try:
-                            raw_surface = pygame.image.load(absolute_image_path_p1).convert_alpha()
-                            face_img_surface_p1 = pygame.transform.scale(raw_surface, LEADERBOARD_FACE_SIZE)
-                            loaded_face_images_cache[img_path_from_json_p1] = face_img_surface_p1
-                        except pygame.error as e:
-                            print(f"排行榜載入 P1 影像錯誤 {absolute_image_path_p1}: {e}")
-                            face_img_surface_p1 = None
-            if face_img_surface_p1 is None:
-                if default_face_image_surface:
-                    face_img_surface_p1 = default_face_image_surface
-                else:
-                    face_img_surface_p1 = pygame.Surface(LEADERBOARD_FACE_SIZE, pygame.SRCALPHA)
-                    face_img_surface_p1.fill((60, 60, 70, 180))
-                    pygame.draw.rect(face_img_surface_p1, (100, 100, 110), (0, 0, *LEADERBOARD_FACE_SIZE), 1)
-
-            screen.blit(face_img_surface_p1, (face_p1_x, current_entry_y))
-
-            # Display P2 Face
-            img_path_from_json_p2 = entry.get("face_image_path_p2")
-            face_img_surface_p2 = None
-            if img_path_from_json_p2:
-                if img_path_from_json_p2 in loaded_face_images_cache:
-                    face_img_surface_p2 = loaded_face_images_cache[img_path_from_json_p2]
-                else:
-                    absolute_image_path_p2 = os.path.normpath(os.path.join(SCRIPT_DIR, img_path_from_json_p2))
-                    if os.path.exists(absolute_image_path_p2):
-                        try:
-                            raw_surface = pygame.image.load(absolute_image_path_p2).convert_alpha()
-                            face_img_surface_p2 = pygame.transform.scale(raw_surface, LEADERBOARD_FACE_SIZE)
-                            loaded_face_images_cache[img_path_from_json_p2] = face_img_surface_p2
-                        except pygame.error as e:
-                            print(f"排行榜載入 P2 影像錯誤 {absolute_image_path_p2}: {e}")
-                            face_img_surface_p2 = None
-            if face_img_surface_p2 is None:
-                if default_face_image_surface:
-                    face_img_surface_p2 = default_face_image_surface
-                else:
-                    face_img_surface_p2 = pygame.Surface(LEADERBOARD_FACE_SIZE, pygame.SRCALPHA)
-                    face_img_surface_p2.fill((60, 60, 70, 180))
-                    pygame.draw.rect(face_img_surface_p2, (100, 100, 110), (0, 0, *LEADERBOARD_FACE_SIZE), 1)
+            table_surface.blit(rank_text_surf, (rank_x, y_pos_center_of_row - rank_text_surf.get_height() // 2))
 
-            screen.blit(face_img_surface_p2, (face_p2_x, current_entry_y))
+            # Display P1 / P2 Faces
+            table_surface.blit(get_leaderboard_face_image(entry.get("face_image_path_p1"), "P1"),
+                               (face_p1_x, current_entry_y))
+            table_surface.blit(get_leaderboard_face_image(entry.get("face_image_path_p2"), "P2"),
+                               (face_p2_x, current_entry_y))
 
             name_str_original = entry.get("name", "N/A") # Team/Entry Name
-            name_text_surf = font_small.render(name_str_original, True, TEXT_COLOR)
-            if name_text_surf.get_width() > max_name_width:
-                temp_name = ""
-                for char_idx in range(len(name_str_original)):
-                    temp_name_check = name_str_original[:char_idx + 1] + "..."
-                    if font_small.render(temp_name_check, True, TEXT_COLOR).get_width() > max_name_width:
-                        name_str_display = name_str_original[:char_idx] + "..."
-                        break
-                else:
-                    name_str_display = name_str_original
-                name_text_surf = font_small.render(name_str_display, True, TEXT_COLOR)
-            screen.blit(name_text_surf, (name_x, y_pos_center_of_row - name_text_surf.get_height() // 2))
+            name_str_display = truncate_text_to_width(font_small, name_str_original, max_name_width)
+            name_text_surf = font_small.render(name_str_display, True, TEXT_COLOR)
+            table_surface.blit(name_text_surf, (name_x, y_pos_center_of_row - name_text_surf.get_height() // 2))
 
             time_val = entry.get("time", float('inf'))
             time_str_display = "N/A"
@@ -1338,14 +933,23 @@ def draw_leaderboard_screen(): # MODIFIED
                 milliseconds = int((time_val * 100) % 100)
                 time_str_display = f"{minutes:02}:{seconds:02}.{milliseconds:02}"
             time_text_surf = font_small.render(time_str_display, True, TEXT_COLOR)
-            screen.blit(time_text_surf, (time_x - time_text_surf.get_width() // 2,
-                                         y_pos_center_of_row - time_text_surf.get_height() // 2))
+            table_surface.blit(time_text_surf, (time_x - time_text_surf.get_width() // 2,
+                                                y_pos_center_of_row - time_text_surf.get_height() // 2))
 
             score_str_display = str(entry.get("score", "0"))
             score_text_surf = font_small.render(score_str_display, True, TEXT_COLOR)
-            screen.blit(score_text_surf, (score_x - score_text_surf.get_width() // 2,
-                                          y_pos_center_of_row - score_text_surf.get_height() // 2))
+            table_surface.blit(score_text_surf, (score_x - score_text_surf.get_width() // 2,
+                                                 y_pos_center_of_row - score_text_surf.get_height() // 2))
+    return table_surface
 
+# --- 繪製排行榜畫面 ---
+def draw_leaderboard_screen(): # MODIFIED
+    global leaderboard_menu_selected_index, leaderboard_table_surface # Ensure access to the global
+    if leaderboard_table_surface is None:
+        leaderboard_table_surface = build_leaderboard_table_surface()
+    screen.blit(leaderboard_table_surface, (0, 0))
+
+    # 只有下方的選項列每幀重畫（選取項目會變）
     option_padding = 50
     total_options_width = 0
     rendered_option_surfaces = []
@@ -1353,7 +957,7 @@ def draw_leaderboard_screen(): # MODIFIED
     for i, (text, action_id) in enumerate(leaderboard_menu_options):
         display_text = text
         color = MENU_SELECTED_OPTION_COLOR if i == leaderboard_menu_selected_index else MENU_OPTION_COLOR
-        option_surf = font_small.render(display_text, True, color)
+        option_surf = text_cache.render(font_small, display_text, True, color)
         rendered_option_surfaces.append(option_surf)
         total_options_width += option_surf.get_width()
         if i < len(leaderboard_menu_options) - 1:
@@ -1376,138 +980,145 @@ def populate_level_select_options():
     level_select_options.append("返回主選單")
 
 # Load the background image for the level select menu
-level_select_background = pygame.image.load(os.path.join('plays_animation_art', 'Background_menu.png')).convert()
-level_select_background = pygame.transform.scale(level_select_background, (SCREEN_WIDTH, SCREEN_HEIGHT))
+level_select_background = asset_registry.get_image(os.path.join('plays_animation_art', 'Background_menu.png'),
+                                                  (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
 
 # --- 畫關卡選擇畫面 ---
 def draw_level_select_menu():
     screen.blit(level_select_background, (0, 0))  # Draw the background image
-    title_text = font_large.render("選擇關卡", True, TEXT_COLOR)
+    title_text = text_cache.render(font_large, "選擇關卡", True, TEXT_COLOR)
     screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 50))
 
     for i, option_text in enumerate(level_select_options):
         color = MENU_SELECTED_OPTION_COLOR if i == level_select_selected_index else MENU_OPTION_COLOR
-        text_surf = font_menu.render(option_text, True, color)
+        text_surf = text_cache.render(font_menu, option_text, True, color)
         text_rect = text_surf.get_rect(center=(SCREEN_WIDTH // 2, 200 + i * 60))
         screen.blit(text_surf, text_rect)
 
 # --- 畫暫停選單 ---
-def draw_pause_menu():
-    # Draw a semi-transparent overlay
+def build_pause_overlay():
     overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
     overlay.fill(PAUSE_OVERLAY_COLOR)
+    return overlay
+
+def draw_pause_menu():
+    # Draw a semi-transparent overlay（只建立一次）
+    overlay = sprite_cache.get(("pause_overlay", SCREEN_WIDTH, SCREEN_HEIGHT, PAUSE_OVERLAY_COLOR), build_pause_overlay)
     screen.blit(overlay, (0, 0))
 
-    title_text = font_large.render("遊戲暫停", True, TEXT_COLOR)
+    title_text = text_cache.render(font_large, "遊戲暫停", True, TEXT_COLOR)
     screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 100))
 
     for i, option_text in enumerate(pause_menu_options):
         color = MENU_SELECTED_OPTION_COLOR if i == pause_menu_selected_index else MENU_OPTION_COLOR
-        text_surf = font_menu.render(option_text, True, color)
+        text_surf = text_cache.render(font_menu, option_text, True, color)
         text_rect = text_surf.get_rect(center=(SCREEN_WIDTH // 2, 250 + i * 70))
         screen.blit(text_surf, text_rect)
 
 # Load the background image for the main menu
-default_menu_background = pygame.image.load(os.path.join('plays_animation_art', 'Background_menu.png')).convert()
-default_menu_background = pygame.transform.scale(default_menu_background, (SCREEN_WIDTH, SCREEN_HEIGHT))
+default_menu_background = asset_registry.get_image(os.path.join('plays_animation_art', 'Background_menu.png'),
+                                                  (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
+
+# --- 畫到 screen 並登記 dirty rect ---
+def blit_dirty(surface, dest):
+    return dirty_renderer.add(screen.blit(surface, dest))
 
 # --- 繪製遊戲狀態訊息 ---
 def draw_game_state_messages():
-    global game_time_elapsed, current_score
-
-    if game_state == STATE_PLAYING and current_level_index == 0:
-        tutorial_text1 = font_tiny.render("移動：玩家1用WASD移動，玩家2用方向鍵移動", True, (255, 255, 0))
-        tutorial_text2 = font_tiny.render("過關目標：兩人都走到各自顏色的終點", True, (255, 255, 0))
-        screen.blit(tutorial_text1, (SCREEN_WIDTH // 2 - tutorial_text1.get_width() // 2, 40))
-        screen.blit(tutorial_text2, (SCREEN_WIDTH // 2 - tutorial_text2.get_width() // 2, 80))
-        tutorial_text3 = font_tiny.render("箱子: 需兩人一起才能被推動", True, (255, 255, 255))
-        screen.blit(tutorial_text3, (SCREEN_WIDTH // 2 - tutorial_text3.get_width() // 2 - 250, 130))
-        tutorial_text4 = font_tiny.render("地刺:縮回時可通過，伸出時碰觸會死亡", True, (255, 255, 255))
-        screen.blit(tutorial_text4, (SCREEN_WIDTH // 2 - tutorial_text4.get_width() // 2 - 250, SCREEN_HEIGHT - 250))
-        tutorial_text5 = font_tiny.render("藍色:牆壁隱形，灰色:操控方向相反", True, (255, 255, 255))
-        screen.blit(tutorial_text5, (SCREEN_WIDTH // 2 - tutorial_text5.get_width() // 2 + 220, SCREEN_HEIGHT - 280))
-        tutorial_text6 = font_tiny.render("紅色:會召喚隕石墜落", True, (255, 255, 255))
-        screen.blit(tutorial_text6, (SCREEN_WIDTH // 2 - tutorial_text5.get_width() // 2 + 220, SCREEN_HEIGHT - 310))
-        tutorial_text7 = font_tiny.render("雷射牆壁:碰觸到會死亡", True, (255, 255, 255))
-        screen.blit(tutorial_text7, (SCREEN_WIDTH // 2 - tutorial_text5.get_width() // 2 + 220, 140))
+
+    if game_state == STATE_PLAYING and engine.current_level_index == 0:
+        tutorial_text1 = text_cache.render(font_tiny, "移動：玩家1用WASD移動，玩家2用方向鍵移動", True, (255, 255, 0))
+        tutorial_text2 = text_cache.render(font_tiny, "過關目標：兩人都走到各自顏色的終點", True, (255, 255, 0))
+        blit_dirty(tutorial_text1, (SCREEN_WIDTH // 2 - tutorial_text1.get_width() // 2, 40))
+        blit_dirty(tutorial_text2, (SCREEN_WIDTH // 2 - tutorial_text2.get_width() // 2, 80))
+        tutorial_text3 = text_cache.render(font_tiny, "箱子: 需兩人一起才能被推動", True, (255, 255, 255))
+        blit_dirty(tutorial_text3, (SCREEN_WIDTH // 2 - tutorial_text3.get_width() // 2 - 250, 130))
+        tutorial_text4 = text_cache.render(font_tiny, "地刺:縮回時可通過，伸出時碰觸會死亡", True, (255, 255, 255))
+        blit_dirty(tutorial_text4, (SCREEN_WIDTH // 2 - tutorial_text4.get_width() // 2 - 250, SCREEN_HEIGHT - 250))
+        tutorial_text5 = text_cache.render(font_tiny, "藍色:牆壁隱形，灰色:操控方向相反", True, (255, 255, 255))
+        blit_dirty(tutorial_text5, (SCREEN_WIDTH // 2 - tutorial_text5.get_width() // 2 + 220, SCREEN_HEIGHT - 280))
+        tutorial_text6 = text_cache.render(font_tiny, "紅色:會召喚隕石墜落", True, (255, 255, 255))
+        blit_dirty(tutorial_text6, (SCREEN_WIDTH // 2 - tutorial_text5.get_width() // 2 + 220, SCREEN_HEIGHT - 310))
+        tutorial_text7 = text_cache.render(font_tiny, "雷射牆壁:碰觸到會死亡", True, (255, 255, 255))
+        blit_dirty(tutorial_text7, (SCREEN_WIDTH // 2 - tutorial_text5.get_width() // 2 + 220, 140))
 
     if game_state == STATE_GAME_OVER:
-        game_over_text = font_large.render("遊戲結束", True, TEXT_COLOR)
-        restart_text = font_small.render("按 R 鍵重新開始", True, TEXT_COLOR)
-        screen.blit(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, SCREEN_HEIGHT // 2 - 60))
-        screen.blit(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, SCREEN_HEIGHT // 2 + 30))
+        game_over_text = text_cache.render(font_large, "遊戲結束", True, TEXT_COLOR)
+        restart_text = text_cache.render(font_small, "按 R 鍵重新開始", True, TEXT_COLOR)
+        blit_dirty(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2, SCREEN_HEIGHT // 2 - 60))
+        blit_dirty(restart_text, (SCREEN_WIDTH // 2 - restart_text.get_width() // 2, SCREEN_HEIGHT // 2 + 30))
     elif game_state == STATE_BOSS_DEFEATED:
-        victory_text = font_large.render("Boss 已擊敗！恭喜！", True, (0, 255, 0))
-        screen.blit(victory_text, (SCREEN_WIDTH // 2 - victory_text.get_width() // 2, 10))
+        victory_text = text_cache.render(font_large, "Boss 已擊敗！恭喜！", True, (0, 255, 0))
+        blit_dirty(victory_text, (SCREEN_WIDTH // 2 - victory_text.get_width() // 2, 10))
         # 顯示提示
-        if boss_defeated_area_rect:
-            prompt_text = font_small.render("兩位玩家請一起走到出口", True, (255, 255, 255))
-            screen.blit(prompt_text, (SCREEN_WIDTH // 2 - prompt_text.get_width() // 2, 100))
+        if engine.boss_defeated_area_rect:
+            prompt_text = text_cache.render(font_small, "兩位玩家請一起走到出口", True, (255, 255, 255))
+            blit_dirty(prompt_text, (SCREEN_WIDTH // 2 - prompt_text.get_width() // 2, 100))
 
     if game_state == STATE_PLAYING:
-        level_text = font_small.render(f"關卡 {current_level_index + 1}", True, TEXT_COLOR) #
-        screen.blit(level_text, (10, 10))
+        level_text = text_cache.render(font_small, f"關卡 {engine.current_level_index + 1}", True, TEXT_COLOR) #
+        blit_dirty(level_text, (10, 10))
 
-        timer_val_str = f"{int(game_time_elapsed // 60):02}:{int(game_time_elapsed % 60):02}" # 格式化為 MM:SS
-        timer_text_surf = font_tiny.render(f"時間: {timer_val_str}", True, TEXT_COLOR)
-        screen.blit(timer_text_surf, (SCREEN_WIDTH - timer_text_surf.get_width() - 10, 10))
+        timer_val_str = f"{int(engine.game_time_elapsed // 60):02}:{int(engine.game_time_elapsed % 60):02}" # 格式化為 MM:SS
+        timer_text_surf = text_cache.render(font_tiny, f"時間: {timer_val_str}", True, TEXT_COLOR)
+        blit_dirty(timer_text_surf, (SCREEN_WIDTH - timer_text_surf.get_width() - 10, 10))
 
-        score_text_surf = font_tiny.render(f"分數: {current_score}/{MAX_TOTAL_SCORE}", True, TEXT_COLOR) #
-        screen.blit(score_text_surf, (SCREEN_WIDTH - score_text_surf.get_width() - 10, 35))
+        score_text_surf = text_cache.render(font_tiny, f"分數: {engine.current_score}/{MAX_TOTAL_SCORE}", True, TEXT_COLOR) #
+        blit_dirty(score_text_surf, (SCREEN_WIDTH - score_text_surf.get_width() - 10, 35))
 
         p1_status_text = "存活" if player1.is_alive else "死亡";
         p2_status_text = "存活" if player2.is_alive else "死亡"
-        p1_text = font_tiny.render(f"玩家1: {p1_status_text}", True, PLAYER1_COLOR)
-        screen.blit(p1_text, (10, 50))
-        p2_text = font_tiny.render(f"玩家2: {p2_status_text}", True, PLAYER2_COLOR)
-        screen.blit(p2_text, (10, 75))
+        p1_text = text_cache.render(font_tiny, f"玩家1: {p1_status_text}", True, PLAYER1_COLOR)
+        blit_dirty(p1_text, (10, 50))
+        p2_text = text_cache.render(font_tiny, f"玩家2: {p2_status_text}", True, PLAYER2_COLOR)
+        blit_dirty(p2_text, (10, 75))
         if (player1.is_alive and not player2.is_alive) or (player2.is_alive and not player1.is_alive):
-            revive_hint = font_tiny.render("請 P1 按住'F' / P2 按住'.' 幫隊友復活", True, REVIVE_PROMPT_COLOR) #
-            screen.blit(revive_hint, (SCREEN_WIDTH // 2 - revive_hint.get_width() // 2, 10))
+            revive_hint = text_cache.render(font_tiny, "請 P1 按住'F' / P2 按住'.' 幫隊友復活", True, REVIVE_PROMPT_COLOR) #
+            blit_dirty(revive_hint, (SCREEN_WIDTH // 2 - revive_hint.get_width() // 2, 10))
         active_effects = effect_manager.get_active_effects_info() #
         y_offset = 100
         for effect_str in active_effects:
-            effect_surf = font_effect.render(effect_str, True, TEXT_COLOR);
-            screen.blit(effect_surf, (10, y_offset));
+            effect_surf = text_cache.render(font_effect, effect_str, True, TEXT_COLOR);
+            blit_dirty(effect_surf, (10, y_offset));
             y_offset += 20
         if player1.is_alive and player2.is_alive and coop_box_group:
             first_box = next(iter(coop_box_group))
             p1_near = player1.pos.distance_to(first_box.pos) < COOP_BOX_PUSH_RADIUS
             p2_near = player2.pos.distance_to(first_box.pos) < COOP_BOX_PUSH_RADIUS #
             if p1_near and p2_near: #
-                push_hint = font_tiny.render("兩人靠近可推箱", True, (225, 210, 80))
-                screen.blit(push_hint, (SCREEN_WIDTH // 2 - push_hint.get_width() // 2, 40))
+                push_hint = text_cache.render(font_tiny, "兩人靠近可推箱", True, (225, 210, 80))
+                blit_dirty(push_hint, (SCREEN_WIDTH // 2 - push_hint.get_width() // 2, 40))
     elif game_state == STATE_BOSS_LEVEL:
-        boss_level_text = font_large.render("!! BOSS BATTLE !!", True, (255, 50, 50))
-        screen.blit(boss_level_text, (SCREEN_WIDTH // 2 - boss_level_text.get_width() // 2, 10))
+        boss_level_text = text_cache.render(font_large, "!! BOSS BATTLE !!", True, (255, 50, 50))
+        blit_dirty(boss_level_text, (SCREEN_WIDTH // 2 - boss_level_text.get_width() // 2, 10))
 
-        timer_val_str = f"{int(game_time_elapsed // 60):02}:{int(game_time_elapsed % 60):02}"
-        timer_text_surf = font_tiny.render(f"時間: {timer_val_str}", True, TEXT_COLOR)
-        screen.blit(timer_text_surf, (SCREEN_WIDTH - timer_text_surf.get_width() - 10, 60))
+        timer_val_str = f"{int(engine.game_time_elapsed // 60):02}:{int(engine.game_time_elapsed % 60):02}"
+        timer_text_surf = text_cache.render(font_tiny, f"時間: {timer_val_str}", True, TEXT_COLOR)
+        blit_dirty(timer_text_surf, (SCREEN_WIDTH - timer_text_surf.get_width() - 10, 60))
 
         p1_status_text = "存活" if player1.is_alive else "死亡"
         p2_status_text = "存活" if player2.is_alive else "死亡"
-        p1_text = font_tiny.render(f"玩家1: {p1_status_text}", True, PLAYER1_COLOR);
-        screen.blit(p1_text, (10, SCREEN_HEIGHT - 80))
-        p2_text = font_tiny.render(f"玩家2: {p2_status_text}", True, PLAYER2_COLOR);
-        screen.blit(p2_text, (10, SCREEN_HEIGHT - 55))
+        p1_text = text_cache.render(font_tiny, f"玩家1: {p1_status_text}", True, PLAYER1_COLOR);
+        blit_dirty(p1_text, (10, SCREEN_HEIGHT - 80))
+        p2_text = text_cache.render(font_tiny, f"玩家2: {p2_status_text}", True, PLAYER2_COLOR);
+        blit_dirty(p2_text, (10, SCREEN_HEIGHT - 55))
         if (player1.is_alive and not player2.is_alive) or (player2.is_alive and not player1.is_alive):
-            revive_hint = font_tiny.render("請 P1 按住'F' / P2 按住'.' 幫隊友復活", True, REVIVE_PROMPT_COLOR)
-            screen.blit(revive_hint, (SCREEN_WIDTH // 2 - revive_hint.get_width() // 2, SCREEN_HEIGHT - 30))
+            revive_hint = text_cache.render(font_tiny, "請 P1 按住'F' / P2 按住'.' 幫隊友復活", True, REVIVE_PROMPT_COLOR)
+            blit_dirty(revive_hint, (SCREEN_WIDTH // 2 - revive_hint.get_width() // 2, SCREEN_HEIGHT - 30))
 
         if player2.is_alive and player2.can_spawn_item_timer > 0:
-            cd_text = font_effect.render(f"P2 物品CD: {player2.can_spawn_item_timer:.1f}s", True, WHITE)
-            screen.blit(cd_text, (SCREEN_WIDTH - cd_text.get_width() - 10, 10))
+            cd_text = text_cache.render(font_effect, f"P2 物品CD: {player2.can_spawn_item_timer:.1f}s", True, WHITE)
+            blit_dirty(cd_text, (SCREEN_WIDTH - cd_text.get_width() - 10, 10))
         elif player2.is_alive:
-            cd_text = font_effect.render(f"P2 按 ; 可造物", True, (100, 255, 100))
-            screen.blit(cd_text, (SCREEN_WIDTH - cd_text.get_width() - 10, 10))
+            cd_text = text_cache.render(font_effect, f"P2 按 ; 可造物", True, (100, 255, 100))
+            blit_dirty(cd_text, (SCREEN_WIDTH - cd_text.get_width() - 10, 10))
 
         if player1.is_alive:
             action_hint_text = "按 G 拾取"
             if player1.held_object:
                 action_hint_text = "按 G 投擲"
-            p1_action_hint = font_effect.render(action_hint_text, True, WHITE)
-            screen.blit(p1_action_hint, (10, SCREEN_HEIGHT - 100))
+            p1_action_hint = text_cache.render(font_effect, action_hint_text, True, WHITE)
+            blit_dirty(p1_action_hint, (10, SCREEN_HEIGHT - 100))
 
 
 # --- 音樂初始化 ---
@@ -1516,10 +1127,12 @@ start_screen_music_played = False
 prompt_text_visible = True
 final_battle_music_started = False
 
-# ---復活設置---
-REVIVE_HOLD_TIME = 1.5
-revive_progress = 0.0
-revive_target = None
+# ---固定頻率模擬---
+simulation_accumulator = 0.0
+interpolation_alpha = 1.0
+pending_action_keys = [] # 這一幀按下、還沒交給 engine.step 的動作鍵
+pending_detected_shape = "None"
+render_interpolator = RenderInterpolator()
 #---初始化--
 #遊戲狀態
 game_state = STATE_START_SCREEN
@@ -1529,11 +1142,32 @@ running = True
 populate_level_select_options() # 選擇關卡菜單內容初始化
 load_leaderboard() # 載入排行綁內容
 start_drawing_thread()# 開啟opencv畫布
+gc_policy.freeze() # 啟動時載入的素材之後不用再被 gc 掃過
+if PROFILE_OUTPUT_PATH:
+    toggle_profiler()
+
+def update_boss_music():
+    """Boss 血量過半時從 BOSS_MUSIC 淡出換成 FINAL_BATTLE_MUSIC（遊戲邏輯在 engine 裡，音樂在這裡切換）。"""
+    global boss_music_playing, final_battle_music_started
+    boss_enemy = engine.boss_enemy
+    if game_state != STATE_BOSS_LEVEL or not boss_enemy:
+        return
+    if boss_enemy.current_health > boss_enemy.max_health / 2:
+        if not boss_music_playing:
+            fade_out_and_switch_music(None, BOSS_MUSIC, fade_duration=0)
+            boss_music_playing = True
+        final_battle_music_started = False
+    elif not final_battle_music_started and boss_enemy.current_health <= boss_enemy.max_health / 2:
+        fade_out_and_switch_music(BOSS_MUSIC, FINAL_BATTLE_MUSIC, fade_duration=2)
+        final_battle_music_started = True
+        boss_music_playing = False
+
 
 # ---遊戲主程式循環---
 
 while running:
-    dt = clock.tick(FPS) / 1000.0
+    dt = clock.tick(RENDER_FPS_LIMIT) / 1000.0 # 這一幀實際經過的時間
+    frame_start = frame_timings.begin_frame() # 效能面板的分段計時從這裡開始（不含 clock.tick 的等待）
     keys = pygame.key.get_pressed()
 
     # --- 儲存 ---
@@ -1543,17 +1177,27 @@ while running:
             show_save_feedback = False
 
     #讀取事件
+    section_start = time.perf_counter_ns()
     for event in pygame.event.get():
         # --- 檢查退出事件 ---
         if event.type == pygame.QUIT:
             running = False
         elif event.type == pygame.USEREVENT + 1: # USEREVENT 應該是 elif，以避免同時是QUIT又是USEREVENT的罕見情況
-            if boss_enemy: boss_enemy.revert_color()
+            if engine.boss_enemy: engine.boss_enemy.revert_color()
 
         # 按鍵事件
         elif event.type == pygame.KEYDOWN:
+            # 選單類畫面只在按鍵後改變，直接整張重畫
+            if game_state not in [STATE_PLAYING, STATE_BOSS_LEVEL, STATE_BOSS_DEFEATED]:
+                dirty_renderer.request_full_redraw()
             # --- 全域熱鍵 ---
-            if event.key == pygame.K_F5:
+            if event.key == pygame.K_F3:
+                perf_overlay.toggle()
+            elif event.key == pygame.K_F4:
+                dump_trace()
+            elif event.key == pygame.K_F6:
+                toggle_profiler()
+            elif event.key == pygame.K_F5:
                 save_game_state() # save_game_state will handle context #
             elif event.key == pygame.K_F9:
                 pygame.mixer.music.stop()
@@ -1573,8 +1217,8 @@ while running:
                     selected_option_text = start_menu_options[start_menu_selected_index]
 
                     if selected_option_text == "開始新遊戲":
-                        current_level_index = 0
-                        load_level(current_level_index)
+                        engine.current_level_index = 0
+                        load_level(engine.current_level_index)
                     elif selected_option_text == "選擇關卡":
                         level_select_selected_index = 0 # Reset selection for level select screen #
                         game_state = STATE_LEVEL_SELECT
@@ -1603,15 +1247,15 @@ while running:
                     if selected_option_text == "返回主選單":
                         game_state = STATE_START_SCREEN
                     elif selected_option_text == "魔王關卡":
-                        game_time_elapsed = 0.0 # Reset timer for boss if selected directly #
-                        current_score = 0 # Reset score if boss selected directly #
+                        engine.game_time_elapsed = 0.0 # Reset timer for boss if selected directly #
+                        engine.current_score = 0 # Reset score if boss selected directly #
                         setup_boss_level()
                     else: # It's "關卡 X" #
                         level_num_str = selected_option_text.split(" ")[1]
                         selected_level_idx = int(level_num_str) - 1
                         if 0 <= selected_level_idx < len(levels_data):
-                            current_level_index = selected_level_idx
-                            load_level(current_level_index)
+                            engine.current_level_index = selected_level_idx
+                            load_level(engine.current_level_index)
                         else: #
                             print(f"無效的選擇關卡索引: {selected_level_idx}")
                             game_state = STATE_START_SCREEN # Fallback #
@@ -1627,12 +1271,12 @@ while running:
                     pygame.mixer.music.pause() # Pause current music #
                 # 如果不是 ESCAPE，且當前是 BOSS 關卡，則處理 BOSS 關卡的特定按鍵
                 elif game_state == STATE_BOSS_LEVEL: # Boss specific actions # # 再次檢查 game_state 因為可能已被改成 PAUSED
+                    # 動作鍵交給下一個模擬步驟處理（engine.step 的 InputState.pressed）
                     if event.key == ACTION_KEY_P1:
-                        player1.handle_action_key(throwable_objects_group)
+                        pending_action_keys.append(event.key)
                     elif event.key == DRAW_ITEM_KEY_P2:
-                        target_spawn_pos = player1.pos if player1.is_alive else pygame.math.Vector2(
-                            ITEM_SPAWN_POS_DEFAULT)
-                        player2.handle_draw_item_key(throwable_objects_group, target_spawn_pos,get_shape_from_queue())
+                        pending_action_keys.append(event.key)
+                        pending_detected_shape = get_shape_from_queue()
 
             # --- 暫停狀態畫面 ---
             elif game_state == STATE_PAUSED: # NEW: Event handling for pause menu #
@@ -1648,9 +1292,9 @@ while running:
                     elif "重新開始關卡" in selected_action: # Restart Level #
                         pygame.mixer.music.unpause()
                         if state_before_pause == STATE_PLAYING:
-                            load_level(current_level_index)
+                            load_level(engine.current_level_index)
                         elif state_before_pause == STATE_BOSS_LEVEL:
-                            game_time_elapsed = 0.0 # Reset timer if restarting boss from pause #
+                            engine.game_time_elapsed = 0.0 # Reset timer if restarting boss from pause #
                             setup_boss_level()
                     elif "儲存遊戲" in selected_action: # Save Game #
                         save_game_state()
@@ -1660,8 +1304,8 @@ while running:
                         pygame.mixer.music.stop()
                         load_game_state_from_file()
                     elif "回到主選單" in selected_action: # Back to Main Menu #
-
-                        final_player_score = 0
+                        stop_recording()
+                        engine.final_player_score = 0
                         pygame.mixer.music.unpause()
                         game_state = STATE_START_SCREEN
                     elif "離開遊戲" in selected_action: # Quit #
@@ -1673,7 +1317,7 @@ while running:
                 elif event.key == pygame.K_r and "重新開始關卡 (R)" in pause_menu_options[pause_menu_selected_index]: #
                     pygame.mixer.music.unpause()
                     if state_before_pause == STATE_PLAYING:
-                        load_level(current_level_index)
+                        load_level(engine.current_level_index)
                     elif state_before_pause == STATE_BOSS_LEVEL:
                         setup_boss_level()
                 elif event.key == pygame.K_F5 and "儲存遊戲 (F5)" in pause_menu_options[pause_menu_selected_index]:
@@ -1690,9 +1334,9 @@ while running:
             # --- 遊戲結束死亡畫面 ---
             elif game_state == STATE_GAME_OVER: # Simpler game over, only R to restart all #
                 if event.key == pygame.K_r:
-                    current_level_index = 0
-                    final_player_score = 0
-                    load_level(current_level_index)
+                    engine.current_level_index = 0
+                    engine.final_player_score = 0
+                    load_level(engine.current_level_index)
 
             # --- 是否拍攝照片狀態畫面 ---
             elif game_state == STATE_ASK_CAMERA:
@@ -1707,7 +1351,7 @@ while running:
                     current_capture_player_index = 0 # Start with P1 #
                     photo_taken_for_current_player_flag = False
                 elif event.key == pygame.K_n:
-                    add_leaderboard_entry("Anonymous", final_game_time, final_player_score, None,
+                    add_leaderboard_entry("Anonymous", engine.final_game_time, engine.final_player_score, None,
                                           None) # Add with no photos #
                     save_leaderboard()
                     leaderboard_menu_selected_index = 0
@@ -1746,7 +1390,7 @@ while running:
                         post_capture_prompt_active = True # Go to prompt #
                     elif event.key == pygame.K_q: # Quit entire capture to leaderboard #
                         release_camera_resources()
-                        add_leaderboard_entry(current_player_name, final_game_time, final_player_score,
+                        add_leaderboard_entry(current_player_name, engine.final_game_time, engine.final_player_score,
                                               captured_face_image_path_p1, captured_face_image_path_p2)
                         save_leaderboard()
                         leaderboard_menu_selected_index = 0 # Reset selection
@@ -1763,7 +1407,7 @@ while running:
                             photo_taken_for_current_player_flag = False
                             if not cap or not cap.isOpened(): initialize_camera_for_capture()
                         elif event.key == pygame.K_f: # Finish (save with P1 only, P2 skipped) #
-                            add_leaderboard_entry(current_player_name, final_game_time, final_player_score,
+                            add_leaderboard_entry(current_player_name, engine.final_game_time, engine.final_player_score,
                                                   captured_face_image_path_p1, None)
                             save_leaderboard()
                             release_camera_resources()
@@ -1779,7 +1423,7 @@ while running:
                             post_capture_prompt_active = True # Stay in prompt mode, but for P1 #
                             photo_taken_for_current_player_flag = True # P1's previous status #
                         elif event.key == pygame.K_f: # Finish (save with P1 and P2 photos) #
-                            add_leaderboard_entry(current_player_name, final_game_time, final_player_score,
+                            add_leaderboard_entry(current_player_name, engine.final_game_time, engine.final_player_score,
                                                   captured_face_image_path_p1, captured_face_image_path_p2)
                             save_leaderboard()
                             release_camera_resources()
@@ -1797,9 +1441,9 @@ while running:
                     selected_action_id = leaderboard_menu_options[leaderboard_menu_selected_index][1]
 
                     if selected_action_id == "RESTART":
-                        current_level_index = 0
-                        game_time_elapsed = 0.0
-                        current_score = 0
+                        engine.current_level_index = 0
+                        engine.game_time_elapsed = 0.0
+                        engine.current_score = 0
                         # load_leaderboard() #
                         current_player_name = ""
                         captured_face_image_path_p1 = None
@@ -1809,7 +1453,7 @@ while running:
                         post_capture_prompt_active = False
                         current_capture_player_index = 0
                         photo_taken_for_current_player_flag = False
-                        load_level(current_level_index) # This will set game_state to STATE_PLAYING
+                        load_level(engine.current_level_index) # This will set game_state to STATE_PLAYING
                     elif selected_action_id == "MAIN_MENU":
                         game_state = STATE_START_SCREEN
                         start_menu_selected_index = 0 # Reset start menu selection
@@ -1819,273 +1463,40 @@ while running:
                     game_state = STATE_START_SCREEN
                     start_menu_selected_index = 0
 
+    frame_timings.lap("events", section_start)
 
-                    # Game logic updates (should not run if paused)
-    if game_state == STATE_PLAYING:
-        game_time_elapsed += dt
-        effect_manager.update(dt)
-        player1.update_movement(laser_wall_sprites, coop_box_group, spike_trap_group, meteor_sprites, effect_manager,
-                                dt)
-        player2.update_movement(laser_wall_sprites, coop_box_group, spike_trap_group, meteor_sprites, effect_manager,
-                                dt)
-
-        for player in player_sprites:
-            if player.is_alive:
-                collided_fruits = pygame.sprite.spritecollide(player, fruit_sprites, True)
-                for fruit in collided_fruits:
-
-                    if current_score < MAX_TOTAL_SCORE:
-                            current_score += SCORE_FRUIT_VALUE
-
-                    effect_manager.apply_effect(fruit.fruit_type, player.player_id)
-
-        if effect_manager.should_spawn_meteor():
-            spawn_x = random.randint(METEOR_SIZE, SCREEN_WIDTH - METEOR_SIZE)
-            spawn_y = random.randint(METEOR_SIZE, SCREEN_HEIGHT - METEOR_SIZE)
-            warning_sprites.add(Warning(spawn_x, spawn_y, METEOR_WARNING_TIME))
-            effect_manager.reset_meteor_timer()
-        for warning in list(warning_sprites):
-            if warning.update(dt): meteor_sprites.add(Meteor(warning.spawn_pos[0], warning.spawn_pos[1]))
-        warning_sprites.update(dt)
-        meteor_sprites.update(dt)
-
-        # 箱子推動判斷
-        if player1.is_alive and player2.is_alive:
-            for coop_box in coop_box_group:
-                p1_near = player1.pos.distance_to(coop_box.pos) < COOP_BOX_PUSH_RADIUS
-                p2_near = player2.pos.distance_to(coop_box.pos) < COOP_BOX_PUSH_RADIUS
-                if p1_near and p2_near:
-                    total_dir = pygame.math.Vector2(0, 0)
-                    if keys[player1.control_keys['right']]: total_dir.x += 1;
-                    if keys[player1.control_keys['left']]: total_dir.x -= 1
-                    if keys[player1.control_keys['down']]: total_dir.y += 1
-                    if keys[player1.control_keys['up']]: total_dir.y -= 1
-                    if keys[player2.control_keys['right']]: total_dir.x += 1
-                    if keys[player2.control_keys['left']]: total_dir.x -= 1
-                    if keys[player2.control_keys['down']]: total_dir.y += 1
-                    if keys[player2.control_keys['up']]: total_dir.y -= 1
-                    if total_dir.length_squared() > 0: total_dir.normalize_ip(); coop_box.move(total_dir,laser_wall_sprites)
-        # 鎖鏈拉扯判斷
-        for _ in range(CHAIN_ITERATIONS):
-            if player1.is_alive and player2.is_alive:
-                p1_pos_vec = player1.pos
-                p2_pos_vec = player2.pos
-                delta = p2_pos_vec - p1_pos_vec
-                distance = delta.length()
-                if distance > CHAIN_MAX_LENGTH and distance != 0:
-                    diff = (distance - CHAIN_MAX_LENGTH) / distance
-                    p1_new_pos = player1.pos + delta * 0.5 * diff
-                    p2_new_pos = player2.pos - delta * 0.5 * diff
-                    player1.pos.x = max(player1.rect.width // 2,
-                                        min(p1_new_pos.x, SCREEN_WIDTH - player1.rect.width // 2))
-                    player1.pos.y = max(player1.rect.height // 2,
-                                        min(p1_new_pos.y, SCREEN_HEIGHT - player1.rect.height // 2))
-                    player2.pos.x = max(player2.rect.width // 2,
-                                        min(p2_new_pos.x, SCREEN_WIDTH - player2.rect.width // 2))
-                    player2.pos.y = max(player2.rect.height // 2,
-                                        min(p2_new_pos.y, SCREEN_HEIGHT - player2.rect.height // 2))
-                    player1.rect.center = player1.pos
-                    player2.rect.center = player2.pos
-            elif player1.is_alive and not player2.is_alive and player2.death_pos:
-                delta = player2.death_pos - player1.pos
-                distance = delta.length()
-                if distance > CHAIN_MAX_LENGTH and distance != 0:
-                    diff_factor = (distance - CHAIN_MAX_LENGTH) / distance
-                    p1_new_pos = player1.pos + delta * diff_factor
-                    player1.pos.x = max(player1.rect.width // 2,
-                                        min(p1_new_pos.x, SCREEN_WIDTH - player1.rect.width // 2))
-                    player1.pos.y = max(player1.rect.height // 2,
-                                        min(p1_new_pos.y, SCREEN_HEIGHT - player1.rect.height // 2))
-                    player1.rect.center = player1.pos
-            elif player2.is_alive and not player1.is_alive and player1.death_pos:
-                delta = player1.death_pos - player2.pos
-                distance = delta.length()
-                if distance > CHAIN_MAX_LENGTH and distance != 0:
-                    diff_factor = (distance - CHAIN_MAX_LENGTH) / distance
-                    p2_new_pos = player2.pos + delta * diff_factor
-                    player2.pos.x = max(player2.rect.width // 2,
-                                        min(p2_new_pos.x, SCREEN_WIDTH - player2.rect.width // 2))
-                    player2.pos.y = max(player2.rect.height // 2,
-                                        min(p2_new_pos.y, SCREEN_HEIGHT - player2.rect.height // 2))
-                    player2.rect.center = player2.pos
-
-        #過關判斷
-        goal1.update_status(player1)
-        goal2.update_status(player2)
-        if goal1.is_active and goal2.is_active and player1.is_alive and player2.is_alive:
-            current_level_index += 1
-            # 關卡過關時累加分數
-            final_player_score += current_score
-            load_level(current_level_index) # This might change game_state to STATE_BOSS_LEVEL
-        if not player1.is_alive and not player2.is_alive: game_state = STATE_GAME_OVER
-
-    # Boss 關卡畫面判斷
-    elif game_state == STATE_BOSS_LEVEL:
-        game_time_elapsed += dt
-        player1.update_movement(None, None, None, None, effect_manager, dt, boss_enemy, boss_enemy.projectiles,
-                                throwable_objects_group)
-        player2.update_movement(None, None, None, None, effect_manager, dt, boss_enemy, boss_enemy.projectiles,
-                                throwable_objects_group)
-        player1.update_boss_interactions(dt)
-        player2.update_boss_interactions(dt)
-
-        if boss_enemy:
-            if boss_enemy.current_health > boss_enemy.max_health / 2:
-                if not boss_music_playing:
-                    fade_out_and_switch_music(None, BOSS_MUSIC, fade_duration=0)
-                    boss_music_playing = True
-                final_battle_music_started = False
-            elif not final_battle_music_started and boss_enemy.current_health <= boss_enemy.max_health / 2:
-                fade_out_and_switch_music(BOSS_MUSIC, FINAL_BATTLE_MUSIC, fade_duration=2)
-                final_battle_music_started = True
-                boss_music_playing = False
-
-            boss_enemy.update(dt, player_sprites, SCREEN_WIDTH, SCREEN_HEIGHT)
-            for obj in throwable_objects_group:
-                if obj.is_thrown and boss_enemy.rect.colliderect(obj.rect):
-                    boss_enemy.take_damage(obj.damage)
-                    obj.kill()
-                    if boss_enemy.current_health <= 0:
-                        # Game state transition to ASK_CAMERA will be handled below
-                        break
-            if boss_enemy.current_health <= 0:
-                final_game_time = game_time_elapsed
-                 # Use current_score from regular levels as boss doesn't have separate scoring
-
-                boss_group.empty()
-                throwable_objects_group.empty()
-                if boss_enemy and hasattr(boss_enemy, 'projectiles'): boss_enemy.projectiles.empty()
-
-                pygame.mixer.music.stop()
-                leaderboard_menu_selected_index = 0
-                # 產生 Boss 被擊敗後的正方形區域
-                boss_defeated_area_size = 120
-                boss_defeated_area_rect = pygame.Rect(0, 0, boss_defeated_area_size, boss_defeated_area_size)
-                boss_defeated_area_rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-                # 進入 boss_defeated_area_rect 狀態時所有死亡的 player 都會復活
-                if not player1.is_alive:
-                    player1.is_alive = True
-                    player1.revive() if hasattr(player1, 'revive') else None
-                if not player2.is_alive:
-                    player2.is_alive = True
-                    player2.revive() if hasattr(player2, 'revive') else None
-                game_state = STATE_BOSS_DEFEATED
-            elif not player1.is_alive and not player2.is_alive:
-                game_state = STATE_GAME_OVER
-
-        throwable_objects_group.update(dt)
-        if player1.held_object: player1.held_object.update(dt, player1.pos, player1.facing_left)
-
-        for _ in range(CHAIN_ITERATIONS): # Chain logic for boss level
-            if player1.is_alive and player2.is_alive:
-                p1_pos_vec = player1.pos
-                p2_pos_vec = player2.pos
-                delta = p2_pos_vec - p1_pos_vec
-                distance = delta.length()
-                if distance > CHAIN_MAX_LENGTH and distance != 0:
-                    diff = (distance - CHAIN_MAX_LENGTH) / distance
-                    p1_new_pos = player1.pos + delta * 0.5 * diff
-                    p2_new_pos = player2.pos - delta * 0.5 * diff
-                    player1.pos.x = max(player1.rect.width // 2,
-                                        min(p1_new_pos.x, SCREEN_WIDTH - player1.rect.width // 2))
-                    player1.pos.y = max(player1.rect.height // 2,
-                                        min(p1_new_pos.y, SCREEN_HEIGHT - player1.rect.height // 2))
-                    player2.pos.x = max(player2.rect.width // 2,
-                                        min(p2_new_pos.x, SCREEN_WIDTH - player2.rect.width // 2))
-                    player2.pos.y = max(player2.rect.height // 2,
-                                        min(p2_new_pos.y, SCREEN_HEIGHT - player2.rect.height // 2))
-                    player1.rect.center = player1.pos
-                    player2.rect.center = player2.pos
-            elif player1.is_alive and not player2.is_alive and player2.death_pos:
-                delta = player2.death_pos - player1.pos
-                distance = delta.length()
-                if distance > CHAIN_MAX_LENGTH and distance != 0:
-                    diff_factor = (distance - CHAIN_MAX_LENGTH) / distance
-                    p1_new_pos = player1.pos + delta * diff_factor
-                    player1.pos.x = max(player1.rect.width // 2,
-                                        min(p1_new_pos.x, SCREEN_WIDTH - player1.rect.width // 2))
-                    player1.pos.y = max(player1.rect.height // 2,
-                                        min(p1_new_pos.y, SCREEN_HEIGHT - player1.rect.height // 2))
-                    player1.rect.center = player1.pos
-            elif player2.is_alive and not player1.is_alive and player1.death_pos:
-                delta = player1.death_pos - player2.pos
-                distance = delta.length()
-                if distance > CHAIN_MAX_LENGTH and distance != 0:
-                    diff_factor = (distance - CHAIN_MAX_LENGTH) / distance
-                    p2_new_pos = player2.pos + delta * diff_factor
-                    player2.pos.x = max(player2.rect.width // 2,
-                                        min(p2_new_pos.x, SCREEN_WIDTH - player2.rect.width // 2))
-                    player2.pos.y = max(player2.rect.height // 2,
-                                        min(p2_new_pos.y, SCREEN_HEIGHT - player2.rect.height // 2))
-                    player2.rect.center = player2.pos
-
-    # Boss 被擊敗過場
-    elif game_state == STATE_BOSS_DEFEATED:
-        # 玩家可自由移動，並檢查兩位玩家是否都在 boss_defeated_area_rect 上
-        player1.update_movement(None, None, None, None, effect_manager, dt)
-        player2.update_movement(None, None, None, None, effect_manager, dt)
-        for _ in range(CHAIN_ITERATIONS):
-            if player1.is_alive and player2.is_alive:
-                p1_pos_vec = player1.pos
-                p2_pos_vec = player2.pos
-                delta = p2_pos_vec - p1_pos_vec
-                distance = delta.length()
-                if distance > CHAIN_MAX_LENGTH and distance != 0:
-                    diff = (distance - CHAIN_MAX_LENGTH) / distance
-                    p1_new_pos = player1.pos + delta * 0.5 * diff
-                    p2_new_pos = player2.pos - delta * 0.5 * diff
-                    player1.pos.x = max(player1.rect.width // 2,
-                                        min(p1_new_pos.x, SCREEN_WIDTH - player1.rect.width // 2))
-                    player1.pos.y = max(player1.rect.height // 2,
-                                        min(p1_new_pos.y, SCREEN_HEIGHT - player1.rect.height // 2))
-                    player2.pos.x = max(player2.rect.width // 2,
-                                        min(p2_new_pos.x, SCREEN_WIDTH - player2.rect.width // 2))
-                    player2.pos.y = max(player2.rect.height // 2,
-                                        min(p2_new_pos.y, SCREEN_HEIGHT - player2.rect.height // 2))
-                    player1.rect.center = player1.pos
-                    player2.rect.center = player2.pos
-            elif player1.is_alive and not player2.is_alive and player2.death_pos:
-                delta = player2.death_pos - player1.pos
-                distance = delta.length()
-                if distance > CHAIN_MAX_LENGTH and distance != 0:
-                    diff_factor = (distance - CHAIN_MAX_LENGTH) / distance
-                    p1_new_pos = player1.pos + delta * diff_factor
-                    player1.pos.x = max(player1.rect.width // 2,
-                                        min(p1_new_pos.x, SCREEN_WIDTH - player1.rect.width // 2))
-                    player1.pos.y = max(player1.rect.height // 2,
-                                        min(p1_new_pos.y, SCREEN_HEIGHT - player1.rect.height // 2))
-                    player1.rect.center = player1.pos
-            elif player2.is_alive and not player1.is_alive and player1.death_pos:
-                delta = player1.death_pos - player2.pos
-                distance = delta.length()
-                if distance > CHAIN_MAX_LENGTH and distance != 0:
-                    diff_factor = (distance - CHAIN_MAX_LENGTH) / distance
-                    p2_new_pos = player2.pos + delta * diff_factor
-                    player2.pos.x = max(player2.rect.width // 2,
-                                        min(p2_new_pos.x, SCREEN_WIDTH - player2.rect.width // 2))
-                    player2.pos.y = max(player2.rect.height // 2,
-                                        min(p2_new_pos.y, SCREEN_HEIGHT - player2.rect.height // 2))
-                    player2.rect.center = player2.pos
-
-        if boss_defeated_area_rect:
-            p1_in = player1.rect.colliderect(boss_defeated_area_rect)
-            p2_in = player2.rect.colliderect(boss_defeated_area_rect)
-            if p2_in:
-                img = pygame.transform.scale(button_blue_down_img, (boss_defeated_area_rect.width, boss_defeated_area_rect.height))
-            else:
-                img = pygame.transform.scale(button_blue_up_img, (boss_defeated_area_rect.width, boss_defeated_area_rect.height))
-            screen.blit(img, boss_defeated_area_rect.topleft)
-            pygame.draw.rect(screen, (255, 255, 255), boss_defeated_area_rect, 4)
-        player_sprites.draw(screen)
-
-        if boss_defeated_area_rect:
-            p1_in = player1.rect.colliderect(boss_defeated_area_rect)
-            p2_in = player2.rect.colliderect(boss_defeated_area_rect)
-            if p1_in and p2_in:
-                game_state = STATE_ASK_CAMERA
+    # --- 固定頻率的遊戲邏輯：依經過的時間跑 0~MAX_SIMULATION_STEPS 步，每步都是 SIMULATION_DT ---
+    simulation_start = time.perf_counter_ns()
+    simulation_accumulator += dt
+    simulation_steps = 0
+    while simulation_accumulator >= SIMULATION_DT:
+        if simulation_steps >= MAX_SIMULATION_STEPS:
+            simulation_accumulator = 0.0 # 卡太久時丟掉追不上的時間，不要越追越慢
+            break
+        render_interpolator.capture(player_sprites, boss_group, throwable_objects_group, coop_box_group)
+        # 選單、暫停時 engine 不動（engine.state 停在進入選單前的遊戲狀態）
+        if game_state in [STATE_PLAYING, STATE_BOSS_LEVEL, STATE_BOSS_DEFEATED]:
+            input_state = InputState.from_keys(keys, engine.input_keys, pending_action_keys, pending_detected_shape)
+            if replay_recorder is not None:
+                replay_recorder.record(input_state)
+            step_start = time.perf_counter_ns()
+            engine.step(input_state, SIMULATION_DT)
+            span_trace.record("GameEngine.step", step_start)
+            game_state = engine.state
+            pending_action_keys = []
+            pending_detected_shape = "None"
+        simulation_accumulator -= SIMULATION_DT
+        simulation_steps += 1
+    update_boss_music()
+    span_trace.record("simulation", simulation_start)
+    # 離開遊戲畫面（遊戲結束、過場、回到選單）時結束錄製；暫停不算
+    if replay_recorder is not None and game_state not in [STATE_PLAYING, STATE_BOSS_LEVEL, STATE_BOSS_DEFEATED, STATE_PAUSED]:
+        stop_recording()
+    # 畫面位於上一步和這一步之間的比例
+    interpolation_alpha = simulation_accumulator / SIMULATION_DT
 
     # 拍照輸入名稱
-    elif game_state == STATE_CAMERA_INPUT:
+    if game_state == STATE_CAMERA_INPUT:
         if camera_capture_active and not player_name_input_active and not post_capture_prompt_active:
             process_camera_frame()
 
@@ -2093,8 +1504,9 @@ while running:
     # --- 音樂播放控制 ---
     if game_state == STATE_START_SCREEN and last_game_state != STATE_START_SCREEN:
         if not start_screen_music_played :
-            pygame.mixer.music.load('game_music/xDeviruchi - The Final of The Fantasy.wav')
-            pygame.mixer.music.play(-1)
+            with span_trace.span("music.load"):
+                pygame.mixer.music.load('game_music/xDeviruchi - The Final of The Fantasy.wav')
+                pygame.mixer.music.play(-1)
             start_screen_music_played = True
     elif game_state != STATE_START_SCREEN and last_game_state == STATE_START_SCREEN:
         start_screen_music_played = False # Allow it to restart if we return to start screen
@@ -2102,66 +1514,71 @@ while running:
     last_game_state = game_state
 
     # --- 整體畫面繪製 ---
-    screen.fill(BLACK)
-    # --- 平鋪 floor.png 作為背景 ---
+    render_start = time.perf_counter_ns()
+    # 狀態或背景層改變時 dirty rect 模式會退回整張 flip
+    dirty_renderer.begin_frame((game_state, static_background.rebuild_count))
+    # 玩家、Boss、可投擲物、箱子暫時移到上一步和這一步之間的位置，畫完後再還原
+    render_interpolator.apply(interpolation_alpha)
+    section_start = time.perf_counter_ns()
+    # --- 預先合成的地板 + 雷射牆背景層（整張覆蓋畫面，不需要先 fill；牆壁透明度改變時登記牆壁範圍） ---
     if (
-        (game_state == STATE_PLAYING and current_level_index in [0, 1, 2]) or
+        (game_state == STATE_PLAYING and engine.current_level_index in [0, 1, 2]) or
         game_state == STATE_BOSS_LEVEL or
         game_state == STATE_BOSS_DEFEATED or
         (game_state == STATE_PAUSED and state_before_pause in [STATE_PLAYING, STATE_BOSS_LEVEL, STATE_BOSS_DEFEATED])
     ):
-        for y in range(0, SCREEN_HEIGHT, floor_tile_height):
-            for x in range(0, SCREEN_WIDTH, floor_tile_width):
-                screen.blit(floor_tile, (x, y))
+        dirty_renderer.add(static_background.draw(screen, effect_manager.get_laser_wall_alpha()))
+    else:
+        screen.fill(BLACK)
+    section_start = frame_timings.lap("background", section_start)
 
     if game_state == STATE_PLAYING or (game_state == STATE_PAUSED and state_before_pause == STATE_PLAYING):
-        current_lw_alpha = effect_manager.get_laser_wall_alpha()
-        for wall_sprite in laser_wall_sprites:
-            if hasattr(wall_sprite, 'update_visuals'): wall_sprite.update_visuals(current_lw_alpha)
-        laser_wall_sprites.draw(screen)
-        for goal_sprite in goal_sprites: goal_sprite.draw(screen)
-        for coop_box_item in coop_box_group: coop_box_item.draw(screen)
+        for goal_sprite in goal_sprites: dirty_renderer.add(goal_sprite.draw(screen))
+        for coop_box_item in coop_box_group: dirty_renderer.add(coop_box_item.draw(screen))
         for spike in spike_trap_group:
-            spike.update(dt)
-            spike.draw(screen)
+            dirty_renderer.add(spike.draw(screen))
         fruit_sprites.draw(screen)
         warning_sprites.draw(screen)
         meteor_sprites.draw(screen)
         player_sprites.draw(screen)
+        for group in (fruit_sprites, warning_sprites, meteor_sprites, player_sprites):
+            dirty_renderer.add_sprites(group)
 
     # BOSS 關卡畫面繪製
     elif game_state == STATE_BOSS_LEVEL or (game_state == STATE_PAUSED and state_before_pause == STATE_BOSS_LEVEL):
-        if boss_enemy:
-            boss_enemy.draw(screen)
+        if engine.boss_enemy:
+            dirty_renderer.add(engine.boss_enemy.draw(screen))
         throwable_objects_group.draw(screen)
         if player1.held_object:
             player1.held_object.draw(screen)
-        if boss_enemy and hasattr(boss_enemy, 'projectiles'): boss_enemy.projectiles.draw(screen) # Draw projectiles #
+            dirty_renderer.add(player1.held_object.rect)
+        if engine.boss_enemy and hasattr(engine.boss_enemy, 'projectiles'):
+            dirty_renderer.add(engine.boss_enemy.projectiles.draw(screen, interpolation_alpha)) # 一次 blits() 畫出全部子彈
         player_sprites.draw(screen)
+        dirty_renderer.add_sprites(throwable_objects_group)
+        dirty_renderer.add_sprites(player_sprites)
 
     # 新增：在 BOSS_DEFEATED 狀態下繪製正方形區域
     if game_state == STATE_BOSS_DEFEATED:
-        if boss_defeated_area_rect:
-            # 根據 player2 是否在終點區域決定顯示的圖像
-            p2_in = player2.rect.colliderect(boss_defeated_area_rect)
-            img = pygame.transform.scale(floor_ladder_img, (boss_defeated_area_rect.width, boss_defeated_area_rect.height))
-            screen.blit(img, boss_defeated_area_rect.topleft)
-            pygame.draw.rect(screen, (255, 255, 255), boss_defeated_area_rect, 4)
+        # 出口梯子已合成在 static_background 裡
         player_sprites.draw(screen)
+        dirty_renderer.add_sprites(player_sprites)
+    section_start = frame_timings.lap("sprites", section_start)
 
     if game_state in [STATE_PLAYING, STATE_BOSS_LEVEL, STATE_GAME_OVER, STATE_BOSS_DEFEATED] or \
             (game_state == STATE_PAUSED and state_before_pause in [STATE_PLAYING, STATE_BOSS_LEVEL]):
         draw_game_state_messages()
+    frame_timings.lap("hud", section_start)
 
     if game_state == STATE_START_SCREEN:
         screen.blit(default_menu_background, (0, 0))  # Draw the background image
-        title_text = font_large.render("遺跡雙生", True, TEXT_COLOR);
+        title_text = text_cache.render(font_large, "遺跡雙生", True, TEXT_COLOR);
         screen.blit(title_text,
                     (SCREEN_WIDTH // 2 - title_text.get_width() // 2, SCREEN_HEIGHT // 4 - 30)) # Adjusted Y #
 
         for i, option_text in enumerate(start_menu_options):
             color = MENU_SELECTED_OPTION_COLOR if i == start_menu_selected_index else MENU_OPTION_COLOR
-            text_surf = font_menu.render(option_text, True, color)
+            text_surf = text_cache.render(font_menu, option_text, True, color)
             menu_height = len(start_menu_options) * 70
             base_y = SCREEN_HEIGHT // 2 - menu_height // 2 + 100
             text_rect = text_surf.get_rect(center=(SCREEN_WIDTH // 2, base_y + i * 70))
@@ -2177,18 +1594,18 @@ while running:
 
     # 拍照提示文字
     elif game_state == STATE_ASK_CAMERA:
-        ask_text = font_small.render("啟用攝影機擷取頭像? (Y / N)", True, TEXT_COLOR)
+        ask_text = text_cache.render(font_small, "啟用攝影機擷取頭像? (Y / N)", True, TEXT_COLOR)
         screen.blit(ask_text, (SCREEN_WIDTH // 2 - ask_text.get_width() // 2, SCREEN_HEIGHT // 2 - 20))
 
     # 拍照提示文字
     elif game_state == STATE_CAMERA_INPUT:
         base_y_offset = SCREEN_HEIGHT // 2 - 200
         if player_name_input_active:
-            name_prompt_text = font_small.render("請輸入隊伍/玩家名 (Enter 確認):", True, TEXT_COLOR)
+            name_prompt_text = text_cache.render(font_small, "請輸入隊伍/玩家名 (Enter 確認):", True, TEXT_COLOR)
             screen.blit(name_prompt_text, (SCREEN_WIDTH // 2 - name_prompt_text.get_width() // 2, base_y_offset))
             name_field_rect = pygame.Rect(SCREEN_WIDTH // 2 - 150, base_y_offset + 40, 300, 40)
             pygame.draw.rect(screen, WHITE, name_field_rect, 2)
-            name_input_surf = font_small.render(current_player_name, True, WHITE)
+            name_input_surf = text_cache.render(font_small, current_player_name, True, WHITE)
             screen.blit(name_input_surf, (name_field_rect.x + 5, name_field_rect.y + (
                         name_field_rect.height - name_input_surf.get_height()) // 2))
             if pygame.time.get_ticks() % 1000 < 500: # Cursor blink #
@@ -2196,21 +1613,22 @@ while running:
                 if cursor_x < name_field_rect.right - 5:
                     pygame.draw.line(screen, WHITE, (cursor_x, name_field_rect.y + 5),
                                      (cursor_x, name_field_rect.y + name_field_rect.height - 5), 2)
+            dirty_renderer.add(name_field_rect) # 游標閃爍區域
         elif camera_capture_active and not post_capture_prompt_active: # Capturing phase #
             player_text = f"玩家 {current_capture_player_index + 1}" #
-            capture_title_text = font_small.render(f"{player_text} 頭像擷取", True, TEXT_COLOR)
+            capture_title_text = text_cache.render(font_small, f"{player_text} 頭像擷取", True, TEXT_COLOR)
             screen.blit(capture_title_text,
                         (SCREEN_WIDTH // 2 - capture_title_text.get_width() // 2, base_y_offset - 40))
             if camera_frame_surface:
                 feed_x = (SCREEN_WIDTH - camera_frame_surface.get_width()) // 2
                 feed_y = base_y_offset
-                screen.blit(camera_frame_surface, (feed_x, feed_y))
+                dirty_renderer.add(screen.blit(camera_frame_surface, (feed_x, feed_y)))
             else: #
-                init_cam_text = font_small.render("正在初始化攝影機...", True, TEXT_COLOR)
+                init_cam_text = text_cache.render(font_small, "正在初始化攝影機...", True, TEXT_COLOR)
                 screen.blit(init_cam_text,
                             (SCREEN_WIDTH // 2 - init_cam_text.get_width() // 2, SCREEN_HEIGHT // 2 - 20))
             prompt_str = f"對準鏡頭: (A)擷取{player_text} / (S)略過{player_text} / (Q)完成並到排行榜"
-            capture_prompt_surf = font_tiny.render(prompt_str, True, TEXT_COLOR)
+            capture_prompt_surf = text_cache.render(font_tiny, prompt_str, True, TEXT_COLOR)
             screen.blit(capture_prompt_surf,
                         (SCREEN_WIDTH // 2 - capture_prompt_surf.get_width() // 2, SCREEN_HEIGHT - 70))
         elif post_capture_prompt_active: # Post capture/skip options for current player #
@@ -2220,7 +1638,7 @@ while running:
                 status_text_str = "照片已儲存!" if captured_face_image_path_p1 else "照片已略過。"
             else: # P2 #
                 status_text_str = "照片已儲存!" if captured_face_image_path_p2 else "照片已略過。"
-            status_surf = font_small.render(f"{player_text}: {status_text_str}", True, (0, 255, 0) if (
+            status_surf = text_cache.render(font_small, f"{player_text}: {status_text_str}", True, (0, 255, 0) if (
                                                                                                                   current_capture_player_index == 0 and captured_face_image_path_p1) or (
                                                                                                                   current_capture_player_index == 1 and captured_face_image_path_p2) else TEXT_COLOR) #
             screen.blit(status_surf,
@@ -2230,73 +1648,40 @@ while running:
                 opt_str1 = f"(R)重拍{player_text}"
                 opt_str2 = "(N)擷取玩家2頭像"
                 opt_str3 = "(F)完成 (僅儲存目前結果)"
-                screen.blit(font_tiny.render(opt_str1, True, TEXT_COLOR),
-                            (SCREEN_WIDTH // 2 - font_tiny.render(opt_str1, True, TEXT_COLOR).get_width() // 2,
+                screen.blit(text_cache.render(font_tiny, opt_str1, True, TEXT_COLOR),
+                            (SCREEN_WIDTH // 2 - text_cache.render(font_tiny, opt_str1, True, TEXT_COLOR).get_width() // 2,
                              options_y_start))
-                screen.blit(font_tiny.render(opt_str2, True, TEXT_COLOR),
-                            (SCREEN_WIDTH // 2 - font_tiny.render(opt_str2, True, TEXT_COLOR).get_width() // 2,
+                screen.blit(text_cache.render(font_tiny, opt_str2, True, TEXT_COLOR),
+                            (SCREEN_WIDTH // 2 - text_cache.render(font_tiny, opt_str2, True, TEXT_COLOR).get_width() // 2,
                              options_y_start + 30))
-                screen.blit(font_tiny.render(opt_str3, True, TEXT_COLOR),
-                            (SCREEN_WIDTH // 2 - font_tiny.render(opt_str3, True, TEXT_COLOR).get_width() // 2,
+                screen.blit(text_cache.render(font_tiny, opt_str3, True, TEXT_COLOR),
+                            (SCREEN_WIDTH // 2 - text_cache.render(font_tiny, opt_str3, True, TEXT_COLOR).get_width() // 2,
                              options_y_start + 60))
             else: # P2 options #
                 opt_str1 = f"(R)重拍{player_text}"
                 opt_str2 = "(B)返回玩家1選項"
                 opt_str3 = "(F)完成並儲存"
-                screen.blit(font_tiny.render(opt_str1, True, TEXT_COLOR),
-                            (SCREEN_WIDTH // 2 - font_tiny.render(opt_str1, True, TEXT_COLOR).get_width() // 2,
+                screen.blit(text_cache.render(font_tiny, opt_str1, True, TEXT_COLOR),
+                            (SCREEN_WIDTH // 2 - text_cache.render(font_tiny, opt_str1, True, TEXT_COLOR).get_width() // 2,
                              options_y_start))
-                screen.blit(font_tiny.render(opt_str2, True, TEXT_COLOR),
-                            (SCREEN_WIDTH // 2 - font_tiny.render(opt_str2, True, TEXT_COLOR).get_width() // 2,
+                screen.blit(text_cache.render(font_tiny, opt_str2, True, TEXT_COLOR),
+                            (SCREEN_WIDTH // 2 - text_cache.render(font_tiny, opt_str2, True, TEXT_COLOR).get_width() // 2,
                              options_y_start + 30))
-                screen.blit(font_tiny.render(opt_str3, True, TEXT_COLOR),
-                            (SCREEN_WIDTH // 2 - font_tiny.render(opt_str3, True, TEXT_COLOR).get_width() // 2,
+                screen.blit(text_cache.render(font_tiny, opt_str3, True, TEXT_COLOR),
+                            (SCREEN_WIDTH // 2 - text_cache.render(font_tiny, opt_str3, True, TEXT_COLOR).get_width() // 2,
                              options_y_start + 60))
 
     elif game_state == STATE_SHOW_LEADERBOARD:
         draw_leaderboard_screen()
 
-    # 復活判斷
+    # 復活進度圈（進度本身在 update_simulation 裡計算）
     if game_state == STATE_PLAYING or game_state == STATE_BOSS_LEVEL:
-        current_revive_initiator = None
-        potential_target_player = None #
-        if player1.is_alive and not player2.is_alive and player2.death_pos:
-            if player1.pos.distance_to(player2.death_pos) <= REVIVAL_RADIUS:
-                if keys[REVIVE_KEYP1]: current_revive_initiator = player1; potential_target_player = player2
-        elif player2.is_alive and not player1.is_alive and player1.death_pos:
-            if player2.pos.distance_to(player1.death_pos) <= REVIVAL_RADIUS:
-                if keys[REVIVE_KEYP2]: current_revive_initiator = player2; potential_target_player = player1
-
-        if current_revive_initiator and potential_target_player:
-            if revive_target != potential_target_player: revive_target = potential_target_player; revive_progress = 0
-            revive_progress += dt
-        else: # Logic to reset progress if key is released or conditions change #
-            reset_progress_flag = True #
-            if revive_target == player2 and keys[
-                REVIVE_KEYP1] and player1.is_alive and player2.death_pos and player1.pos.distance_to(
-                    player2.death_pos) <= REVIVAL_RADIUS:
-                reset_progress_flag = False
-            if revive_target == player1 and keys[
-                REVIVE_KEYP2] and player2.is_alive and player1.death_pos and player2.pos.distance_to(
-                    player1.death_pos) <= REVIVAL_RADIUS:
-                reset_progress_flag = False
-            if reset_progress_flag:
-                revive_progress = 0
-
-        if revive_progress >= REVIVE_HOLD_TIME and revive_target is not None:
-            if revive_target == player2:
-                player2.revive()
-            elif revive_target == player1:
-                player1.revive()
-            revive_progress = 0
-            revive_target = None
-
-        if revive_target is not None and revive_progress > 0:
-            percentage = min(revive_progress / REVIVE_HOLD_TIME, 1.0)
+        if engine.revive_target is not None and engine.revive_progress > 0:
+            percentage = min(engine.revive_progress / REVIVE_HOLD_TIME, 1.0)
             center_pos_death = None
-            if revive_target == player1 and player1.death_pos:
+            if engine.revive_target == player1 and player1.death_pos:
                 center_pos_death = player1.death_pos
-            elif revive_target == player2 and player2.death_pos:
+            elif engine.revive_target == player2 and player2.death_pos:
                 center_pos_death = player2.death_pos
             if center_pos_death:
                 radius = 20
@@ -2307,23 +1692,48 @@ while running:
                                        radius * 2)
                 pygame.draw.circle(screen, (80, 80, 80, 150) if pygame.SRCALPHA else (80, 80, 80), arc_rect.center,
                                    radius, 2)
+                dirty_renderer.add(arc_rect)
                 start_angle_rad = -math.pi / 2
                 end_angle_rad = start_angle_rad + (percentage * 2 * math.pi)
                 if percentage > 0.01: pygame.draw.arc(screen, REVIVE_PROMPT_COLOR, arc_rect, start_angle_rad,
                                                       end_angle_rad, 4)
 
+
     # 存檔提示
     if show_save_feedback:
-        feedback_surface = font_tiny.render("遊戲已存檔", True, SAVE_MESSAGE_COLOR)
+        feedback_surface = text_cache.render(font_tiny, "遊戲已存檔", True, SAVE_MESSAGE_COLOR)
         feedback_rect = feedback_surface.get_rect(topright=(SCREEN_WIDTH - 10, 10))
-        screen.blit(feedback_surface, feedback_rect)
+        blit_dirty(feedback_surface, feedback_rect)
 
     #畫出鎖鏈
     if game_state in [STATE_PLAYING, STATE_BOSS_LEVEL, STATE_BOSS_DEFEATED]:
-        pygame.draw.line(screen, (255, 255, 255), (player1.pos.x, player1.pos.y), (player2.pos.x, player2.pos.y), 2)
-
-    # 更新整個畫面
-    pygame.display.flip()
-
+        dirty_renderer.add(pygame.draw.line(screen, (255, 255, 255), render_interpolator.position(player1),
+                                            render_interpolator.position(player2), 2))
+    render_interpolator.restore()
+
+    # 效能面板畫的是上一幀的分段時間（這一幀還沒結束）
+    dirty_renderer.add(perf_overlay.draw(screen, dt, (SCREEN_WIDTH - 10, 90)))
+
+    # 更新畫面（dirty rect 模式只送出變動區域）
+    section_start = span_trace.record("render", render_start)
+    dirty_renderer.present()
+    frame_timings.lap("flip", section_start)
+    gc_policy.update(game_state, engine.current_level_index) # 換畫面、換關時是安全點，在這裡回收
+    gc_policy.end_frame()
+    hitch_monitor.end_frame(frame_start, frame_timings.end_frame(), game_state)
+
+stop_recording()
 release_camera_resources()
+if TRACE_OUTPUT_PATH:
+    dump_trace(TRACE_OUTPUT_PATH)
+if sampling_profiler.running:
+    toggle_profiler()
+hitch_monitor.close()
+gc_policy.uninstall()
+if GC_REPORT:
+    print(f"gc 停頓（策略 {gc_policy.mode}，啟動時凍結 {gc_policy.frozen} 個物件）：")
+    for line in gc_policy.report():
+        print("  " + line)
+if hitch_monitor.hitches:
+    print(f"本次遊戲 {hitch_monitor.summary()}" + (f"，紀錄在 {HITCH_LOG_PATH}" if HITCH_LOG_PATH else ""))
 pygame.quit()
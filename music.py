@@ -2,20 +2,25 @@ import pygame
 import time
 import threading
 
+from span_trace import span_trace, traced
+
 # --- 音樂初始化 ---
 pygame.mixer.init()
 
+@traced()
 def play_music(file_path):
     pygame.mixer.music.stop()  # 停止當前音樂
     pygame.mixer.music.load(file_path)  # 加載新音樂
     pygame.mixer.music.play(-1)  # 循環播放
 
+@traced()
 def fade_out_and_switch_music(current_file, next_file, fade_duration=2):
     def fade_thread():
         # 修正: current_file為None時不load
         if current_file:
-            pygame.mixer.music.load(current_file)  # 加載當前音樂
-            pygame.mixer.music.play(-1)  # 循環播放當前音樂
+            with span_trace.span("music.load"):
+                pygame.mixer.music.load(current_file)  # 加載當前音樂
+                pygame.mixer.music.play(-1)  # 循環播放當前音樂
 
         # 漸變音量到 0
         start_time = time.time()
@@ -29,9 +34,10 @@ def fade_out_and_switch_music(current_file, next_file, fade_duration=2):
         pygame.mixer.music.stop()  # 停止當前音樂
 
         # 切換到下一首音樂
-        pygame.mixer.music.load(next_file)
-        pygame.mixer.music.set_volume(initial_volume)  # 恢復音量
-        pygame.mixer.music.play(-1)  # 循環播放新音樂
+        with span_trace.span("music.load"):
+            pygame.mixer.music.load(next_file)
+            pygame.mixer.music.set_volume(initial_volume)  # 恢復音量
+            pygame.mixer.music.play(-1)  # 循環播放新音樂
 
-    threading.Thread(target=fade_thread, daemon=True).start()
+    threading.Thread(target=fade_thread, name="music_fade", daemon=True).start()
 
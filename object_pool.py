@@ -0,0 +1,54 @@
+class ObjectPool:
+    """
+    重複使用物件，避免戰鬥中不斷建立 / 丟棄物件造成 GC 卡頓。
+    acquire(*args) 優先從回收的物件中拿一個出來，呼叫 obj.reset(*args) 重新初始化；沒有的話才用 factory(*args) 建立。
+    物件用完後呼叫 release(obj) 放回池子（通常在物件的 kill() 裡呼叫）。
+
+    get_stats() 提供給效能面板：peak_live（同時存在最多幾個）、reuse_rate（取用時有多少比例是重複使用的）、
+    allocations_avoided（少建立了幾個物件）。
+    """
+
+    def __init__(self, factory, max_free=64):
+        self.factory = factory
+        self.max_free = max_free
+        self._free = []
+        self.allocations = 0
+        self.reuses = 0
+        self.releases = 0
+        self.live = 0
+        self.peak_live = 0
+
+    def acquire(self, *args, **kwargs):
+        if self._free:
+            obj = self._free.pop()
+            obj.reset(*args, **kwargs)
+            self.reuses += 1
+        else:
+            obj = self.factory(*args, **kwargs)
+            self.allocations += 1
+        obj.pool = self
+        obj.in_pool = False
+        self.live += 1
+        self.peak_live = max(self.peak_live, self.live)
+        return obj
+
+    def release(self, obj):
+        if obj.in_pool:
+            return  # 已經放回來過（例如 kill() 被呼叫兩次）
+        obj.in_pool = True
+        self.live -= 1
+        self.releases += 1
+        if len(self._free) < self.max_free:
+            self._free.append(obj)
+
+    def get_stats(self):
+        acquired = self.allocations + self.reuses
+        return {
+            "live": self.live,
+            "peak_live": self.peak_live,
+            "free": len(self._free),
+            "allocations": self.allocations,
+            "reuses": self.reuses,
+            "reuse_rate": self.reuses / acquired if acquired else 0.0,
+            "allocations_avoided": self.reuses,
+        }
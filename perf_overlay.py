@@ -0,0 +1,139 @@
+import time
+
+import pygame
+
+from frame_timings import SECTIONS, frame_timings
+
+# 每一段在圖上的顏色（順序和 SECTIONS 相同），剩下沒有分段計時的時間是 OTHER_COLOR
+SECTION_COLORS = {
+    "events": (120, 120, 255),
+    "effects": (255, 160, 60),
+    "move_p1": (60, 160, 255),
+    "move_p2": (255, 90, 160),
+    "chain": (200, 200, 200),
+    "boss": (255, 60, 60),
+    "background": (90, 200, 90),
+    "sprites": (170, 230, 90),
+    "hud": (240, 230, 100),
+    "flip": (160, 90, 220),
+}
+OTHER_COLOR = (90, 90, 90)
+BUDGET_LINE_COLOR = (255, 255, 255)
+PANEL_BACKGROUND = (0, 0, 0, 180)
+
+
+class PerfOverlay:
+    """
+    效能面板（F3 開關）：最近幾秒的幀時間堆疊圖、每一段的平均 / 最大毫秒數、場上物件數量、
+    dynamic_hash 每一類的命中 / 候選數（候選比命中多很多表示 broadphase 沒篩掉什麼）、快取命中率。
+
+    為了不影響它自己量到的數字：
+    - 圖是一張保留下來的 Surface，每幀只把舊的內容 scroll() 往左移一格，再畫最新一幀的那一欄；
+    - 文字每 text_interval 秒才重新 render 一次（直接用 font.render，不經過 text_cache，不然面板本身會改變 text_cache 的命中率）；
+    - 面板自己花的時間另外顯示（overlay），不屬於任何一段（圖上算在灰色的「其他」）。
+    """
+
+    def __init__(self, font, engine, caches, timings=frame_timings, graph_size=(240, 80), budget_ms=1000 / 60,
+                 text_interval=0.25):
+        self.font = font
+        self.engine = engine
+        self.caches = caches  # {名稱: 有 get_stats()["hit_rate"] 的快取}
+        self.timings = timings
+        self.budget_ms = budget_ms
+        self.graph_ms = budget_ms * 2  # 圖的高度代表的毫秒數
+        self.text_interval = text_interval
+        self.visible = False
+        self.overlay_ms = 0.0
+        self.graph = pygame.Surface(graph_size).convert()
+        self.graph.fill((0, 0, 0))
+        self.text_surface = None
+        self._text_age = text_interval
+        self._graphed_frames = 0
+        self._line_height = font.get_linesize()
+
+    def toggle(self):
+        self.visible = not self.visible
+        self._text_age = self.text_interval # 打開時立刻更新文字
+
+    def _bar_height(self, ms):
+        return int(ms / self.graph_ms * self.graph.get_height())
+
+    def _add_graph_column(self):
+        graph = self.graph
+        width, height = graph.get_size()
+        graph.scroll(-1, 0)
+        x = width - 1
+        graph.fill((0, 0, 0), (x, 0, 1, height))
+        timings = self.timings
+        bottom = height
+        total = 0.0
+        for name in SECTIONS:
+            ms = timings.last(name)
+            total += ms
+            bar = self._bar_height(ms)
+            if bar > 0:
+                bottom -= bar
+                graph.fill(SECTION_COLORS[name], (x, bottom, 1, bar))
+        other = self._bar_height(max(0.0, timings.last() - total))
+        if other > 0:
+            graph.fill(OTHER_COLOR, (x, bottom - other, 1, other))
+        budget_y = height - self._bar_height(self.budget_ms)
+        graph.set_at((x, budget_y), BUDGET_LINE_COLOR)
+
+    def _entity_counts(self):
+        engine = self.engine
+        boss = engine.boss_enemy
+        return [
+            ("projectiles", len(boss.projectiles) if boss else 0),
+            ("meteors", len(engine.meteor_sprites)),
+            ("warnings", len(engine.warning_sprites)),
+            ("throwables", len(engine.throwable_objects_group)),
+        ]
+
+    def _build_text(self):
+        timings = self.timings
+        average = timings.average()
+        lines = [(f"frame {average:5.2f} ms  max {timings.peak():5.2f}  overlay {self.overlay_ms:4.2f}",
+                  BUDGET_LINE_COLOR)]
+        for name in SECTIONS:
+            lines.append((f"{name:<10} {timings.average(name):5.2f}  max {timings.peak(name):5.2f}",
+                          SECTION_COLORS[name]))
+        lines.append(("  ".join(f"{name} {count}" for name, count in self._entity_counts()), BUDGET_LINE_COLOR))
+        hash_stats = self.engine.dynamic_hash.get_stats()
+        lines.append(("hash " + "  ".join(f"{name} {stats['hits']}/{stats['candidates']}"
+                                          for name, stats in hash_stats.items()), BUDGET_LINE_COLOR))
+        lines.append(("cache " + "  ".join(f"{name} {cache.get_stats()['hit_rate'] * 100:.0f}%"
+                                           for name, cache in self.caches.items()), BUDGET_LINE_COLOR))
+        rendered = [self.font.render(text, True, color) for text, color in lines]
+        width = max(self.graph.get_width(), max(surface.get_width() for surface in rendered)) + 8
+        height = self.graph.get_height() + len(rendered) * self._line_height + 12
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill(PANEL_BACKGROUND)
+        y = self.graph.get_height() + 8
+        for surface in rendered:
+            panel.blit(surface, (4, y))
+            y += self._line_height
+        self.text_surface = panel.convert_alpha()
+
+    def draw(self, surface, dt, topright):
+        """
+        每幀在 flip 之前呼叫（面板關著的時候什麼都不做）；圖上畫的是最近一次 frame_timings.end_frame() 記錄的那一幀。
+        回傳畫到的範圍（給 dirty rect 用），沒有畫時回傳 None。
+        """
+        if not self.visible:
+            self._graphed_frames = self.timings.frames
+            return None
+        start = time.perf_counter_ns()
+        # 面板關著時錯過的幀不補畫，從現在開始往右接
+        if self.timings.frames != self._graphed_frames:
+            self._add_graph_column()
+            self._graphed_frames = self.timings.frames
+        self._text_age += dt
+        if self.text_surface is None or self._text_age >= self.text_interval:
+            self._text_age = 0.0
+            self._build_text()
+        rect = self.text_surface.get_rect(topright=topright)
+        surface.blit(self.text_surface, rect)
+        surface.blit(self.graph, (rect.x + 4, rect.y + 4))
+        self.overlay_ms = (time.perf_counter_ns() - start) / 1e6
+        return rect
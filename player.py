@@ -1,7 +1,10 @@
 import pygame
 from animations import *
-from boss_entities import ThrowableObject # <--- ADD THIS LINE
+from animation_clip import load_clip
+from collision_grid import collide_objects, query_obstacles
+from boss_entities import throwable_pool
 # 如有需要，导入 math、random 及 main.py 里用到的常量
+import math
 import random
 
 from drawing import drawing_window
@@ -20,8 +23,9 @@ DRAW_ITEM_KEY_P2 = pygame.K_SEMICOLON  # For "drawing" an item by P2
 
 
 class Player(pygame.sprite.Sprite):
-    def __init__(self, x, y, alive_color, dead_color, control_keys, player_id):
+    def __init__(self, x, y, alive_color, dead_color, control_keys, player_id, rng=None):
         super().__init__()
+        self.rng = rng if rng is not None else random  # 死亡震動、P2 物品位置的隨機數
         self.start_pos = pygame.math.Vector2(x, y)
         self.pos = pygame.math.Vector2(x, y)
         self.alive_color = alive_color
@@ -29,6 +33,7 @@ class Player(pygame.sprite.Sprite):
         self.control_keys = control_keys
         self.player_id = player_id
         self.facing_left = False
+        # 以下都是 AnimationClip：朝左、無敵閃爍的版本在載入時就做好了
         self.walk_frames = []
         self.idle_frames = []
         self.death_frames = []
@@ -41,25 +46,25 @@ class Player(pygame.sprite.Sprite):
         self.is_currently_visible = True  # To toggle visibility for flashing effect
 
         if self.player_id == 0:  # Knight (P1)
-            self.walk_frames = Knight_animation.load_knight_run_animation(target_width=PLAYER_RADIUS * 3,
-                                                                          target_height=PLAYER_RADIUS * 3)
-            self.idle_frames = Knight_animation.load_knight_idle_animation(target_width=PLAYER_RADIUS * 3,
-                                                                           target_height=PLAYER_RADIUS * 3)
-            self.death_frames = Knight_animation.load_knight_death_animation(target_width=PLAYER_RADIUS * 3,
-                                                                             target_height=PLAYER_RADIUS * 3)
-            self.revive_frames = Knight_animation.load_knight_revive_animation(target_width=PLAYER_RADIUS * 3,
-                                                                               target_height=PLAYER_RADIUS * 3)
+            self.walk_frames = load_clip(Knight_animation.load_knight_run_animation, target_width=PLAYER_RADIUS * 3,
+                                         target_height=PLAYER_RADIUS * 3)
+            self.idle_frames = load_clip(Knight_animation.load_knight_idle_animation, target_width=PLAYER_RADIUS * 3,
+                                         target_height=PLAYER_RADIUS * 3)
+            self.death_frames = load_clip(Knight_animation.load_knight_death_animation, target_width=PLAYER_RADIUS * 3,
+                                          target_height=PLAYER_RADIUS * 3)
+            self.revive_frames = load_clip(Knight_animation.load_knight_revive_animation, target_width=PLAYER_RADIUS * 3,
+                                           target_height=PLAYER_RADIUS * 3)
             self.is_witch = False
         elif self.player_id == 1:  # Witch (P2)
             self.is_witch = True
-            self.walk_frames = Witch_animation.load_witch_run_animation(target_width=PLAYER_RADIUS * 3,
-                                                                        target_height=PLAYER_RADIUS * 3)
-            self.idle_frames = Witch_animation.load_witch_idle_animation(target_width=PLAYER_RADIUS * 3,
-                                                                         target_height=PLAYER_RADIUS * 3)
-            self.death_frames = Witch_animation.load_witch_death_animation(target_width=PLAYER_RADIUS * 3,
-                                                                           target_height=PLAYER_RADIUS * 3)
-            self.revive_frames = Witch_animation.load_witch_revive_animation(target_width=PLAYER_RADIUS * 3,
-                                                                             target_height=PLAYER_RADIUS * 3)
+            self.walk_frames = load_clip(Witch_animation.load_witch_run_animation, target_width=PLAYER_RADIUS * 3,
+                                         target_height=PLAYER_RADIUS * 3)
+            self.idle_frames = load_clip(Witch_animation.load_witch_idle_animation, target_width=PLAYER_RADIUS * 3,
+                                         target_height=PLAYER_RADIUS * 3)
+            self.death_frames = load_clip(Witch_animation.load_witch_death_animation, target_width=PLAYER_RADIUS * 3,
+                                          target_height=PLAYER_RADIUS * 3)
+            self.revive_frames = load_clip(Witch_animation.load_witch_revive_animation, target_width=PLAYER_RADIUS * 3,
+                                           target_height=PLAYER_RADIUS * 3)
             if self.player_id == 1:  # Witch
                 print(
                     f"Witch revive_frames length: {len(self.revive_frames) if self.revive_frames else 'None or Empty'}")
@@ -81,6 +86,16 @@ class Player(pygame.sprite.Sprite):
         self.frame_timer = 0
         self.image = self.walk_frames[0] if self.walk_frames else pygame.Surface([PLAYER_RADIUS * 2, PLAYER_RADIUS * 2])
         self.rect = self.image.get_rect(center=self.pos)
+        # update_movement 每次呼叫都重複使用這幾個 Rect（往 x / y 移動後、最後的位置、雷射牆的查詢範圍），不再 copy()
+        self._move_rect_x = pygame.Rect(0, 0, 0, 0)
+        self._move_rect_y = pygame.Rect(0, 0, 0, 0)
+        self._move_rect = pygame.Rect(0, 0, 0, 0)
+        self._move_query_rect = pygame.Rect(0, 0, 0, 0)
+        self._update_move_bounds()
+        # 上、下、左、右的鍵；鏡像效果時上下、左右對調
+        self._direction_keys = (control_keys['up'], control_keys['down'], control_keys['left'], control_keys['right'])
+        self._mirrored_direction_keys = (control_keys['down'], control_keys['up'], control_keys['right'],
+                                         control_keys['left'])
         self.is_alive = True
         self.death_pos = None
         self.is_shaking = False
@@ -103,6 +118,7 @@ class Player(pygame.sprite.Sprite):
         self.death_pos = None
         self.image = self.walk_frames[0] if self.walk_frames else pygame.Surface([PLAYER_RADIUS * 2, PLAYER_RADIUS * 2])
         self.rect = self.image.get_rect(center=self.pos)
+        self._update_move_bounds()
         self.current_frame = 0
 
         self.is_shaking = False
@@ -120,10 +136,13 @@ class Player(pygame.sprite.Sprite):
         self.invincibility_timer = 0.0
         self.flash_timer = 0.0
         self.is_currently_visible = True
-        if hasattr(self, 'image') and self.image and self.walk_frames:
-            self.image.set_alpha(255)
-        elif self.walk_frames:
-            pass
+
+    def _update_move_bounds(self):
+        # pos 可以到的範圍（rect 整個留在畫面裡），rect 換了就要重新算
+        self._min_x = self.rect.width // 2
+        self._max_x = SCREEN_WIDTH - self.rect.width // 2
+        self._min_y = self.rect.height // 2
+        self._max_y = SCREEN_HEIGHT - self.rect.height // 2
 
     def revive(self):
         print(f"Player {self.player_id} reviving. Revive frames available: {bool(self.revive_frames)}")
@@ -149,8 +168,6 @@ class Player(pygame.sprite.Sprite):
         self.invincibility_timer = self.invincibility_duration
         self.flash_timer = 0.0
         self.is_currently_visible = True
-        if hasattr(self, 'image') and self.image:
-            self.image.set_alpha(255)
 
     def update_invincibility_and_flash(self, dt):
         if self.is_invincible:
@@ -204,7 +221,7 @@ class Player(pygame.sprite.Sprite):
     def update_movement(self, laser_walls, coop_boxes=None, spike_trap_group=None, meteor_sprites=None,
                         effect_manager=None, dt=0.016,
                         # Boss level specific arguments
-                        boss_entity=None, boss_projectiles=None, throwable_objects_group=None):
+                        boss_entity=None, boss_projectiles=None, throwable_objects_group=None, keys=None):
         self.update_invincibility_and_flash(dt)
 
         if self.is_reviving:
@@ -221,19 +238,8 @@ class Player(pygame.sprite.Sprite):
                     self.image = self.walk_frames[0] if self.walk_frames else self.image  # Fallback
                     self.current_frame = 0
                 else:
-                    frame_surface = self.revive_frames[self.revive_anim_frame]
-                    current_image = frame_surface.copy()
-
-                    if self.facing_left:
-                        frame = pygame.transform.flip(frame_surface, True, False) 
-                    self.image = current_image
-                    if self.is_invincible:
-                        if not self.is_currently_visible:
-                            self.image.set_alpha(100)
-                        else:
-                            self.image.set_alpha(255)
-                    else:
-                        self.image.set_alpha(255)
+                    self.image = self.revive_frames.get(self.revive_anim_frame, self.facing_left,
+                                                        self.is_invincible and not self.is_currently_visible)
             else:
                 self.is_reviving = False
                 self.current_frame = 0
@@ -244,8 +250,8 @@ class Player(pygame.sprite.Sprite):
             if self.is_shaking:
                 self.shake_timer -= dt
                 if self.shake_timer > 0 and self.original_death_pos_for_shake:
-                    offset_x = random.uniform(-self.shake_magnitude, self.shake_magnitude)
-                    offset_y = random.uniform(-self.shake_magnitude, self.shake_magnitude)
+                    offset_x = self.rng.uniform(-self.shake_magnitude, self.shake_magnitude)
+                    offset_y = self.rng.uniform(-self.shake_magnitude, self.shake_magnitude)
                     # Death animation should play based on self.current_frame updated in _update_dead_image
                     # The rect position is jittered, but self.pos remains the original death spot.
                     temp_shake_pos_x = self.original_death_pos_for_shake.x + offset_x
@@ -263,106 +269,116 @@ class Player(pygame.sprite.Sprite):
                 self._update_dead_image(dt)  # Pass dt for timed animation
             return
 
-        keys = pygame.key.get_pressed()
-        movement_vector = pygame.math.Vector2(0, 0)
+        if keys is None:  # 不是經由 GameEngine.step() 呼叫時才直接讀鍵盤
+            keys = pygame.key.get_pressed()
+        # 移動量用兩個 float、碰撞用預先配置的 Rect，整段不會產生新的 Vector2 / Rect
         mirror_active = effect_manager and effect_manager.is_mirror_active(self.player_id)
-
-        up_key_actual = self.control_keys['down'] if mirror_active else self.control_keys['up']
-        down_key_actual = self.control_keys['up'] if mirror_active else self.control_keys['down']
-        left_key_actual = self.control_keys['right'] if mirror_active else self.control_keys['left']
-        right_key_actual = self.control_keys['left'] if mirror_active else self.control_keys['right']
-
-        if keys[up_key_actual]: movement_vector.y = -1
-        if keys[down_key_actual]: movement_vector.y = 1
-        if keys[left_key_actual]: movement_vector.x = -1
-        if keys[right_key_actual]: movement_vector.x = 1
+        up_key, down_key, left_key, right_key = (self._mirrored_direction_keys if mirror_active
+                                                 else self._direction_keys)
+        move_x = 0.0
+        move_y = 0.0
+        if keys[up_key]: move_y = -1.0
+        if keys[down_key]: move_y = 1.0
+        if keys[left_key]: move_x = -1.0
+        if keys[right_key]: move_x = 1.0
 
         if keys[self.control_keys['left']]:
             self.facing_left = True
         elif keys[self.control_keys['right']]:
             self.facing_left = False
 
-        is_moving = movement_vector.length_squared() > 0
+        is_moving = move_x != 0.0 or move_y != 0.0
         if is_moving:
-            movement_vector.normalize_ip()
-            movement_vector *= PLAYER_SPEED
-
-        tentative_pos = self.pos + movement_vector
-        original_rect = self.rect.copy()
-        temp_rect_x = original_rect.copy()
-        temp_rect_x.centerx = tentative_pos.x
-        temp_rect_y = original_rect.copy()
-        temp_rect_y.centery = tentative_pos.y
+            # 和 Vector2.normalize_ip() 再乘上速度的算法相同（先除長度再乘），結果一樣
+            length = math.sqrt(move_x * move_x + move_y * move_y)
+            speed = PLAYER_SPEED * dt * 60 # PLAYER_SPEED 是每 1/60 秒的距離，和模擬頻率無關
+            move_x = move_x / length * speed
+            move_y = move_y / length * speed
+
+        pos = self.pos
+        rect = self.rect  # 移動前的位置；檢查碰撞的過程中不會改到
+        rect_x = self._move_rect_x
+        rect_x.update(rect)
+        rect_x.centerx = pos.x + move_x
+        rect_y = self._move_rect_y
+        rect_y.update(rect)
+        rect_y.centery = pos.y + move_y
 
         # --- Standard Obstacle Collisions ---
-        # Laser Wall Collision
+        # 檢查順序：雷射牆 -> 合作箱 -> 地刺 -> 隕石 -> Boss -> Boss 子彈
+        # laser_walls / spike_trap_group 可以是 StaticCollisionGrid，只檢查附近格子裡的物件
+        # Laser Wall Collision（撞到就死，不震動）
         if laser_walls:  # Check if laser_walls is not None (for boss level)
-            collided_with_laser = False
-            for lw in laser_walls:
-                if temp_rect_x.colliderect(lw.rect) and (
-                        not original_rect.colliderect(lw.rect) or movement_vector.x != 0):
-                    movement_vector.x = 0;
-                    collided_with_laser = True;
-                    break
-                if temp_rect_y.colliderect(lw.rect) and (
-                        not original_rect.colliderect(lw.rect) or movement_vector.y != 0):
-                    movement_vector.y = 0;
-                    collided_with_laser = True;
-                    break
-            if collided_with_laser:
-                self.die(start_shake=False);
-                return  # No shake for wall collision
-
-        tentative_pos = self.pos + movement_vector  # Re-evaluate tentative_pos
-        temp_rect_x.centerx = tentative_pos.x
-        temp_rect_y.centery = tentative_pos.y
-
-        # Coop Box Collision
-        if coop_boxes:
-            for box in coop_boxes:
-                if temp_rect_x.colliderect(box.rect): movement_vector.x = 0
-                if temp_rect_y.colliderect(box.rect): movement_vector.y = 0
-
-        tentative_pos = self.pos + movement_vector
-        final_tentative_rect = self.rect.copy();
-        final_tentative_rect.center = tentative_pos
+            query_rect = self._move_query_rect
+            query_rect.update(rect_x)
+            query_rect.union_ip(rect_y)
+            walls = query_obstacles(laser_walls, query_rect)
+            if walls:  # 附近沒有牆時是空的 tuple，連 iterator 都不用建
+                for lw in walls:
+                    lw_rect = lw.rect
+                    if rect_x.colliderect(lw_rect) and (not rect.colliderect(lw_rect) or move_x != 0):
+                        self.die(start_shake=False)
+                        return
+                    if rect_y.colliderect(lw_rect) and (not rect.colliderect(lw_rect) or move_y != 0):
+                        self.die(start_shake=False)
+                        return
+
+        # Coop Box Collision（用的是撞到箱子之前的 x / y 位置；RectGroup 直接用 rect list 在 C 裡比對）
+        # 不用 `if coop_boxes:`：Group 的 __bool__ 每次都會複製一份 sprite list
+        if coop_boxes is not None:
+            box_rects = getattr(coop_boxes, "rects", None)
+            if box_rects is None:
+                box_rects = [box.rect for box in coop_boxes]
+            if rect_x.collidelist(box_rects) != -1: move_x = 0.0
+            if rect_y.collidelist(box_rects) != -1: move_y = 0.0
+
+        final_rect = self._move_rect
+        final_rect.update(rect)
+        final_rect.centerx = pos.x + move_x
+        final_rect.centery = pos.y + move_y
 
         # Spike Trap Collision
         if spike_trap_group:
-            for spike in spike_trap_group:
-                if spike.is_dangerous() and final_tentative_rect.colliderect(spike.rect):
-                    self.die(start_shake=False);
-                    return
-
-        # Meteor Collision
+            spikes = query_obstacles(spike_trap_group, final_rect)
+            if spikes:
+                for spike in spikes:
+                    if spike.is_dangerous() and final_rect.colliderect(spike.rect):
+                        self.die(start_shake=False)
+                        return
+
+        # Meteor Collision（meteor_sprites 可以是 SpatialHash 的 view，只檢查附近的物件；boss_projectiles 是 ProjectileStore，整批算圓形碰撞）
         if meteor_sprites:
-            for meteor in meteor_sprites:
-                if final_tentative_rect.colliderect(meteor.rect):
-                    self.die(start_shake=True);
-                    return  # Meteors cause shake
+            for meteor in collide_objects(meteor_sprites, final_rect):
+                self.die(start_shake=True)
+                return  # Meteors cause shake
 
         # --- Boss Level Specific Collisions ---
         if boss_entity and boss_entity.current_health > 0:  # If boss is active
             # Player vs Boss direct collision (optional - make boss solid)
-            if final_tentative_rect.colliderect(boss_entity.rect):
+            boss_rect = boss_entity.rect
+            if final_rect.colliderect(boss_rect):
                 # Simple bounce back
-                if temp_rect_x.colliderect(boss_entity.rect): movement_vector.x = 0
-                if temp_rect_y.colliderect(boss_entity.rect): movement_vector.y = 0
+                if rect_x.colliderect(boss_rect): move_x = 0.0
+                if rect_y.colliderect(boss_rect): move_y = 0.0
                 # Or player takes damage/dies
                 # self.die(start_shake=True); return
 
         if boss_projectiles:  # Collision with boss projectiles
-            for proj in boss_projectiles:
-                if final_tentative_rect.colliderect(proj.rect):
-                    self.die(start_shake=True)  # Player dies if hit by boss projectile
-                    proj.kill()  # Remove projectile
-                    return  # Stop further updates this frame
-
-        # Final position update
-        self.pos += movement_vector
-        self.pos.x = max(self.rect.width // 2, min(self.pos.x, SCREEN_WIDTH - self.rect.width // 2))
-        self.pos.y = max(self.rect.height // 2, min(self.pos.y, SCREEN_HEIGHT - self.rect.height // 2))
-        self.rect.center = self.pos
+            for proj in collide_objects(boss_projectiles, final_rect):
+                self.die(start_shake=True)  # Player dies if hit by boss projectile
+                proj.kill()  # Remove projectile
+                return  # Stop further updates this frame
+
+        # Final position update（限制在畫面內；和 max(最小值, min(x, 最大值)) 相同）
+        x = pos.x + move_x
+        if self._max_x < x: x = self._max_x
+        if x <= self._min_x: x = self._min_x
+        y = pos.y + move_y
+        if self._max_y < y: y = self._max_y
+        if y <= self._min_y: y = self._min_y
+        pos.x = x
+        pos.y = y
+        rect.center = pos
 
         # Update held object's position if any
         if self.held_object:
@@ -376,10 +392,10 @@ class Player(pygame.sprite.Sprite):
             if self.frame_timer >= self.frame_interval:
                 self.current_frame = (self.current_frame + 1) % (len(self.walk_frames) if self.walk_frames else 1)
                 self.frame_timer = 0
-            frame = self.walk_frames[self.current_frame] if self.walk_frames else self.image
+            clip, index = self.walk_frames, self.current_frame
         else:
             if not self.idle_frames:
-                frame = self.walk_frames[0] if self.walk_frames else self.image
+                clip, index = self.walk_frames, 0
                 self.current_frame = 0
             else:
                 if self.current_frame >= len(self.idle_frames):
@@ -389,19 +405,12 @@ class Player(pygame.sprite.Sprite):
                 if self.frame_timer >= current_idle_interval:
                     self.current_frame = (self.current_frame + 1) % len(self.idle_frames)
                     self.frame_timer = 0
-                frame = self.idle_frames[self.current_frame]
+                clip, index = self.idle_frames, self.current_frame
 
-        if self.facing_left:
-            frame = pygame.transform.flip(frame, True, False)
-        self.image = frame
-
-        if self.is_invincible:
-            if not self.is_currently_visible:
-                self.image.set_alpha(100)
-            else:
-                self.image.set_alpha(255)
-        else:
-            self.image.set_alpha(255)
+        if not clip:
+            return
+        # 朝向和無敵閃爍都是預先做好的版本，直接查表，不會改到共用的幀
+        self.image = clip.get(index, self.facing_left, self.is_invincible and not self.is_currently_visible)
 
     def _update_dead_image(self, dt):  # Added dt
         if self.death_frames:
@@ -414,10 +423,7 @@ class Player(pygame.sprite.Sprite):
                     self.current_frame += 1
                     self.frame_timer = 0
 
-            frame_to_draw = self.death_frames[self.current_frame]
-            if self.facing_left:
-                frame_to_draw = pygame.transform.flip(frame_to_draw, True, False)
-            self.image = frame_to_draw
+            self.image = self.death_frames.get(self.current_frame, self.facing_left)
         # else: # Fallback if no death frames (e.g. use dead_color)
         # pass # Current implementation relies on death_frames
 
@@ -454,13 +460,13 @@ class Player(pygame.sprite.Sprite):
                 return None
             self.can_spawn_item_timer = self.item_spawn_cooldown  # Reset cooldown
             # Spawn item near P1 (other_player_pos) or a fixed spot
-            spawn_x = other_player_pos.x + random.randint(-PLAYER_RADIUS * 2, PLAYER_RADIUS * 2)
+            spawn_x = other_player_pos.x + self.rng.randint(-PLAYER_RADIUS * 2, PLAYER_RADIUS * 2)
             spawn_y = other_player_pos.y - PLAYER_RADIUS  # Slightly above P1
 
             spawn_x = max(PLAYER_RADIUS, min(spawn_x, SCREEN_WIDTH - PLAYER_RADIUS))
             spawn_y = max(PLAYER_RADIUS, min(spawn_y, SCREEN_HEIGHT - PLAYER_RADIUS))
 
-            new_obj = ThrowableObject(spawn_x, spawn_y, self.player_id,detected_shape) #
+            new_obj = throwable_pool.acquire(spawn_x, spawn_y, self.player_id, detected_shape) # 優先重複使用被 kill() 的物件
             throwable_objects_group.add(new_obj)
             return new_obj  # Return the spawned object
         return None
@@ -0,0 +1,208 @@
+import itertools
+
+import numpy as np
+import pygame
+
+
+class ProjectileStore:
+    """
+    大量子彈（Boss 子彈）的 structure-of-arrays 版本：位置、速度、存活時間都放在 NumPy 陣列裡，
+    不再是一顆子彈一個 Sprite。每幀 update() 一次向量化地移動全部子彈，
+    超過壽命或飛出畫面的用 boolean mask 一次刪掉；和玩家的碰撞用圓形 vs 矩形整批計算；
+    畫面用一次 Surface.blits() 把同一張子彈圖畫到所有位置。
+
+    陣列裡前 count 個是活著的子彈，刪除時保持原本的順序。死掉的子彈留下的位置直接給之後的子彈用，
+    所以戰鬥中不會建立 / 回收任何 Python 物件；只有同時存在的子彈超過 capacity 時陣列才會加倍一次。
+    介面和原本的 Group 相近：len() / bool / empty() / update(dt) / draw(surface)，
+    另外有 collide(rect) 可以直接傳給 Player.update_movement（collision_grid.collide_objects 會用到）。
+    """
+
+    def __init__(self, image, radius, screen_width, screen_height, capacity=256):
+        self.image = image
+        self.radius = radius
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        # 畫面位置 = 四捨五入後的中心 - 半個圖片大小，和 Rect.center = pos 的結果相同
+        self.half_size = np.array([image.get_width() // 2, image.get_height() // 2])
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        self.prev_pos = np.zeros((capacity, 2))  # 上一次 update() 之前的位置，畫面內插用
+        self.vel = np.zeros((capacity, 2))  # 每 1/60 秒的移動量（和原本的 direction * speed 相同）
+        self.age = np.zeros(capacity)
+        self.lifetime = np.zeros(capacity)
+        self.ids = np.zeros(capacity, dtype=np.int64)  # 每顆子彈唯一的編號，collide() 回傳的 handle 靠它找回子彈
+        self.killed_ids = set()  # 被 kill() 的子彈編號（不含壽命到了、飛出畫面的），PatternEmitter 用來取消分裂
+        self.spawned = 0
+        self.culled = 0
+        self.peak_live = 0
+        self.grow_count = 0  # 陣列加倍的次數
+
+    def _reserve(self, extra):
+        needed = self.count + extra
+        capacity = len(self.age)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        self.grow_count += 1
+        for name in ("pos", "prev_pos", "vel", "age", "lifetime", "ids"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def spawn(self, x, y, directions, speed, lifetime):
+        """
+        從 (x, y) 一次發射多顆子彈。
+        Args:
+            directions: 單位方向向量的序列（或 (n, 2) 陣列），每個方向一顆。
+            speed (float): 每 1/60 秒移動的距離。
+            lifetime (float): 存活秒數。
+        """
+        directions = np.asarray(directions, dtype=float).reshape(-1, 2)
+        self.spawn_rows(np.broadcast_to(np.array((x, y), dtype=float), directions.shape), directions * speed,
+                        np.full(len(directions), float(lifetime)))
+
+    def spawn_rows(self, positions, velocities, lifetimes):
+        """一次加入多顆子彈（每列一顆），bullet_patterns 的預算表格直接整段傳進來。"""
+        amount = len(positions)
+        if not amount:
+            return
+        self._reserve(amount)
+        new = slice(self.count, self.count + amount)
+        self.pos[new] = positions
+        self.prev_pos[new] = positions
+        self.vel[new] = velocities
+        self.age[new] = 0.0
+        self.lifetime[new] = lifetimes
+        self.ids[new] = np.arange(self.spawned, self.spawned + amount)
+        self.count += amount
+        self.spawned += amount
+        self.peak_live = max(self.peak_live, self.count)
+
+    def update(self, dt):
+        n = self.count
+        if not n:
+            return
+        self.prev_pos[:n] = self.pos[:n]
+        self.pos[:n] += self.vel[:n] * (dt * 60)
+        self.age[:n] += dt
+        centers = self._centers()
+        keep = ((self.age[:n] <= self.lifetime[:n])
+                & (centers[:, 0] > 0) & (centers[:, 0] < self.screen_width)
+                & (centers[:, 1] > 0) & (centers[:, 1] < self.screen_height))
+        if not keep.all():
+            self._compact(keep)
+
+    def _centers(self, pos=None):
+        # Rect.center 設成浮點數時是四捨五入（0.5 遠離 0），這裡用同樣的規則
+        if pos is None:
+            pos = self.pos[:self.count]
+        return np.trunc(pos + np.copysign(0.5, pos)).astype(int)
+
+    def _compact(self, keep):
+        n = self.count
+        kept = int(np.count_nonzero(keep))
+        for array in (self.pos, self.prev_pos, self.vel, self.age, self.lifetime, self.ids):
+            array[:kept] = array[:n][keep]
+        self.culled += n - kept
+        self.count = kept
+
+    def hit_mask(self, rect):
+        """每顆子彈（圓形，半徑 radius）是否和 rect 重疊，回傳長度 count 的 boolean 陣列。"""
+        pos = self.pos[:self.count]
+        # 圓心到矩形最近一點的距離（pygame 的 right / bottom 不屬於矩形，最後一個像素是 right - 1 / bottom - 1）
+        nearest_x = np.clip(pos[:, 0], rect.left, rect.right - 1)
+        nearest_y = np.clip(pos[:, 1], rect.top, rect.bottom - 1)
+        dx = pos[:, 0] - nearest_x
+        dy = pos[:, 1] - nearest_y
+        return dx * dx + dy * dy < self.radius * self.radius
+
+    def hit_matrix(self, rects):
+        """多個矩形一次檢查，回傳 (len(rects), count) 的 boolean 陣列。"""
+        if not rects:
+            return np.zeros((0, self.count), dtype=bool)
+        bounds = np.array([(r.left, r.top, r.right - 1, r.bottom - 1) for r in rects], dtype=float)
+        pos = self.pos[:self.count]
+        nearest_x = np.clip(pos[None, :, 0], bounds[:, 0:1], bounds[:, 2:3])
+        nearest_y = np.clip(pos[None, :, 1], bounds[:, 1:2], bounds[:, 3:4])
+        dx = pos[None, :, 0] - nearest_x
+        dy = pos[None, :, 1] - nearest_y
+        return dx * dx + dy * dy < self.radius * self.radius
+
+    def collide(self, rect):
+        """回傳和 rect 重疊的子彈（依發射順序），每個都有 kill()，和 Sprite 的用法相同。"""
+        if not self.count:
+            return []
+        indices = np.flatnonzero(self.hit_mask(rect))
+        return [_ProjectileHandle(self, int(self.ids[i])) for i in indices]
+
+    def kill_indices(self, indices):
+        self.killed_ids.update(self.ids[indices].tolist())
+        keep = np.ones(self.count, dtype=bool)
+        keep[indices] = False
+        self._compact(keep)
+
+    def empty(self):
+        self.count = 0
+        self.killed_ids.clear()
+
+    def topleft_positions(self, alpha=1.0):
+        """每顆子彈畫在哪裡；alpha < 1 時畫在上一次 update() 和這一次之間（固定頻率模擬的畫面內插）。"""
+        if alpha >= 1.0:
+            return self._centers() - self.half_size
+        n = self.count
+        return self._centers(self.prev_pos[:n] + (self.pos[:n] - self.prev_pos[:n]) * alpha) - self.half_size
+
+    def rects(self):
+        width, height = self.image.get_size()
+        return [pygame.Rect(x, y, width, height) for x, y in self.topleft_positions().tolist()]
+
+    def draw(self, surface, alpha=1.0):
+        """一次 blits() 畫出全部子彈，回傳畫到的範圍（給 dirty rect 用）。"""
+        if not self.count:
+            return []
+        return surface.blits(zip(itertools.repeat(self.image), self.topleft_positions(alpha).tolist()))
+
+    def get_stats(self):
+        # 用過的位置最多只有 peak_live 個，其餘的發射都是重複使用舊的位置（原本每一顆都要建立一個 Sprite）
+        reused = self.spawned - self.peak_live
+        return {
+            "live": self.count,
+            "peak_live": self.peak_live,
+            "capacity": len(self.age),
+            "array_grows": self.grow_count,
+            "spawned": self.spawned,
+            "culled": self.culled,
+            "reuse_rate": reused / self.spawned if self.spawned else 0.0,
+            "allocations_avoided": reused,
+        }
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+
+class _ProjectileHandle:
+    """collide() 回傳的單顆子彈，只用來 kill()；用編號找回目前的 index，所以先 kill 別顆也不會錯。"""
+
+    __slots__ = ("store", "projectile_id")
+
+    def __init__(self, store, projectile_id):
+        self.store = store
+        self.projectile_id = projectile_id
+
+    def _index(self):
+        store = self.store
+        matches = np.flatnonzero(store.ids[:store.count] == self.projectile_id)
+        return matches[0] if len(matches) else None
+
+    def kill(self):
+        index = self._index()
+        if index is not None:
+            self.store.kill_indices([index])
+
+    def alive(self):
+        return self._index() is not None
@@ -0,0 +1,53 @@
+class RenderInterpolator:
+    """
+    固定頻率模擬的畫面內插。每個模擬步驟之前 capture() 記下物件的位置，
+    畫面時 apply(alpha) 把 rect 暫時移到「上一步」和「這一步」之間（alpha = 累加器剩下的時間 / 步長），
+    畫完後 restore() 還原，遊戲邏輯看到的永遠是真正的位置。
+
+    一步之內移動超過 snap_distance 的物件（換關、瞬移、復活）直接畫在新位置，不內插。
+    """
+
+    def __init__(self, snap_distance=64):
+        self.snap_distance = snap_distance
+        self._previous = {}  # sprite -> (rect.center, pos 或 None)
+        self._applied = []  # [(sprite, 真正的 rect.center), ...]
+        self._alpha = 1.0
+
+    def capture(self, *groups):
+        previous = {}
+        for group in groups:
+            for sprite in group:
+                pos = getattr(sprite, "pos", None)
+                previous[sprite] = (sprite.rect.center, (pos.x, pos.y) if pos is not None else None)
+        self._previous = previous
+
+    def _lerp(self, previous, current):
+        dx = current[0] - previous[0]
+        dy = current[1] - previous[1]
+        if abs(dx) > self.snap_distance or abs(dy) > self.snap_distance:
+            return current
+        return previous[0] + dx * self._alpha, previous[1] + dy * self._alpha
+
+    def apply(self, alpha):
+        self.restore()
+        self._alpha = alpha
+        if alpha >= 1.0:
+            return
+        for sprite, (previous_center, _) in self._previous.items():
+            current_center = sprite.rect.center
+            if current_center != previous_center:
+                self._applied.append((sprite, current_center))
+                sprite.rect.center = self._lerp(previous_center, current_center)
+
+    def position(self, sprite):
+        """sprite.pos 內插後的位置（例如鎖鏈的兩端）。"""
+        current = (sprite.pos.x, sprite.pos.y)
+        previous = self._previous.get(sprite)
+        if previous is None or previous[1] is None or self._alpha >= 1.0:
+            return current
+        return self._lerp(previous[1], current)
+
+    def restore(self):
+        for sprite, center in self._applied:
+            sprite.rect.center = center
+        self._applied = []
@@ -0,0 +1,118 @@
+import pygame
+
+
+class StaticLayer:
+    """
+    把每一關不會動的畫面（平鋪地板、雷射牆、固定裝飾）預先合成到 display-format 的 Surface。
+    主迴圈每幀只需要 draw() 一次，只有關卡改變時才重建。
+
+    雷射牆另外合成成一張獨立的圖層：平常直接用「地板 + 不透明牆壁」那張圖，
+    隱形牆效果淡入淡出時改成地板 + 牆壁圖層（整張 set_alpha），不必每幀重畫每一面牆。
+    碰撞仍然使用各自的 LaserWall.rect，這裡只負責畫面。
+    """
+
+    # 牆壁圖層的透明色，雷射牆的顏色不能和它相同
+    WALL_LAYER_COLORKEY = (0, 0, 0)
+
+    def __init__(self, width, height, floor_tile, background_color=(0, 0, 0)):
+        self.width = width
+        self.height = height
+        self.floor_tile = floor_tile
+        self.background_color = background_color
+        self.level_key = None
+        self.laser_wall_rects = []
+        self.laser_wall_color = (255, 0, 255)
+        self.decor = []  # [(image, topleft), ...]
+        self.surface = None  # 地板 + 固定裝飾
+        self.walled_surface = None  # surface 再加上不透明的雷射牆，牆壁沒有淡化時直接用這張
+        self.wall_layer = None  # 只有雷射牆（colorkey 透明背景），裁成所有牆壁的外框大小
+        self.wall_layer_pos = (0, 0)
+        self.rebuild_count = 0
+        self._floor_surface = None  # 只有地板的底圖，所有關卡共用
+        self._built = False
+        self._last_alpha = None
+
+    def set_level(self, level_key, laser_wall_rects=(), laser_wall_color=None, decor=()):
+        """換關時呼叫：記錄這一關的靜態內容，下次 draw() / get_surface() 時重建。"""
+        self.level_key = level_key
+        self.laser_wall_rects = [pygame.Rect(r) for r in laser_wall_rects]
+        if laser_wall_color is not None:
+            self.laser_wall_color = laser_wall_color
+        self.decor = list(decor)
+        self.invalidate()
+
+    def invalidate(self):
+        self._built = False
+
+    def get_surface(self, laser_wall_alpha=255):
+        """
+        回傳可以直接 blit 的整張背景。
+        牆壁完全不透明或完全隱形時就是最終畫面；半透明時只有地板，牆壁要再用 draw() 疊上去。
+        """
+        self._ensure_built()
+        if self.laser_wall_rects and laser_wall_alpha >= 255:
+            return self.walled_surface
+        return self.surface
+
+    def draw(self, surface, laser_wall_alpha=255):
+        """
+        畫出背景（含目前透明度的雷射牆）。
+        Returns:
+            list: 透明度和上一幀不同時回傳雷射牆的範圍（給 dirty rect 用），否則是空 list。
+        """
+        alpha = max(0, min(255, int(laser_wall_alpha))) if self.laser_wall_rects else None
+        surface.blit(self.get_surface(255 if alpha is None else alpha), (0, 0))
+        if alpha is not None and 0 < alpha < 255:
+            self.wall_layer.set_alpha(alpha, pygame.RLEACCEL)
+            surface.blit(self.wall_layer, self.wall_layer_pos)
+
+        dirty_rects = []
+        if alpha != self._last_alpha:
+            dirty_rects = list(self.laser_wall_rects)
+            self._last_alpha = alpha
+        return dirty_rects
+
+    def _ensure_built(self):
+        if not self._built:
+            self._rebuild()
+            self._built = True
+            self._last_alpha = None
+
+    def _get_floor_surface(self):
+        if self._floor_surface is None:
+            floor = pygame.Surface((self.width, self.height)).convert()
+            floor.fill(self.background_color)
+            tile_w, tile_h = self.floor_tile.get_width(), self.floor_tile.get_height()
+            for y in range(0, self.height, tile_h):
+                for x in range(0, self.width, tile_w):
+                    floor.blit(self.floor_tile, (x, y))
+            self._floor_surface = floor
+        return self._floor_surface
+
+    def _rebuild(self):
+        if self.surface is None:
+            self.surface = pygame.Surface((self.width, self.height)).convert()
+        self.surface.blit(self._get_floor_surface(), (0, 0))
+        for image, topleft in self.decor:
+            self.surface.blit(image, topleft)
+
+        self.wall_layer = None
+        self.walled_surface = self.surface
+        if self.laser_wall_rects:
+            bounds = self.laser_wall_rects[0].unionall(self.laser_wall_rects[1:])
+            walls = pygame.Surface(bounds.size).convert()
+            walls.fill(self.WALL_LAYER_COLORKEY)
+            for rect in self.laser_wall_rects:
+                walls.fill(self.laser_wall_color[:3], rect.move(-bounds.x, -bounds.y))
+            self.wall_layer_pos = bounds.topleft
+
+            # 不透明版本直接合成進背景
+            self.walled_surface = self.surface.copy()
+            walls.set_colorkey(self.WALL_LAYER_COLORKEY)
+            self.walled_surface.blit(walls, self.wall_layer_pos)
+
+            # 半透明用的圖層另外複製一份再 RLE 編碼：透明的部分整段跳過，blit 幾乎只花在牆壁像素上。
+            # （RLE 圖層如果先以不透明的狀態 blit 過，之後改 alpha 不會重新編碼，所以不能和上面共用）
+            self.wall_layer = walls.copy()
+            self.wall_layer.set_colorkey(self.WALL_LAYER_COLORKEY, pygame.RLEACCEL)
+        self.rebuild_count += 1
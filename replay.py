@@ -0,0 +1,202 @@
+"""
+錄製 / 重播遊戲輸入。
+
+重播檔只存「種子 + 起始關卡 + 每個模擬步驟的輸入」：GameEngine 的所有隨機數都來自同一個有種子的 rng，
+步長固定（SIMULATION_DT），所以同樣的輸入一定重現同一場遊戲。檔尾附上最後狀態的 checksum，重播時用來確認結果一致。
+
+每一步的輸入壓成一個 16-bit 的字：GameEngine.input_keys（兩位玩家的方向鍵 + 復活鍵）各佔一個 bit，
+接著是 GameEngine.ACTION_KEYS（P1 拾取 / 投擲、P2 畫出物品）這一步有沒有按下；
+有按 P2 畫出物品的步驟另外存一個 byte 的形狀編號。整段再用 zlib 壓縮（大部分時間按鍵都不變，壓縮率很高）。
+
+錄製：python main.py --record run.rtr [--seed 1234]
+重播：python replay.py run.rtr [--repeat 10]
+"""
+import json
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from game_engine import GameEngine, InputState, init_headless
+from game_objects import SIMULATION_DT, SIMULATION_HZ
+
+REPLAY_MAGIC = b"RTRP"
+REPLAY_VERSION = 1
+BOSS_LEVEL_ID = -1 # 檔案裡 Boss 關的關卡編號
+# magic, version, seed, level, 模擬頻率, 步數, 起始的 engine.steps / 時間 / 分數 / 總分, 最後狀態的 checksum
+_HEADER = struct.Struct("<4sBQhHIIdiiI")
+
+
+def snapshot_digest(snapshot):
+    """GameEngine.snapshot() 的 checksum（浮點數用 repr 比對，一個 bit 不同就不一樣）。"""
+    return zlib.crc32(json.dumps(snapshot, sort_keys=True).encode("utf-8"))
+
+
+class Replay:
+    def __init__(self, seed, level, keys, action_keys, words=None, shapes=None, shape_table=None,
+                 start_steps=0, start_time=0.0, start_score=0, start_total_score=0, digest=0, hz=SIMULATION_HZ):
+        self.seed = seed
+        self.level = level # levels_data 的 index 或 "boss"
+        self.keys = list(keys)
+        self.action_keys = list(action_keys)
+        self.words = words if words is not None else array("H")
+        self.shapes = shapes if shapes is not None else bytearray()
+        self.shape_table = shape_table if shape_table is not None else ["None"]
+        self.start_steps = start_steps
+        self.start_time = start_time
+        self.start_score = start_score
+        self.start_total_score = start_total_score
+        self.digest = digest
+        self.hz = hz
+
+    def __len__(self):
+        return len(self.words)
+
+    def save(self, path):
+        words = array("H", self.words)
+        if sys.byteorder != "little":
+            words.byteswap()
+        payload = zlib.compress(words.tobytes() + bytes(self.shapes), 9)
+        level = BOSS_LEVEL_ID if self.level == "boss" else self.level
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, level, self.hz, len(words),
+                                 self.start_steps, self.start_time, self.start_score, self.start_total_score,
+                                 self.digest))
+            f.write(struct.pack("<BB", len(self.keys), len(self.action_keys)))
+            f.write(struct.pack(f"<{len(self.keys) + len(self.action_keys)}I", *self.keys, *self.action_keys))
+            f.write(struct.pack("<B", len(self.shape_table)))
+            for name in self.shape_table:
+                encoded = name.encode("utf-8")
+                f.write(struct.pack("<B", len(encoded)) + encoded)
+            f.write(payload)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        (magic, version, seed, level, hz, ticks, start_steps, start_time, start_score, start_total_score,
+         digest) = _HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} 不是可讀取的重播檔（magic={magic!r}, version={version}）")
+        offset = _HEADER.size
+        key_count, action_count = struct.unpack_from("<BB", data, offset)
+        offset += 2
+        codes = struct.unpack_from(f"<{key_count + action_count}I", data, offset)
+        offset += 4 * len(codes)
+        shape_table = []
+        (shape_count,) = struct.unpack_from("<B", data, offset)
+        offset += 1
+        for _ in range(shape_count):
+            (length,) = struct.unpack_from("<B", data, offset)
+            shape_table.append(data[offset + 1:offset + 1 + length].decode("utf-8"))
+            offset += 1 + length
+        payload = zlib.decompress(data[offset:])
+        words = array("H")
+        words.frombytes(payload[:ticks * 2])
+        if sys.byteorder != "little":
+            words.byteswap()
+        return cls(seed, "boss" if level == BOSS_LEVEL_ID else level, codes[:key_count], codes[key_count:],
+                   words, bytearray(payload[ticks * 2:]), shape_table, start_steps, start_time, start_score,
+                   start_total_score, digest, hz)
+
+    def inputs(self):
+        """依序產生每一步的 InputState。"""
+        keys = self.keys
+        action_keys = self.action_keys
+        draw_bit = 1 << (len(keys) + len(action_keys) - 1) # 最後一個動作鍵是 P2 畫出物品
+        shapes = iter(self.shapes)
+        decoded = {}
+        for word in self.words:
+            if word & draw_bit:
+                detected_shape = self.shape_table[next(shapes)]
+            else:
+                detected_shape = "None"
+            key = (word, detected_shape)
+            state = decoded.get(key)
+            if state is None:
+                held = [code for bit, code in enumerate(keys) if word >> bit & 1]
+                pressed = [code for bit, code in enumerate(action_keys, len(keys)) if word >> bit & 1]
+                # InputState 不會被修改，同樣的輸入共用一個
+                state = decoded[key] = InputState(held, pressed, detected_shape)
+            yield state
+
+
+class ReplayRecorder:
+    """
+    錄下 GameEngine 從某一關開始的每一步輸入。開始錄之前 engine 要先用 reseed() 換好種子再載入關卡，
+    之後每次 engine.step() 之前呼叫 record(input_state)，最後 finish() 得到 Replay。
+    """
+
+    def __init__(self, engine, level):
+        self.replay = Replay(engine.seed, level, engine.input_keys, engine.ACTION_KEYS,
+                             start_steps=engine.steps, start_time=engine.game_time_elapsed, start_score=engine.current_score,
+                             start_total_score=engine.final_player_score)
+        self._bits = {code: 1 << bit for bit, code in
+                      enumerate(list(engine.input_keys) + list(engine.ACTION_KEYS))}
+        self._draw_key = engine.ACTION_KEYS[-1]
+        self._shape_ids = {"None": 0}
+
+    def record(self, input_state):
+        bits = self._bits
+        word = 0
+        for code in input_state.held:
+            word |= bits.get(code, 0)
+        for code in input_state.pressed:
+            word |= bits.get(code, 0)
+        self.replay.words.append(word)
+        if self._draw_key in input_state.pressed:
+            shape_id = self._shape_ids.get(input_state.detected_shape)
+            if shape_id is None:
+                shape_id = self._shape_ids[input_state.detected_shape] = len(self.replay.shape_table)
+                self.replay.shape_table.append(input_state.detected_shape)
+            self.replay.shapes.append(shape_id)
+
+    def __len__(self):
+        return len(self.replay)
+
+    def finish(self, snapshot):
+        self.replay.digest = snapshot_digest(snapshot)
+        return self.replay
+
+
+def play(replay, engine=None):
+    """在 engine（沒給的話建立一個）上從頭重播，回傳 engine。"""
+    if engine is None:
+        engine = GameEngine()
+    engine.reset(replay.level, replay.seed)
+    engine.steps = replay.start_steps
+    engine.game_time_elapsed = replay.start_time
+    engine.current_score = replay.start_score
+    engine.final_player_score = replay.start_total_score
+    dt = 1.0 / replay.hz if replay.hz != SIMULATION_HZ else SIMULATION_DT
+    step = engine.step
+    for input_state in replay.inputs():
+        step(input_state, dt)
+    return engine
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("用法：python replay.py <重播檔> [--repeat N]")
+        return 2
+    repeat = int(sys.argv[sys.argv.index("--repeat") + 1]) if "--repeat" in sys.argv else 1
+    init_headless()
+    replay = Replay.load(sys.argv[1])
+    engine = GameEngine()
+    simulated = len(replay) / replay.hz
+    print(f"種子 {replay.seed}，關卡 {replay.level}，{len(replay)} 步（{simulated:.1f} 秒）")
+    matched = True
+    for run in range(repeat):
+        start = time.perf_counter()
+        play(replay, engine)
+        elapsed = time.perf_counter() - start
+        digest = snapshot_digest(engine.snapshot())
+        matched = matched and digest == replay.digest
+        print(f"  第 {run + 1} 次：{elapsed * 1000:.0f} ms，{simulated / elapsed:.0f} 倍速，"
+              f"結果{'一致' if digest == replay.digest else '不一致'}（{digest:08x} / {replay.digest:08x}）")
+    return 0 if matched else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+取樣式 profiler：背景執行緒每隔 interval 秒用 sys._current_frames() 看一次主執行緒停在哪裡，
+記下整條呼叫堆疊。不像 cProfile 會拖慢每一個函式呼叫，Boss 戰裡和時間有關的卡頓還是重現得出來。
+
+輸出是 flame graph 工具（flamegraph.pl、speedscope、inferno）讀的 collapsed stack 格式，每行一種堆疊：
+
+    BOSS_LEVEL;main.py:<module>;game_engine.py:GameEngine.step;boss_entities.py:Boss.update 42
+
+最外層是取樣當下的 game_state 名稱，只看某個畫面時 grep 開頭就好，或用 write_collapsed(path, state="BOSS_LEVEL")。
+
+取樣執行緒要拿到 GIL 才能取樣：主執行緒在 flip / sleep 之類會放開 GIL 的地方一定取得到，
+一直在跑 Python 程式時則要等 sys.getswitchinterval()（預設 5 ms）一到才會切換，所以實際頻率可能比 interval 低。
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from game_objects import STATE_NAMES
+
+
+class SamplingProfiler:
+    def __init__(self, state_getter=None, interval=0.005, thread=None):
+        self.state_getter = state_getter  # 回傳目前 game_state 的函式
+        self.interval = interval
+        self.thread_ident = (thread or threading.main_thread()).ident
+        self.samples = Counter()  # (狀態名稱, 堆疊) -> 次數
+        self.sample_count = 0
+        self.running = False
+        self._labels = {}  # code object -> "檔名:函式"，同一個函式只組一次字串
+        self._thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="sampling_profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._thread.join()
+        self._thread = None
+
+    def clear(self):
+        self.samples.clear()
+        self.sample_count = 0
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{os.path.basename(code.co_filename)}:{name}"
+        return label
+
+    def _state_name(self):
+        if self.state_getter is None:
+            return "ALL"
+        state = self.state_getter()
+        return STATE_NAMES.get(state, str(state))
+
+    def _run(self):
+        # 用下一次取樣的目標時間排程，取樣本身花的時間不會讓頻率越來越低
+        next_sample = time.perf_counter()
+        while self.running:
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_sample = time.perf_counter() # 落後太多時不要連續補取樣
+            frame = sys._current_frames().get(self.thread_ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            self.samples[(self._state_name(), tuple(stack))] += 1
+            self.sample_count += 1
+
+    def collapsed_lines(self, state=None):
+        lines = []
+        for (state_name, stack), count in sorted(self.samples.items(), key=lambda item: -item[1]):
+            if state is not None and state_name != state:
+                continue
+            lines.append(";".join((state_name,) + stack) + f" {count}")
+        return lines
+
+    def write_collapsed(self, path, state=None):
+        """寫出 collapsed stack 檔，回傳寫了幾種堆疊。state 只保留某個畫面（例如 "BOSS_LEVEL"）。"""
+        lines = self.collapsed_lines(state)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+            if lines:
+                f.write("\n")
+        return len(lines)
+
+    def state_totals(self):
+        totals = Counter()
+        for (state_name, _), count in self.samples.items():
+            totals[state_name] += count
+        return totals
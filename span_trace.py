@@ -0,0 +1,151 @@
+"""
+輕量的時間區段（span）記錄，可以匯出成 Chrome trace JSON，用 Perfetto（https://ui.perfetto.dev）或 chrome://tracing 打開。
+
+每個 span 是 (名稱, 開始時間, 長度, 執行緒)，時間用 time.perf_counter_ns()。
+記錄放在建立時就配置好的環狀陣列裡，滿了就覆蓋最舊的，所以可以一直開著：卡頓發生之後再按熱鍵匯出，
+就能看到最近幾秒每一幀裡是哪個呼叫花了時間，不必整場遊戲都開 cProfile。
+
+    with span_trace.span("load_level"):
+        ...
+
+    @traced("save_game_state")
+    def save_game_state():
+        ...
+
+    start = time.perf_counter_ns()
+    ...
+    span_trace.record("simulation", start)
+"""
+import functools
+import itertools
+import json
+import threading
+import time
+from array import array
+
+
+class _Span:
+    __slots__ = ("trace", "name", "start")
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.record(self.name, self.start)
+        return False
+
+
+class SpanTrace:
+    def __init__(self, capacity=1 << 16):
+        self.capacity = capacity
+        self.enabled = True
+        self.names = []  # name id -> 名稱
+        self._name_ids = {}
+        self._name = array("I", bytes(4 * capacity))
+        self._start = array("q", bytes(8 * capacity))
+        self._duration = array("q", bytes(8 * capacity))
+        self._thread = array("Q", bytes(8 * capacity))
+        # next() 在 GIL 底下是原子操作，音樂淡出之類的背景執行緒同時記錄也不會拿到同一格
+        self._counter = itertools.count()
+        self.recorded = 0
+        self._thread_names = {}  # 執行緒結束後 threading.enumerate() 就找不到了，第一次記錄時先記下名稱
+
+    def _name_id(self, name):
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def record(self, name, start, end=None):
+        """記錄一個從 start 到 end（預設是現在）的 span，回傳 end。"""
+        if end is None:
+            end = time.perf_counter_ns()
+        if self.enabled:
+            index = next(self._counter)
+            slot = index % self.capacity
+            self._name[slot] = self._name_id(name)
+            self._start[slot] = start
+            self._duration[slot] = end - start
+            ident = threading.get_ident()
+            self._thread[slot] = ident
+            if ident not in self._thread_names:
+                self._thread_names[ident] = threading.current_thread().name
+            # 另一個執行緒可能已經記了更後面的一格，不要讓 recorded 往回退（spans() 會漏掉最新的那一格）
+            self.recorded = max(self.recorded, index + 1)
+        return end
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def traced(self, name=None):
+        """函式用的 decorator，每次呼叫記錄一個 span（名稱預設是函式名稱）。"""
+        def decorate(function):
+            span_name = name or function.__qualname__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter_ns()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(span_name, start)
+            return wrapper
+        return decorate
+
+    def spans(self, since=None, until=None):
+        """
+        目前還在環狀陣列裡的 span，依記錄的順序回傳 [(名稱, 開始 ns, 長度 ns, 執行緒 ident), ...]。
+        有給 since / until 時只回傳和這段時間重疊的。
+        """
+        recorded = self.recorded
+        first = recorded - min(recorded, self.capacity)
+        result = []
+        # span 是在結束時記錄的，越後面的結束得越晚：從最新的往回找，結束時間早於 since 就可以停了
+        for index in range(recorded - 1, first - 1, -1):
+            slot = index % self.capacity
+            start = self._start[slot]
+            duration = self._duration[slot]
+            if since is not None and start + duration < since:
+                break
+            if until is not None and start > until:
+                continue
+            result.append((self.names[self._name[slot]], start, duration, self._thread[slot]))
+        result.reverse()
+        return result
+
+    def thread_name(self, ident):
+        return self._thread_names.get(ident, str(ident))
+
+    def to_chrome_trace(self):
+        thread_names = self._thread_names
+        thread_ids = {}  # threading ident -> 比較好讀的小編號
+        events = []
+        for name, start, duration, ident in self.spans():
+            tid = thread_ids.get(ident)
+            if tid is None:
+                tid = thread_ids[ident] = len(thread_ids) + 1
+            # Chrome trace 的時間單位是微秒
+            events.append({"name": name, "ph": "X", "ts": start / 1000, "dur": duration / 1000, "pid": 1, "tid": tid})
+        for ident, tid in thread_ids.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                           "args": {"name": thread_names.get(ident, f"thread-{tid}")}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+    def clear(self):
+        self._counter = itertools.count()
+        self.recorded = 0
+
+
+span_trace = SpanTrace()
+traced = span_trace.traced
@@ -0,0 +1,72 @@
+import math
+
+import pygame
+
+
+class SpriteCache:
+    """
+    程式畫出來的圖（隕石、警告圈、Boss 子彈、可投擲物、暫停遮罩...）的快取。
+    同樣的 key 只呼叫一次 build() 畫圖並轉成 display format，之後所有物件共用同一張 Surface，
+    不必每次生成或每幀重新建立 Surface。
+
+    回傳的 Surface 是共用的，不要在上面畫圖或 set_alpha()；需要修改時請先 copy()。
+    """
+
+    def __init__(self):
+        self._sprites = {}  # key -> Surface 或 (Surface, ...)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build, alpha=True):
+        """
+        Args:
+            key: 可 hash 的 key，通常是 (名稱, 尺寸, 顏色...)。
+            build (callable): 沒有快取時呼叫，回傳新畫好的 Surface。
+            alpha (bool): True 用 convert_alpha()，False 用 convert()（不透明的圖 blit 比較快）。
+        """
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self.hits += 1
+            return sprite
+        self.misses += 1
+        sprite = self._to_display_format(build(), alpha)
+        self._sprites[key] = sprite
+        return sprite
+
+    def get_sequence(self, key, frame_count, build_frame, alpha=True):
+        """預先算好一整組幀（例如閃爍動畫），build_frame(i) 產生第 i 幀，回傳 tuple。"""
+        frames = self._sprites.get(key)
+        if frames is not None:
+            self.hits += 1
+            return frames
+        self.misses += 1
+        frames = tuple(self._to_display_format(build_frame(i), alpha) for i in range(frame_count))
+        self._sprites[key] = frames
+        return frames
+
+    @staticmethod
+    def _to_display_format(surface, alpha):
+        if pygame.display.get_surface() is None:
+            return surface
+        return surface.convert_alpha() if alpha else surface.convert()
+
+    def clear(self):
+        self._sprites.clear()
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "sprites": len(self._sprites),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+sprite_cache = SpriteCache()
+
+
+def sample_pulse_frame(frames, timer, angular_speed):
+    """依計時器從一個完整週期（sin 一圈）的預算幀中取出對應的那一幀。"""
+    phase = (timer * angular_speed) % (2 * math.pi)
+    return frames[int(phase / (2 * math.pi) * len(frames)) % len(frames)]
@@ -0,0 +1,98 @@
+import bisect
+import itertools
+from collections import OrderedDict
+
+
+class TextCache:
+    """
+    文字 Surface 快取：以 (font, text, color, antialias) 當 key，同樣的字串直接回傳同一張 Surface，
+    不必每幀重新 font.render()（中文字型 render 是 HUD 最花時間的地方）。
+
+    使用 LRU 淘汰，總大小超過 max_bytes 時先丟最久沒用到的。
+    回傳的 Surface 是共用的，呼叫端不要修改它（例如 set_alpha）。
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # key -> (surface, size_in_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, antialias, color, background=None):
+        """參數順序和 font.render() 相同，方便直接替換。"""
+        key = (font, text, tuple(color), antialias, tuple(background) if background is not None else None)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        if background is None:
+            surface = font.render(text, antialias, color)
+        else:
+            surface = font.render(text, antialias, color, background)
+        size = surface.get_pitch() * surface.get_height()
+        self._entries[key] = (surface, size)
+        self.current_bytes += size
+        self._evict()
+        return surface
+
+    def _evict(self):
+        # 至少保留剛放進來的那一張
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# 每個字型各自的字元寬度表：{font: {char: advance}}
+_glyph_width_tables = {}
+
+
+def get_glyph_widths(font, text):
+    """查表取得 text 每個字元的 advance 寬度，沒看過的字元一次用 font.metrics() 補進表裡。"""
+    table = _glyph_width_tables.setdefault(font, {})
+    missing = [char for char in dict.fromkeys(text) if char not in table]
+    if missing:
+        for char, metrics in zip(missing, font.metrics("".join(missing))):
+            table[char] = metrics[4] if metrics else 0  # 字型沒有的字元 metrics 會是 None
+    return [table[char] for char in text]
+
+
+def truncate_text_to_width(font, text, max_width, ellipsis="..."):
+    """
+    太長的字串截斷並加上 ellipsis，讓結果寬度不超過 max_width。
+    用字元寬度表的前綴和做二分搜尋，不需要逐字 render；
+    advance 加總和實際排版可能差 1px（kerning、最後一個字的外框），最後再用 font.size() 微調。
+    """
+    if font.size(text)[0] <= max_width:
+        return text
+    prefix_widths = list(itertools.accumulate(get_glyph_widths(font, text)))
+    keep = bisect.bisect_right(prefix_widths, max_width - font.size(ellipsis)[0])
+    while keep > 0 and font.size(text[:keep] + ellipsis)[0] > max_width:
+        keep -= 1
+    while keep < len(text) and font.size(text[:keep + 1] + ellipsis)[0] <= max_width:
+        keep += 1
+    return text[:keep] + ellipsis